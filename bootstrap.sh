@@ -29,9 +29,11 @@ if [[ "$PLATFORM" == "macos" ]]; then
     else
         echo "✅ Homebrew already installed"
     fi
-else
+elif command -v apt-get &> /dev/null; then
     echo "📦 Installing apt packages..."
     bash "$INSTALL_DIR/install_apt.sh"
+else
+    echo "📦 No apt-get; the orchestrator installs system packages with dnf, apk or pacman"
 fi
 
 # Install pyenv if missing
@@ -46,8 +48,8 @@ else
     echo "✅ pyenv already installed"
 fi
 
-# Install Python 3.12 via pyenv
-echo "🐍 Installing Python 3.12..."
+# Install the configured Python via pyenv
+echo "🐍 Installing Python..."
 bash "$INSTALL_DIR/install_python.sh"
 
 # Setup Python orchestrator
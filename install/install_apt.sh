@@ -11,38 +11,137 @@ if ! command -v apt-get &>/dev/null; then
     exit 1
 fi
 
-# Parse YAML to get package names and apt overrides
+SNAPSHOT_FILE="$(dirname "$SCRIPT_DIR")/config/.snapshot/config.sh"
+
 PACKAGES=()
-current_name=""
-while IFS= read -r line; do
-    if [[ $line =~ ^[[:space:]]*-\ name: ]]; then
-        # Start of a package entry
-        if [[ -n "$current_name" ]]; then
-            PACKAGES+=("$current_name")
+if [[ -f "$SNAPSHOT_FILE" && "$SNAPSHOT_FILE" -nt "$CONFIG_FILE" ]]; then
+    # Package list precompiled by orchestrate/config.py
+    source "$SNAPSHOT_FILE"
+    PACKAGES=("${FOUNDRY_APT_PACKAGES[@]}")
+else
+    # Parse YAML to get package names and apt overrides
+    current_name=""
+    while IFS= read -r line; do
+        if [[ $line =~ ^[[:space:]]*-\ name: ]]; then
+            # Start of a package entry
+            if [[ -n "$current_name" ]]; then
+                PACKAGES+=("$current_name")
+            fi
+            current_name="$(echo "$line" | cut -d: -f2 | xargs)"
+        elif [[ $line =~ apt-override: ]]; then
+            current_name="$(echo "$line" | cut -d: -f2 | xargs)"
         fi
-        current_name="$(echo "$line" | cut -d: -f2 | xargs)"
-    elif [[ $line =~ apt-override: ]]; then
-        current_name="$(echo "$line" | cut -d: -f2 | xargs)"
+    done < "$CONFIG_FILE"
+    if [[ -n "$current_name" ]]; then
+        PACKAGES+=("$current_name")
     fi
-done < "$CONFIG_FILE"
-if [[ -n "$current_name" ]]; then
-    PACKAGES+=("$current_name")
 fi
-PACKAGES_STR="${PACKAGES[*]}"
 
-VALID_PACKAGES=()
-for pkg in "${PACKAGES[@]}"; do
-    if apt-cache show "$pkg" >/dev/null 2>&1; then
-        VALID_PACKAGES+=("$pkg")
-    else
-        echo "⚠️  apt package not found: $pkg. Skipping." >&2
-        TODO_FILE="$(dirname "$SCRIPT_DIR")/TODO.md"
-        TODO_LINE="- [ ] Add apt installation method for $pkg"
-        if [[ -f "$TODO_FILE" ]] && ! grep -Fxq "$TODO_LINE" "$TODO_FILE"; then
-            echo "$TODO_LINE" >> "$TODO_FILE"
+# Refresh policy for apt-get update: auto (default), always or never.
+# In auto mode the update is skipped when the package lists are younger than
+# APT_LISTS_TTL seconds and every requested package is already resolvable.
+APT_REFRESH="${APT_REFRESH:-auto}"
+APT_LISTS_TTL="${APT_LISTS_TTL:-21600}"
+APT_LISTS_DIR="/var/lib/apt/lists"
+# Touched after a successful update; list mtimes are only a fallback because
+# apt-get update leaves lists the mirror reports unchanged untouched.
+APT_UPDATE_STAMP="/var/lib/apt/periodic/update-success-stamp"
+
+# Resolve every package with one apt-cache policy call, like
+# orchestrate/apt_cache.parse_policy: each apt-cache run reloads the whole
+# cache, so probing package by package costs one cache load each.
+probe_packages() {
+    VALID_PACKAGES=()
+    MISSING_PACKAGES=()
+    [[ ${#PACKAGES[@]} -gt 0 ]] || return 0
+    local -A candidate=()
+    local name="" line pkg
+    while IFS= read -r line; do
+        if [[ $line =~ ^([^[:space:]]+):$ ]]; then
+            name="${BASH_REMATCH[1]}"
+        elif [[ -n "$name" && $line =~ ^[[:space:]]+Candidate:[[:space:]]*(.*)$ ]]; then
+            if [[ -n "${BASH_REMATCH[1]}" && "${BASH_REMATCH[1]}" != "(none)" ]]; then
+                candidate["$name"]=1
+            fi
+        fi
+    done < <(LC_ALL=C apt-cache policy "${PACKAGES[@]}" 2>/dev/null || true)
+    for pkg in "${PACKAGES[@]}"; do
+        if [[ -n "${candidate[$pkg]:-}" ]]; then
+            VALID_PACKAGES+=("$pkg")
+        else
+            MISSING_PACKAGES+=("$pkg")
         fi
+    done
+}
+
+lists_fresh() {
+    local cutoff=$(( $(date +%s) - APT_LISTS_TTL ))
+    local newest
+    if [[ -f "$APT_UPDATE_STAMP" ]]; then
+        newest="$(stat -c %Y "$APT_UPDATE_STAMP")"
+    else
+        [[ -d "$APT_LISTS_DIR" ]] || return 1
+        newest="$(find "$APT_LISTS_DIR" -maxdepth 1 -type f ! -name lock -printf '%T@\n' 2>/dev/null | sort -n | tail -1)"
     fi
+    [[ -n "$newest" ]] && (( ${newest%.*} > cutoff ))
+}
+
+probe_packages
+case "$APT_REFRESH" in
+    always)
+        REFRESH_REASON="refresh forced" ;;
+    never)
+        REFRESH_REASON="" ;;
+    *)
+        if ! lists_fresh; then
+            REFRESH_REASON="package lists older than ${APT_LISTS_TTL}s"
+        elif [[ ${#MISSING_PACKAGES[@]} -gt 0 ]]; then
+            REFRESH_REASON="${#MISSING_PACKAGES[@]} package(s) not resolvable"
+        else
+            REFRESH_REASON=""
+        fi ;;
+esac
+
+if [[ -n "$REFRESH_REASON" ]]; then
+    echo "🔄 Updating apt package lists ($REFRESH_REASON)"
+    apt-get update
+    mkdir -p "$(dirname "$APT_UPDATE_STAMP")" && touch "$APT_UPDATE_STAMP" || true
+    probe_packages
+else
+    echo "⏭️  Skipping apt-get update (APT_REFRESH=$APT_REFRESH)"
+fi
+
+# Record missing packages in TODO.md and in the sidecar shared with
+# orchestrate/todo.py, holding the same flock as the Python writers.
+record_missing() {
+    local todo_file sidecar pkg text
+    todo_file="$(dirname "$SCRIPT_DIR")/TODO.md"
+    sidecar="$(dirname "$SCRIPT_DIR")/.missing-packages.jsonl"
+    {
+        if command -v flock &>/dev/null; then
+            flock 9
+        fi
+        for pkg in "$@"; do
+            if ! grep -Fq "{\"manager\": \"apt\", \"package\": \"$pkg\"," "$sidecar"; then
+                printf '{"manager": "apt", "package": "%s", "source": "install_apt.sh"}\n' "$pkg" >&9
+            fi
+            text="Add apt installation method for $pkg"
+            # Items may end in a "(did you mean: ...)" hint from the Python writers.
+            if [[ -f "$todo_file" ]] && ! awk -v t="$text" '
+                { sub(/ \(did you mean: .*\)[[:space:]]*$/, ""); sub(/^[[:space:]]*- \[[ xX]\] /, "") }
+                $0 == t { found = 1 } END { exit !found }' "$todo_file"; then
+                echo "- [ ] $text" >> "$todo_file"
+            fi
+        done
+    } 9>>"$sidecar"
+}
+
+for pkg in "${MISSING_PACKAGES[@]}"; do
+    echo "⚠️  apt package not found: $pkg. Skipping." >&2
 done
+if [[ ${#MISSING_PACKAGES[@]} -gt 0 ]]; then
+    record_missing "${MISSING_PACKAGES[@]}"
+fi
 
 if [[ ${#VALID_PACKAGES[@]} -eq 0 ]]; then
     echo "No valid apt packages to install"
@@ -52,7 +151,6 @@ fi
 PACKAGES_STR="${VALID_PACKAGES[*]}"
 
 echo "📦 Installing apt packages: $PACKAGES_STR"
-apt-get update
 apt-get install -y $PACKAGES_STR
 
 echo "✅ apt packages installed"
@@ -24,27 +24,38 @@ if [[ ! -f "$CONFIG_FILE" ]]; then
     exit 1
 fi
 
-# Extract package names from YAML (simple parsing)
+SNAPSHOT_FILE="$(dirname "$0")/../config/.snapshot/config.sh"
+
 PACKAGES=()
-while IFS= read -r line; do
-    # Skip comments and empty lines
-    if [[ "$line" =~ ^[[:space:]]*# ]] || [[ -z "${line// }" ]]; then
-        continue
-    fi
-    # Extract package names (lines starting with -)
-    if [[ "$line" =~ ^[[:space:]]*-[[:space:]]*([^[:space:]]+) ]]; then
-        PACKAGE="${BASH_REMATCH[1]}"
-        # Skip commented packages
-        if [[ ! "$PACKAGE" =~ ^# ]]; then
-            PACKAGES+=("$PACKAGE")
+if [[ -f "$SNAPSHOT_FILE" && "$SNAPSHOT_FILE" -nt "$CONFIG_FILE" ]]; then
+    # Package list precompiled by orchestrate/config.py
+    source "$SNAPSHOT_FILE"
+    PACKAGES=("${FOUNDRY_NPM_PACKAGES[@]}")
+else
+    # Extract package names from YAML (simple parsing)
+    while IFS= read -r line; do
+        # Skip comments and empty lines
+        if [[ "$line" =~ ^[[:space:]]*# ]] || [[ -z "${line// }" ]]; then
+            continue
+        fi
+        # Extract package names (lines starting with -)
+        if [[ "$line" =~ ^[[:space:]]*-[[:space:]]*([^[:space:]]+) ]]; then
+            PACKAGE="${BASH_REMATCH[1]}"
+            # Skip commented packages
+            if [[ ! "$PACKAGE" =~ ^# ]]; then
+                PACKAGES+=("$PACKAGE")
+            fi
         fi
-    fi
-done < "$CONFIG_FILE"
-
-# Install each package
-for package in "${PACKAGES[@]}"; do
-    echo "📦 Installing $package..."
-    npm install -g "$package"
-done
+    done < "$CONFIG_FILE"
+fi
+
+if [[ ${#PACKAGES[@]} -eq 0 ]]; then
+    echo "No npm packages to install"
+    exit 0
+fi
+
+# Install all packages in one transaction
+echo "📦 Installing ${PACKAGES[*]}..."
+npm install -g "${PACKAGES[@]}"
 
 echo "✅ npm global packages installed successfully" 
\ No newline at end of file
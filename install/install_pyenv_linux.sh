@@ -8,16 +8,13 @@ if command -v pyenv &>/dev/null; then
 fi
 
 PYENV_ROOT="$HOME/.pyenv"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/pyenv_build_deps.sh"
 
 # Install build dependencies unless explicitly skipped
 if command -v apt-get &>/dev/null && [[ -z "${PYENV_SKIP_DEPS:-}" ]]; then
-    DEPS=(
-        make build-essential libssl-dev zlib1g-dev libbz2-dev libreadline-dev
-        libsqlite3-dev curl llvm libncursesw5-dev xz-utils tk-dev libxml2-dev
-        libxmlsec1-dev libffi-dev liblzma-dev
-    )
     apt-get update
-    apt-get install -y "${DEPS[@]}"
+    apt-get install -y "${PYENV_BUILD_DEPS[@]}"
 fi
 
 # Use local archive when provided, otherwise clone from GitHub
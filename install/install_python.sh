@@ -1,9 +1,20 @@
 #!/bin/bash
 set -euo pipefail
 
-# Install Python 3.12 via pyenv
+# Install the Python version from config/pyenv_version.txt via pyenv, reusing
+# a compiled interpreter from the build cache when one matches this host.
 
-PYTHON_VERSION="3.12.0"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+VERSION_FILE="$(dirname "$SCRIPT_DIR")/config/pyenv_version.txt"
+
+if [[ -z "${PYTHON_VERSION:-}" && -f "$VERSION_FILE" ]]; then
+    PYTHON_VERSION="$(tr -d '[:space:]' < "$VERSION_FILE")"
+fi
+PYTHON_VERSION="${PYTHON_VERSION:-3.12.0}"
+
+# Compiled interpreters are kept here as <key>.tar.gz. Point it at a shared
+# filesystem to reuse builds across hosts; set it empty to disable the cache.
+PYTHON_BUILD_CACHE="${PYTHON_BUILD_CACHE-${XDG_CACHE_HOME:-$HOME/.cache}/foundry-bootstrap/python-builds}"
 
 echo "🐍 Installing Python $PYTHON_VERSION via pyenv..."
 
@@ -13,12 +24,99 @@ if ! command -v pyenv &> /dev/null; then
     exit 1
 fi
 
+PYENV_ROOT="$(pyenv root)"
+VERSION_DIR="$PYENV_ROOT/versions/$PYTHON_VERSION"
+
+if [[ "$(uname -s)" == "Darwin" ]]; then
+    NPROC="$(sysctl -n hw.ncpu 2>/dev/null || echo 2)"
+else
+    NPROC="$(nproc 2>/dev/null || echo 2)"
+fi
+
+sha256() {
+    if command -v sha256sum &>/dev/null; then
+        sha256sum "$@" | cut -d' ' -f1
+    else
+        shasum -a 256 "$@" | cut -d' ' -f1
+    fi
+}
+
+libc_id() {
+    if [[ "$(uname -s)" == "Darwin" ]]; then
+        echo "macos-$(sw_vers -productVersion 2>/dev/null || echo unknown)"
+    else
+        getconf GNU_LIBC_VERSION 2>/dev/null || ldd --version 2>&1 | head -1
+    fi
+}
+
+# The build depends on the Python version, the CPU, the C library, the
+# installed versions of the build dependencies and the install prefix,
+# which CPython bakes into sysconfig and script shebangs.
+build_key() {
+    local deps=""
+    source "$SCRIPT_DIR/pyenv_build_deps.sh"
+    if command -v dpkg-query &>/dev/null; then
+        deps="$(dpkg-query -W -f '${Package}=${Version}\n' "${PYENV_BUILD_DEPS[@]}" 2>/dev/null | sort || true)"
+    fi
+    printf 'version=%s\nmachine=%s\nlibc=%s\nprefix=%s\n%s\n' \
+        "$PYTHON_VERSION" "$(uname -m)" "$(libc_id)" "$VERSION_DIR" "$deps" \
+        | sha256 | cut -c1-32
+}
+
+restore_from_cache() {
+    local archive="$1" staging
+    [[ -f "$archive" && -f "$archive.sha256" ]] || return 1
+    if [[ "$(sha256 "$archive")" != "$(cat "$archive.sha256")" ]]; then
+        echo "⚠️  Cached build $archive is corrupt, ignoring it" >&2
+        return 1
+    fi
+    mkdir -p "$PYENV_ROOT/versions"
+    staging="$(mktemp -d "$PYENV_ROOT/versions/.restore.XXXXXX")"
+    if ! tar -xzf "$archive" -C "$staging"; then
+        rm -rf "$staging"
+        return 1
+    fi
+    mv "$staging/$PYTHON_VERSION" "$VERSION_DIR"
+    rm -rf "$staging"
+}
+
+store_in_cache() {
+    local archive="$1" tmp
+    mkdir -p "$PYTHON_BUILD_CACHE" || return 1
+    tmp="$(mktemp "$PYTHON_BUILD_CACHE/.build.XXXXXX")" || return 1
+    # Write under a temporary name and rename, so other hosts reading the
+    # shared cache never see a partial archive.
+    if tar -czf "$tmp" -C "$PYENV_ROOT/versions" "$PYTHON_VERSION" \
+        && sha256 "$tmp" > "$tmp.sha256" \
+        && mv "$tmp.sha256" "$archive.sha256" && mv "$tmp" "$archive"; then
+        return 0
+    fi
+    rm -f "$tmp" "$tmp.sha256"
+    return 1
+}
+
 # Check if Python version is already installed
-if pyenv versions | grep -q "$PYTHON_VERSION"; then
+if [[ -x "$VERSION_DIR/bin/python3" ]]; then
     echo "✅ Python $PYTHON_VERSION already installed"
 else
-    echo "📦 Installing Python $PYTHON_VERSION..."
-    pyenv install "$PYTHON_VERSION"
+    ARCHIVE=""
+    if [[ -n "$PYTHON_BUILD_CACHE" ]]; then
+        ARCHIVE="$PYTHON_BUILD_CACHE/python-$PYTHON_VERSION-$(build_key).tar.gz"
+    fi
+    if [[ -n "$ARCHIVE" ]] && restore_from_cache "$ARCHIVE"; then
+        echo "✅ Restored Python $PYTHON_VERSION from $ARCHIVE"
+        pyenv rehash
+    else
+        echo "📦 Installing Python $PYTHON_VERSION (make -j$NPROC)..."
+        MAKE_OPTS="${MAKE_OPTS:--j$NPROC}" pyenv install "$PYTHON_VERSION"
+        if [[ -n "$ARCHIVE" ]]; then
+            if store_in_cache "$ARCHIVE"; then
+                echo "📦 Cached Python $PYTHON_VERSION build in $ARCHIVE"
+            else
+                echo "⚠️  Could not write $ARCHIVE; continuing without caching" >&2
+            fi
+        fi
+    fi
 fi
 
 # Set as global Python version
@@ -46,4 +144,4 @@ if [[ -d "$PYTHON_USER_BIN" ]]; then
     echo "📝 Added Python user bin directory to PATH: $PYTHON_USER_BIN"
 fi
 
-echo "✅ Python setup complete" 
\ No newline at end of file
+echo "✅ Python setup complete"
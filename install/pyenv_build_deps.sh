@@ -0,0 +1,9 @@
+# shellcheck shell=bash
+# apt packages CPython is built against. Sourced by install_pyenv_linux.sh,
+# which installs them, and install_python.sh, which keys its build cache on
+# their installed versions.
+PYENV_BUILD_DEPS=(
+    make build-essential libssl-dev zlib1g-dev libbz2-dev libreadline-dev
+    libsqlite3-dev curl llvm libncursesw5-dev xz-utils tk-dev libxml2-dev
+    libxmlsec1-dev libffi-dev liblzma-dev
+)
@@ -0,0 +1,188 @@
+"""Batch apt availability lookups.
+
+``apt-cache`` reloads the whole package cache on every invocation, so probing
+packages one at a time costs one cache load per package. This module settles a
+whole package list with a single ``apt-cache policy`` call.
+
+Only the standard library is used so that ``scripts/verify_apt_packages.py``
+can share it without the orchestrator dependencies.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+APT_LISTS_DIR = Path('/var/lib/apt/lists')
+
+# Touched after every successful ``apt-get update`` by update-notifier's
+# APT::Update::Post-Invoke-Success hook, and by this orchestrator.
+APT_UPDATE_STAMP = Path('/var/lib/apt/periodic/update-success-stamp')
+
+# Package lists younger than this are considered fresh (seconds).
+DEFAULT_LISTS_TTL = 6 * 60 * 60
+
+REFRESH_POLICIES = ('auto', 'always', 'never')
+
+
+class AptCandidate(NamedTuple):
+    """Availability of a single apt package."""
+
+    available: bool
+    version: Optional[str]
+
+
+MISSING = AptCandidate(False, None)
+
+
+def parse_policy(output: str) -> Dict[str, AptCandidate]:
+    """Parse ``apt-cache policy`` output into a name → candidate map."""
+    candidates: Dict[str, AptCandidate] = {}
+    current: Optional[str] = None
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        if not line[0].isspace() and line.endswith(':'):
+            current = line[:-1]
+            candidates[current] = MISSING
+        elif current and line.strip().startswith('Candidate:'):
+            version = line.split(':', 1)[1].strip()
+            if version and version != '(none)':
+                candidates[current] = AptCandidate(True, version)
+    return candidates
+
+
+def resolve_apt_packages(packages: Iterable[str]) -> Dict[str, AptCandidate]:
+    """Return availability and candidate version for every package.
+
+    Packages unknown to apt (or when apt-cache is not installed) map to
+    ``AptCandidate(False, None)``.
+    """
+    names = list(dict.fromkeys(packages))
+    result = {name: MISSING for name in names}
+    if not names:
+        return result
+    env = dict(os.environ, LC_ALL='C')
+    try:
+        proc = subprocess.run(
+            ['apt-cache', 'policy', *names], capture_output=True, text=True, env=env
+        )
+    except FileNotFoundError:
+        return result
+    parsed = parse_policy(proc.stdout)
+    for name in names:
+        result[name] = parsed.get(name, MISSING)
+    return result
+
+
+# Dependency kinds apt installs; recommends are off in install_apt.sh too.
+DEPENDS_OPTIONS = ['--recurse', '--no-recommends', '--no-suggests', '--no-conflicts',
+                   '--no-breaks', '--no-replaces', '--no-enhances']
+
+
+def parse_depends(output: str) -> List[str]:
+    """Return the real packages named by ``apt-cache depends --recurse`` output.
+
+    Every package of the closure heads its own unindented block; virtual
+    packages are shown as ``<name>`` and are left out.
+    """
+    names = []
+    for line in output.splitlines():
+        if not line or line[0].isspace() or line.startswith('<'):
+            continue
+        names.append(line.strip().split(':', 1)[0])
+    return list(dict.fromkeys(names))
+
+
+def apt_dependency_closure(packages: Iterable[str]) -> List[str]:
+    """Return ``packages`` and everything they depend on, recursively.
+
+    Unlike ``apt-get install --download-only``, the result does not depend on
+    what is installed here, so downloading it serves hosts with nothing
+    installed. Only packages with an install candidate are returned.
+    """
+    names = list(dict.fromkeys(packages))
+    if not names:
+        return []
+    env = dict(os.environ, LC_ALL='C')
+    try:
+        proc = subprocess.run(
+            ['apt-cache', 'depends', *DEPENDS_OPTIONS, *names], capture_output=True, text=True, env=env
+        )
+    except FileNotFoundError:
+        return []
+    closure = parse_depends(proc.stdout)
+    availability = resolve_apt_packages(closure)
+    return [name for name in closure if availability[name].available]
+
+
+def apt_lists_age(lists_dir: Path = APT_LISTS_DIR, stamp: Path = APT_UPDATE_STAMP) -> Optional[float]:
+    """Return seconds since the apt package lists were last refreshed.
+
+    The update success stamp is preferred: ``apt-get update`` leaves lists
+    the mirror reports unchanged untouched, so their mtimes understate how
+    recently the index was checked. Without a stamp, the newest list file
+    is used. Returns None when no lists have been downloaded yet.
+    """
+    try:
+        return max(0.0, time.time() - stamp.stat().st_mtime)
+    except OSError:
+        pass
+    newest = None
+    try:
+        entries = list(os.scandir(lists_dir))
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.is_file() or entry.name == 'lock':
+            continue
+        mtime = entry.stat().st_mtime
+        if newest is None or mtime > newest:
+            newest = mtime
+    if newest is None:
+        return None
+    return max(0.0, time.time() - newest)
+
+
+def mark_lists_refreshed(stamp: Path = APT_UPDATE_STAMP) -> None:
+    """Touch the update success stamp after a successful ``apt-get update``."""
+    try:
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.touch()
+    except OSError:
+        pass
+
+
+class RefreshDecision(NamedTuple):
+    """Whether to run ``apt-get update`` and why."""
+
+    refresh: bool
+    reason: str
+
+
+def decide_refresh(
+    policy: str,
+    lists_age: Optional[float],
+    availability: Optional[Dict[str, AptCandidate]] = None,
+    ttl: float = DEFAULT_LISTS_TTL,
+) -> RefreshDecision:
+    """Apply the ``auto|always|never`` refresh policy.
+
+    In ``auto`` mode the update is skipped only when the lists are younger
+    than ``ttl`` and every requested package already has a candidate.
+    """
+    if policy == 'always':
+        return RefreshDecision(True, 'refresh forced')
+    if policy == 'never':
+        return RefreshDecision(False, 'refresh disabled')
+    if lists_age is None:
+        return RefreshDecision(True, 'no package lists downloaded')
+    if lists_age >= ttl:
+        return RefreshDecision(True, f'package lists are {lists_age / 3600:.1f}h old')
+    unresolved = [name for name, candidate in (availability or {}).items() if not candidate.available]
+    if unresolved:
+        return RefreshDecision(True, f'{len(unresolved)} package(s) not resolvable')
+    return RefreshDecision(False, f'package lists are {lists_age / 60:.0f}m old and all packages resolvable')
@@ -0,0 +1,136 @@
+"""Local artifact cache for offline and air-gapped installs.
+
+``prefetch`` fills a directory with everything the installers download:
+
+    <root>/apt/        .deb archives (used as apt's ``Dir::Cache::archives``)
+    <root>/<manager>/  packages downloaded by dnf, apk or pacman
+    <root>/wheels/     wheels and sdists for the pipx tools (``PIP_FIND_LINKS``)
+    <root>/npm/        an npm cache holding the global packages and their deps
+    <root>/scripts/    upstream install scripts used by the apt fallbacks
+
+Installs then read from the cache first. In offline mode they are told not
+to reach the network at all (``--no-download``, ``PIP_NO_INDEX``,
+``npm --offline``).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from orchestrate.state import default_cache_dir
+from orchestrate.wheelhouse import SHARED_PACKAGES
+
+# Fallback installers that are plain upstream scripts: package -> (url, args).
+FALLBACK_SCRIPTS: Dict[str, Tuple[str, List[str]]] = {
+    'direnv': ('https://direnv.net/install.sh', []),
+    'just': ('https://just.systems/install.sh', ['--to', '/usr/local/bin']),
+}
+
+def default_artifact_dir() -> Path:
+    """Return the artifact directory, honouring ``FOUNDRY_ARTIFACT_DIR``."""
+    if os.environ.get('FOUNDRY_ARTIFACT_DIR'):
+        return Path(os.environ['FOUNDRY_ARTIFACT_DIR'])
+    return default_cache_dir() / 'artifacts'
+
+
+class ArtifactCache:
+    """Layout of an artifact directory and the installer flags that use it."""
+
+    def __init__(self, root: Path, offline: bool = False):
+        self.root = Path(root)
+        self.offline = offline
+
+    @property
+    def apt_dir(self) -> Path:
+        return self.root / 'apt'
+
+    def packages_dir(self, manager: str) -> Path:
+        """Directory for the system packages ``manager`` downloads."""
+        return self.apt_dir if manager == 'apt' else self.root / manager
+
+    @property
+    def wheels_dir(self) -> Path:
+        return self.root / 'wheels'
+
+    @property
+    def npm_dir(self) -> Path:
+        return self.root / 'npm'
+
+    @property
+    def scripts_dir(self) -> Path:
+        return self.root / 'scripts'
+
+    def ensure(self) -> None:
+        """Create the cache directories."""
+        for directory in (self.apt_dir / 'partial', self.wheels_dir, self.npm_dir, self.scripts_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    # -- install side -------------------------------------------------------
+
+    def apt_options(self) -> List[str]:
+        """Extra ``apt-get install`` arguments that use the cached archives."""
+        self.apt_dir.joinpath('partial').mkdir(parents=True, exist_ok=True)
+        options = ['-o', f'Dir::Cache::archives={self.apt_dir}']
+        if self.offline:
+            options.append('--no-download')
+        return options
+
+    def pip_env(self, env: Optional[Dict[str, str]] = None, offline: Optional[bool] = None) -> Dict[str, str]:
+        """Return ``env`` with pip pointed at the cached wheels.
+
+        ``offline`` overrides the cache's own setting, e.g. for a tool whose
+        downloads are known to be in the cache.
+        """
+        env = dict(os.environ if env is None else env)
+        if self.wheels_dir.is_dir():
+            env['PIP_FIND_LINKS'] = str(self.wheels_dir)
+        if self.offline if offline is None else offline:
+            env['PIP_NO_INDEX'] = '1'
+        return env
+
+    def npm_args(self, offline: Optional[bool] = None) -> List[str]:
+        """Extra ``npm install`` arguments that use the cached packages."""
+        offline = self.offline if offline is None else offline
+        return ['--cache', str(self.npm_dir), '--offline' if offline else '--prefer-offline']
+
+    def fallback_command(self, package: str) -> Optional[List[str]]:
+        """Return a command running the cached install script for ``package``.
+
+        None when the script is not cached; offline callers must then fail
+        rather than download it.
+        """
+        if package not in FALLBACK_SCRIPTS:
+            return None
+        script = self.scripts_dir / f'{package}.sh'
+        if not script.exists():
+            return None
+        _, args = FALLBACK_SCRIPTS[package]
+        return ['bash', str(script), *args]
+
+    # -- prefetch side ------------------------------------------------------
+
+    def pip_prefetch_command(self, packages: List[str]) -> List[str]:
+        """Download the pipx tools, their dependencies and pipx's shared libs."""
+        python = shutil.which('python3') or 'python3'
+        return [python, '-m', 'pip', 'download', '--dest', str(self.wheels_dir),
+                *SHARED_PACKAGES, *packages]
+
+    def npm_prefetch_command(self, packages: List[str], prefix: Path) -> List[str]:
+        """Install into a throwaway prefix so the cache gets every dependency."""
+        return ['npm', 'install', '--global', '--prefix', str(prefix),
+                '--cache', str(self.npm_dir), *packages]
+
+    def fetch_script(self, package: str) -> Path:
+        """Download the upstream install script for ``package``."""
+        import urllib.request  # pulls in http.client and ssl; only prefetch needs it
+
+        url, _ = FALLBACK_SCRIPTS[package]
+        target = self.scripts_dir / f'{package}.sh'
+        tmp = target.with_suffix('.part')
+        with urllib.request.urlopen(url, timeout=60) as response, open(tmp, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        os.replace(tmp, target)
+        return target
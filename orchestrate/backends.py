@@ -0,0 +1,417 @@
+"""System package manager backends.
+
+Every system package manager implements the same four operations, each a
+single process (or file read) for the whole package list:
+
+    available(packages)     which packages the repositories offer, and at what version
+    installed()             every installed package with its version
+    install_command(pkgs)   one transaction installing all of them
+    download_command(pkgs)  fetch without installing, where the manager can
+
+The orchestrator drives every backend through the same install path.
+Manager-specific behaviour hangs off optional hooks: ``lists_age()`` and
+``refreshed()`` for the refresh policy, ``suggest()`` for near-miss names, ``fallbacks`` for install
+scripts of packages the repositories lack and ``install_options()`` for the
+artifact cache. apt is the only backend that uses all of them today.
+
+=========  ==================================  ===================================
+backend    available                           installed
+=========  ==================================  ===================================
+apt        ``apt-cache policy``                ``/var/lib/dpkg/status``
+brew       ``brew formulae`` + ``brew casks``  ``<prefix>/Cellar``, ``Caskroom``
+dnf        ``dnf repoquery``                   ``rpm -qa``
+apk        ``apk search -x``                   ``/lib/apk/db/installed``
+pacman     ``pacman -Si``                      ``/var/lib/pacman/local/*/desc``
+=========  ==================================  ===================================
+
+Package names come from ``packages.yaml``, where ``<backend>-override`` keys
+(``dnf-override: nodejs``) give the name a backend uses when it differs.
+
+Only the standard library is used so that ``test_setup.py`` and the fast
+``status`` path can share it.
+"""
+
+from __future__ import annotations
+
+import re
+import shutil
+import subprocess
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from orchestrate.apt_cache import (
+    APT_UPDATE_STAMP,
+    MISSING,
+    AptCandidate,
+    apt_dependency_closure,
+    apt_lists_age,
+    mark_lists_refreshed,
+    resolve_apt_packages,
+)
+from orchestrate.inventory import DPKG_STATUS, read_brew_cellar, read_dpkg_status
+from orchestrate.state import brew_cellar
+
+if TYPE_CHECKING:
+    from orchestrate.artifacts import ArtifactCache
+
+# Availability of one package; apt's type serves every backend.
+Candidate = AptCandidate
+
+# Linux backends in detection order.
+LINUX_BACKENDS = ('apt', 'dnf', 'apk', 'pacman')
+
+_APK_NAME_VERSION = re.compile(r'^(.+)-(\d[^-]*-r\d+)$')
+
+
+def _query(cmd: List[str]) -> Optional[str]:
+    """Return the stdout of ``cmd`` whatever its exit status, or None if it cannot run.
+
+    Batch queries exit non-zero as soon as one name is unknown but still
+    report on the others.
+    """
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True).stdout
+    except OSError:
+        return None
+
+
+def _settle(packages: Iterable[str], found: Dict[str, str]) -> Dict[str, Candidate]:
+    return {pkg: Candidate(True, found[pkg] or None) if pkg in found else MISSING for pkg in dict.fromkeys(packages)}
+
+
+class PackageBackend(ABC):
+    """A system package manager driven through batch operations.
+
+    ``executable`` is what must be on PATH for the backend to work;
+    ``refresh_command`` updates the repository metadata (None when the
+    manager does that by itself). ``fallbacks`` maps packages the
+    repositories lack to a command installing them another way; those in
+    ``fallback_locked`` call the manager themselves and hold its lock.
+    """
+
+    name = ''
+    title = ''
+    executable = ''
+    fallbacks: Dict[str, List[str]] = {}
+    fallback_locked: FrozenSet[str] = frozenset()
+
+    @abstractmethod
+    def available(self, packages: Iterable[str]) -> Dict[str, Candidate]:
+        """Return the availability and candidate version of every package."""
+
+    @abstractmethod
+    def installed(self) -> Optional[Dict[str, str]]:
+        """Return installed name → version, or None if it cannot be read here."""
+
+    @abstractmethod
+    def install_command(self, packages: List[str]) -> List[str]:
+        """Return the command installing ``packages`` in one transaction."""
+
+    def download_command(self, packages: List[str], dest: Path) -> Optional[List[str]]:
+        """Return a command downloading ``packages`` into ``dest`` only, if supported.
+
+        The command is run from ``dest``.
+        """
+        return None
+
+    @abstractmethod
+    def refresh_command(self) -> Optional[List[str]]:
+        """Return the command updating the repository metadata, or None."""
+
+    @abstractmethod
+    def remove_command(self, packages: List[str]) -> List[str]:
+        """Return the command removing ``packages``."""
+
+    def lists_age(self) -> Optional[float]:
+        """Return seconds since the repository metadata was refreshed.
+
+        None means it was never downloaded. Managers that do not expose the
+        age report 0, so the refresh policy only refreshes them when a
+        package cannot be resolved.
+        """
+        return 0.0
+
+    def refreshed(self) -> None:
+        """Record that ``refresh_command`` just succeeded."""
+
+    def suggest(self, packages: List[str]) -> Dict[str, List[str]]:
+        """Return existing package names close to each of ``packages``."""
+        return {}
+
+    def install_options(self, artifacts: Optional[ArtifactCache]) -> List[str]:
+        """Return extra install arguments reading from the artifact cache."""
+        return []
+
+
+class AptBackend(PackageBackend):
+    name = 'apt'
+    title = 'apt-get'
+    executable = 'apt-get'
+    fallbacks = {
+        "direnv": [
+            "bash",
+            "-c",
+            "curl -sfL https://direnv.net/install.sh | bash",
+        ],
+        "just": [
+            "bash",
+            "-c",
+            "curl -fsSL https://just.systems/install.sh | bash -s -- --to /usr/local/bin",
+        ],
+        "gh": [
+            "bash",
+            "-c",
+            "type -p curl >/dev/null && curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg | dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg && chmod go+r /usr/share/keyrings/githubcli-archive-keyring.gpg && echo 'deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg] https://cli.github.com/packages stable main' | tee /etc/apt/sources.list.d/github-cli.list > /dev/null && apt-get update && apt-get install -y gh",
+        ],
+    }
+    fallback_locked = frozenset({"gh"})
+
+    def __init__(self, dpkg_status: Path = DPKG_STATUS, update_stamp: Path = APT_UPDATE_STAMP):
+        self.dpkg_status = dpkg_status
+        self.update_stamp = update_stamp
+
+    def available(self, packages: Iterable[str]) -> Dict[str, Candidate]:
+        return resolve_apt_packages(packages)
+
+    def installed(self) -> Optional[Dict[str, str]]:
+        return read_dpkg_status(self.dpkg_status)
+
+    def install_command(self, packages: List[str]) -> List[str]:
+        return ['apt-get', 'install', '-y', *packages]
+
+    def download_command(self, packages: List[str], dest: Path) -> Optional[List[str]]:
+        """Download the whole dependency closure, installed here or not.
+
+        ``apt-get download`` writes to the current directory, which apt then
+        reads back as ``Dir::Cache::archives``.
+        """
+        closure = apt_dependency_closure(packages)
+        return ['apt-get', 'download', *closure] if closure else None
+
+    def refresh_command(self) -> Optional[List[str]]:
+        return ['apt-get', 'update']
+
+    def remove_command(self, packages: List[str]) -> List[str]:
+        return ['apt-get', 'remove', '-y', *packages]
+
+    def lists_age(self) -> Optional[float]:
+        return apt_lists_age(stamp=self.update_stamp)
+
+    def refreshed(self) -> None:
+        mark_lists_refreshed(self.update_stamp)
+
+    def suggest(self, packages: List[str]) -> Dict[str, List[str]]:
+        from orchestrate.suggest import suggest_apt_packages
+
+        return suggest_apt_packages(packages)
+
+    def install_options(self, artifacts: Optional[ArtifactCache]) -> List[str]:
+        return artifacts.apt_options() if artifacts else []
+
+
+class BrewBackend(PackageBackend):
+    """Homebrew; availability is read from the local tap listings, not the network."""
+
+    name = 'brew'
+    title = 'Homebrew'
+    executable = 'brew'
+
+    def __init__(self, cellar: Optional[Path] = None):
+        self.cellar = cellar
+
+    def available(self, packages: Iterable[str]) -> Dict[str, Candidate]:
+        names = set()
+        for listing in ('formulae', 'casks'):
+            names.update((_query(['brew', listing]) or '').split())
+        return _settle(packages, {name: '' for name in names})
+
+    def installed(self) -> Optional[Dict[str, str]]:
+        return read_brew_cellar(self.cellar or brew_cellar())
+
+    def install_command(self, packages: List[str]) -> List[str]:
+        return ['brew', 'install', *packages]
+
+    def refresh_command(self) -> Optional[List[str]]:
+        # brew install updates its taps by itself.
+        return None
+
+    def remove_command(self, packages: List[str]) -> List[str]:
+        return ['brew', 'uninstall', *packages]
+
+
+class DnfBackend(PackageBackend):
+    """dnf (Fedora, RHEL and derivatives); works with dnf 4 and dnf 5."""
+
+    name = 'dnf'
+    title = 'dnf'
+    executable = 'dnf'
+
+    def available(self, packages: Iterable[str]) -> Dict[str, Candidate]:
+        packages = list(packages)
+        output = _query(['dnf', '-q', 'repoquery', '--latest-limit', '1',
+                         '--queryformat', '%{name} %{evr}\n', *packages]) if packages else ''
+        found: Dict[str, str] = {}
+        for line in (output or '').splitlines():
+            fields = line.split()
+            if len(fields) == 2:
+                found.setdefault(fields[0], fields[1])
+        return _settle(packages, found)
+
+    def installed(self) -> Optional[Dict[str, str]]:
+        output = _query(['rpm', '-qa', '--queryformat', '%{NAME} %{VERSION}-%{RELEASE}\n'])
+        if output is None:
+            return None
+        return dict(line.split(None, 1) for line in output.splitlines() if len(line.split()) == 2)
+
+    def install_command(self, packages: List[str]) -> List[str]:
+        return ['dnf', 'install', '-y', *packages]
+
+    def download_command(self, packages: List[str], dest: Path) -> Optional[List[str]]:
+        return ['dnf', 'install', '-y', '--downloadonly', f'--downloaddir={dest}', *packages]
+
+    def refresh_command(self) -> Optional[List[str]]:
+        return ['dnf', 'makecache']
+
+    def remove_command(self, packages: List[str]) -> List[str]:
+        return ['dnf', 'remove', '-y', *packages]
+
+
+def parse_apk_installed(text: str) -> Dict[str, str]:
+    """Parse apk's ``installed`` database: ``P:`` name and ``V:`` version per paragraph."""
+    installed: Dict[str, str] = {}
+    package = None
+    for line in text.splitlines():
+        if line.startswith('P:'):
+            package = line[2:]
+        elif line.startswith('V:') and package:
+            installed[package] = line[2:]
+        elif not line.strip():
+            package = None
+    return installed
+
+
+class ApkBackend(PackageBackend):
+    """apk (Alpine)."""
+
+    name = 'apk'
+    title = 'apk'
+    executable = 'apk'
+
+    def __init__(self, db: Path = Path('/lib/apk/db/installed')):
+        self.db = db
+
+    def available(self, packages: Iterable[str]) -> Dict[str, Candidate]:
+        packages = list(packages)
+        output = _query(['apk', 'search', '-x', *packages]) if packages else ''
+        found: Dict[str, str] = {}
+        for line in (output or '').splitlines():
+            match = _APK_NAME_VERSION.match(line.strip())
+            if match:
+                found.setdefault(match.group(1), match.group(2))
+        return _settle(packages, found)
+
+    def installed(self) -> Optional[Dict[str, str]]:
+        try:
+            return parse_apk_installed(self.db.read_text(errors='replace'))
+        except OSError:
+            return None
+
+    def install_command(self, packages: List[str]) -> List[str]:
+        return ['apk', 'add', '--no-progress', *packages]
+
+    def download_command(self, packages: List[str], dest: Path) -> Optional[List[str]]:
+        return ['apk', 'fetch', '--recursive', '--output', str(dest), *packages]
+
+    def refresh_command(self) -> Optional[List[str]]:
+        return ['apk', 'update']
+
+    def remove_command(self, packages: List[str]) -> List[str]:
+        return ['apk', 'del', *packages]
+
+
+def parse_pacman_info(text: str) -> Dict[str, str]:
+    """Parse ``pacman -Si`` output into name → version."""
+    found: Dict[str, str] = {}
+    name = None
+    for line in text.splitlines():
+        key, _, value = line.partition(':')
+        key = key.strip()
+        if key == 'Name':
+            name = value.strip()
+        elif key == 'Version' and name:
+            found.setdefault(name, value.strip())
+            name = None
+    return found
+
+
+class PacmanBackend(PackageBackend):
+    """pacman (Arch and derivatives).
+
+    ``--needed`` leaves up-to-date packages alone. Arch does not support
+    syncing the databases without upgrading (``pacman -Sy``): a package
+    installed afterwards may need libraries newer than the installed ones.
+    The refresh is therefore a full ``pacman -Syu``, and installs never sync.
+    """
+
+    name = 'pacman'
+    title = 'pacman'
+    executable = 'pacman'
+
+    def __init__(self, db: Path = Path('/var/lib/pacman/local')):
+        self.db = db
+
+    def available(self, packages: Iterable[str]) -> Dict[str, Candidate]:
+        packages = list(packages)
+        output = _query(['pacman', '-Si', *packages]) if packages else ''
+        return _settle(packages, parse_pacman_info(output or ''))
+
+    def installed(self) -> Optional[Dict[str, str]]:
+        if not self.db.is_dir():
+            return None
+        installed: Dict[str, str] = {}
+        for desc in sorted(self.db.glob('*/desc')):
+            fields: Dict[str, str] = {}
+            try:
+                lines = desc.read_text(errors='replace').splitlines()
+            except OSError:
+                continue
+            for header, value in zip(lines, lines[1:]):
+                if header in ('%NAME%', '%VERSION%'):
+                    fields[header] = value
+            if '%NAME%' in fields:
+                installed[fields['%NAME%']] = fields.get('%VERSION%', '')
+        return installed
+
+    def install_command(self, packages: List[str]) -> List[str]:
+        return ['pacman', '-S', '--needed', '--noconfirm', *packages]
+
+    def download_command(self, packages: List[str], dest: Path) -> Optional[List[str]]:
+        return ['pacman', '-Sw', '--noconfirm', '--cachedir', str(dest), *packages]
+
+    def refresh_command(self) -> Optional[List[str]]:
+        return ['pacman', '-Syu', '--noconfirm']
+
+    def remove_command(self, packages: List[str]) -> List[str]:
+        return ['pacman', '-R', '--noconfirm', *packages]
+
+
+BACKENDS: Dict[str, PackageBackend] = {
+    backend.name: backend
+    for backend in (AptBackend(), BrewBackend(), DnfBackend(), ApkBackend(), PacmanBackend())
+}
+
+
+def detect_backend(platform: str = sys.platform,
+                   which: Callable[[str], Optional[str]] = shutil.which) -> PackageBackend:
+    """Return the system backend: Homebrew on macOS, else the first Linux manager on PATH.
+
+    apt is assumed when none is found, so the error names the usual tool.
+    """
+    if platform.startswith('darwin'):
+        return BACKENDS['brew']
+    for name in LINUX_BACKENDS:
+        if which(BACKENDS[name].executable):
+            return BACKENDS[name]
+    return BACKENDS['apt']
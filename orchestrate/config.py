@@ -0,0 +1,403 @@
+"""Typed view of the files in ``config/``.
+
+``load_bootstrap_config`` parses ``packages.yaml``, ``pipx.yaml``,
+``npm.yaml``, ``test_overrides.yaml``, ``network.yaml`` and
+``pyenv_version.txt`` once and
+memoizes the result on the files' modification times, so the orchestrator,
+``test_setup.py`` and ``scripts/verify_apt_packages.py`` share one parser.
+
+``write_snapshot`` emits the parsed configuration as JSON and as a
+shell-sourceable file so the bash installers can read package lists without
+Python or a YAML parser. Running this module writes the snapshot::
+
+    python3 -m orchestrate.config --config-dir config
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from orchestrate.npm import split_spec
+from orchestrate.retry import MIRROR_MANAGERS, RETRY_MANAGERS, RetryPolicy
+
+CONFIG_FILES = ('packages.yaml', 'pipx.yaml', 'npm.yaml', 'test_overrides.yaml', 'network.yaml',
+                'pyenv_version.txt')
+
+# Package file read by each install phase.
+PHASE_FILES = {'system': 'packages.yaml', 'pipx': 'pipx.yaml', 'npm': 'npm.yaml'}
+
+# Snapshot location relative to the config directory.
+SNAPSHOT_DIR = '.snapshot'
+SNAPSHOT_VERSION = 3
+
+# System package managers that snapshots list packages for.
+SYSTEM_MANAGERS = ('apt', 'brew', 'dnf', 'apk', 'pacman')
+
+
+class ConfigError(ValueError):
+    """Raised when a configuration file has an invalid structure."""
+
+
+@dataclass(frozen=True, slots=True)
+class SystemPackage:
+    """An entry of ``packages.yaml``.
+
+    ``overrides`` maps a manager name to the package name used by that
+    manager, taken from ``<manager>-override`` keys such as ``apt-override``.
+    """
+
+    name: str
+    overrides: Dict[str, str] = field(default_factory=dict)
+
+    def for_manager(self, manager: str) -> str:
+        return self.overrides.get(manager, self.name)
+
+
+@dataclass(frozen=True, slots=True)
+class VerifyOverrides:
+    """Command and version-flag mappings from ``test_overrides.yaml``."""
+
+    command_mappings: Dict[str, str] = field(default_factory=dict)
+    linux_command_mappings: Dict[str, str] = field(default_factory=dict)
+    version_flags: Dict[str, str] = field(default_factory=dict)
+
+    def command_for(self, package: str, is_linux: bool = False) -> Tuple[str, str]:
+        """Return the executable and version flag used to verify ``package``."""
+        if is_linux and package in self.linux_command_mappings:
+            command = self.linux_command_mappings[package]
+        else:
+            command = self.command_mappings.get(package, package)
+        return command, self.version_flags.get(package, '--version')
+
+
+@dataclass(frozen=True, slots=True)
+class BootstrapConfig:
+    """All package lists and settings from a config directory."""
+
+    packages: Tuple[SystemPackage, ...] = ()
+    pipx: Tuple[str, ...] = ()
+    npm: Tuple[str, ...] = ()
+    overrides: VerifyOverrides = field(default_factory=VerifyOverrides)
+    pyenv_version: Optional[str] = None
+    # Requirements declared in each package file, keyed by phase
+    # (``system``, ``pipx``, ``npm``).
+    requires: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    # Versions pinned in ``npm.yaml``, keyed by package name.
+    npm_pins: Dict[str, str] = field(default_factory=dict)
+    # Retry policies and mirrors from ``network.yaml``, keyed by manager.
+    retries: Dict[str, RetryPolicy] = field(default_factory=dict)
+    mirrors: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+    def npm_specs(self) -> List[str]:
+        """Return the npm packages as ``name`` or ``name@version`` specs."""
+        return [f"{name}@{self.npm_pins[name]}" if name in self.npm_pins else name for name in self.npm]
+
+    def system_packages(self, manager: str) -> List[str]:
+        """Return the system package names to install with ``manager``."""
+        return [pkg.for_manager(manager) for pkg in self.packages]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BootstrapConfig':
+        return cls(
+            packages=tuple(SystemPackage(p['name'], dict(p.get('overrides') or {})) for p in data.get('packages', [])),
+            pipx=tuple(data.get('pipx', [])),
+            npm=tuple(data.get('npm', [])),
+            overrides=VerifyOverrides(**(data.get('overrides') or {})),
+            pyenv_version=data.get('pyenv_version'),
+            requires={k: tuple(v) for k, v in (data.get('requires') or {}).items()},
+            npm_pins=dict(data.get('npm_pins') or {}),
+            retries={k: RetryPolicy(**v) for k, v in (data.get('retries') or {}).items()},
+            mirrors={k: tuple(v) for k, v in (data.get('mirrors') or {}).items()},
+        )
+
+
+def read_yaml(path: Path) -> Any:
+    """Parse a YAML file with ruamel.yaml, falling back to PyYAML."""
+    try:
+        from ruamel.yaml import YAML
+    except ImportError:
+        import yaml  # type: ignore
+
+        with open(path, 'r') as f:
+            return yaml.safe_load(f)
+    with open(path, 'r') as f:
+        return YAML(typ='safe').load(f)
+
+
+def _entries(data: Any, path: Path) -> List[Any]:
+    if data is None:
+        return []
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a mapping with a 'packages' list")
+    entries = data.get('packages') or []
+    if not isinstance(entries, list):
+        raise ConfigError(f"{path}: 'packages' must be a list")
+    return entries
+
+
+def _requires(meta: Any, path: Path) -> List[str]:
+    if not isinstance(meta, dict) or meta.get('requires') is None:
+        return []
+    value = meta['requires']
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ConfigError(f"{path}: requires must be a string or a list of strings")
+    return value
+
+
+def parse_requires(data: Any, path: Path) -> Tuple[str, ...]:
+    """Collect the file-level and per-package ``requires:`` of a package file."""
+    requires = _requires(data, path)
+    for item in _entries(data, path):
+        if isinstance(item, dict) and 'name' not in item and len(item) == 1:
+            item = next(iter(item.values()))
+        requires.extend(_requires(item, path))
+    return tuple(dict.fromkeys(requires))
+
+
+def _overrides(meta: Dict[str, Any], path: Path) -> Dict[str, str]:
+    overrides = {}
+    for key, value in meta.items():
+        if isinstance(key, str) and key.endswith('-override'):
+            if not isinstance(value, str):
+                raise ConfigError(f"{path}: {key} must be a string")
+            overrides[key[:-len('-override')]] = value
+    return overrides
+
+
+def parse_system_packages(data: Any, path: Path) -> Tuple[SystemPackage, ...]:
+    """Validate the entries of ``packages.yaml``."""
+    packages = []
+    for item in _entries(data, path):
+        if isinstance(item, str):
+            packages.append(SystemPackage(item))
+        elif isinstance(item, dict) and 'name' in item:
+            packages.append(SystemPackage(str(item['name']), _overrides(item, path)))
+        elif isinstance(item, dict) and len(item) == 1:
+            name, meta = next(iter(item.items()))
+            meta = meta if isinstance(meta, dict) else {}
+            packages.append(SystemPackage(str(name), _overrides(meta, path)))
+        else:
+            raise ConfigError(f"{path}: invalid package entry {item!r}")
+    return tuple(packages)
+
+
+def parse_package_list(data: Any, path: Path) -> Tuple[str, ...]:
+    """Validate the package names of ``pipx.yaml`` or ``npm.yaml``.
+
+    Entries are plain names or mappings with a ``name`` key.
+    """
+    names = []
+    for item in _entries(data, path):
+        if isinstance(item, dict) and isinstance(item.get('name'), str):
+            item = item['name']
+        if not isinstance(item, str):
+            raise ConfigError(f"{path}: invalid package entry {item!r}")
+        names.append(item)
+    return tuple(names)
+
+
+def parse_npm_packages(data: Any, path: Path) -> Tuple[Tuple[str, ...], Dict[str, str]]:
+    """Validate ``npm.yaml`` and split off version pins.
+
+    Entries are ``name``, ``name@version`` or mappings with ``name`` and an
+    optional ``version``.
+    """
+    names, pins = [], {}
+    for item in _entries(data, path):
+        version = None
+        if isinstance(item, dict) and isinstance(item.get('name'), str):
+            version = item.get('version')
+            if version is not None and not isinstance(version, (str, int, float)):
+                raise ConfigError(f"{path}: invalid version for {item['name']}")
+            item = item['name']
+        if not isinstance(item, str):
+            raise ConfigError(f"{path}: invalid package entry {item!r}")
+        item, spec_version = split_spec(item)
+        version = version or spec_version
+        names.append(item)
+        if version:
+            pins[item] = str(version)
+    return tuple(names), pins
+
+
+def parse_overrides(data: Any, path: Path) -> VerifyOverrides:
+    """Validate ``test_overrides.yaml``."""
+    if data is None:
+        return VerifyOverrides()
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a mapping")
+    sections = {}
+    for key in ('command_mappings', 'linux_command_mappings', 'version_flags'):
+        value = data.get(key) or {}
+        if not isinstance(value, dict):
+            raise ConfigError(f"{path}: {key} must be a mapping")
+        sections[key] = {str(k): str(v) for k, v in value.items()}
+    return VerifyOverrides(**sections)
+
+
+def parse_network(data: Any, path: Path) -> Tuple[Dict[str, RetryPolicy], Dict[str, Tuple[str, ...]]]:
+    """Validate ``network.yaml``: per-manager ``retries`` and ``mirrors``.
+
+    A ``default`` retry entry applies to every manager without its own.
+    """
+    if data is None:
+        return {}, {}
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a mapping")
+    retries = {}
+    for manager, settings in (data.get('retries') or {}).items():
+        if manager not in (*RETRY_MANAGERS, 'default'):
+            raise ConfigError(f"{path}: unknown manager {manager!r} in retries")
+        if not isinstance(settings, dict):
+            raise ConfigError(f"{path}: retries.{manager} must be a mapping")
+        try:
+            policy = RetryPolicy(**settings)
+        except TypeError as e:
+            raise ConfigError(f"{path}: retries.{manager}: {e}") from None
+        if not isinstance(policy.attempts, int) or policy.attempts < 1:
+            raise ConfigError(f"{path}: retries.{manager}.attempts must be a positive integer")
+        retries[manager] = policy
+    mirrors = {}
+    for manager, urls in (data.get('mirrors') or {}).items():
+        if manager not in MIRROR_MANAGERS:
+            raise ConfigError(f"{path}: mirrors are supported for {', '.join(MIRROR_MANAGERS)}, not {manager!r}")
+        if isinstance(urls, str):
+            urls = [urls]
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+            raise ConfigError(f"{path}: mirrors.{manager} must be a list of URLs")
+        mirrors[manager] = tuple(urls)
+    return retries, mirrors
+
+
+def _stamps(config_dir: Path) -> Tuple[Tuple[str, int], ...]:
+    stamps = []
+    for name in CONFIG_FILES:
+        try:
+            stamps.append((name, (config_dir / name).stat().st_mtime_ns))
+        except OSError:
+            stamps.append((name, -1))
+    return tuple(stamps)
+
+
+def _parse(config_dir: Path) -> BootstrapConfig:
+    def load(name: str) -> Any:
+        path = config_dir / name
+        return read_yaml(path) if path.exists() else None
+
+    documents = {phase: load(name) for phase, name in PHASE_FILES.items()}
+
+    npm, npm_pins = parse_npm_packages(documents['npm'], config_dir / 'npm.yaml')
+    retries, mirrors = parse_network(load('network.yaml'), config_dir / 'network.yaml')
+    version_file = config_dir / 'pyenv_version.txt'
+    pyenv_version = None
+    if version_file.exists():
+        pyenv_version = version_file.read_text().strip() or None
+    return BootstrapConfig(
+        packages=parse_system_packages(documents['system'], config_dir / 'packages.yaml'),
+        pipx=parse_package_list(documents['pipx'], config_dir / 'pipx.yaml'),
+        npm=npm,
+        overrides=parse_overrides(load('test_overrides.yaml'), config_dir / 'test_overrides.yaml'),
+        pyenv_version=pyenv_version,
+        requires={
+            phase: requires
+            for phase, document in documents.items()
+            if (requires := parse_requires(document, config_dir / PHASE_FILES[phase]))
+        },
+        npm_pins=npm_pins,
+        retries=retries,
+        mirrors=mirrors,
+    )
+
+
+_cache: Dict[Path, Tuple[Tuple[Tuple[str, int], ...], BootstrapConfig]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_bootstrap_config(config_dir: Path) -> BootstrapConfig:
+    """Return the parsed config for ``config_dir``, re-reading only changed files."""
+    config_dir = Path(config_dir).resolve()
+    stamps = _stamps(config_dir)
+    with _cache_lock:
+        cached = _cache.get(config_dir)
+        if cached and cached[0] == stamps:
+            return cached[1]
+    # A current snapshot saves importing and running the YAML parser.
+    config = read_snapshot(config_dir) or _parse(config_dir)
+    with _cache_lock:
+        _cache[config_dir] = (stamps, config)
+    return config
+
+
+def snapshot_paths(config_dir: Path) -> Tuple[Path, Path]:
+    """Return the JSON and shell snapshot paths for ``config_dir``."""
+    directory = Path(config_dir) / SNAPSHOT_DIR
+    return directory / 'config.json', directory / 'config.sh'
+
+
+def _shell_array(name: str, values: List[str]) -> str:
+    return f"{name}=({' '.join(shlex.quote(v) for v in values)})"
+
+
+def write_snapshot(config_dir: Path, config: Optional[BootstrapConfig] = None) -> Tuple[Path, Path]:
+    """Write ``config.json`` and ``config.sh`` under ``<config_dir>/.snapshot``."""
+    config_dir = Path(config_dir).resolve()
+    config = config or load_bootstrap_config(config_dir)
+    json_path, shell_path = snapshot_paths(config_dir)
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+
+    document = {'version': SNAPSHOT_VERSION, 'stamps': dict(_stamps(config_dir)), 'config': config.to_dict()}
+    lines = [
+        '# Generated by orchestrate/config.py; do not edit.',
+        *(_shell_array(f"FOUNDRY_{m.upper()}_PACKAGES", config.system_packages(m)) for m in SYSTEM_MANAGERS),
+        _shell_array('FOUNDRY_PIPX_PACKAGES', list(config.pipx)),
+        _shell_array('FOUNDRY_NPM_PACKAGES', config.npm_specs()),
+        f"FOUNDRY_PYENV_VERSION={shlex.quote(config.pyenv_version or '')}",
+    ]
+    for path, payload in ((json_path, json.dumps(document, indent=2)), (shell_path, '\n'.join(lines) + '\n')):
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(payload)
+        os.replace(tmp, path)
+    return json_path, shell_path
+
+
+def read_snapshot(config_dir: Path) -> Optional[BootstrapConfig]:
+    """Return the config stored in the JSON snapshot if it is still current."""
+    json_path, _ = snapshot_paths(config_dir)
+    try:
+        document = json.loads(json_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if document.get('version') != SNAPSHOT_VERSION:
+        return None
+    if document.get('stamps') != dict(_stamps(Path(config_dir).resolve())):
+        return None
+    return BootstrapConfig.from_dict(document['config'])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Write the config snapshot read by the bash installers.')
+    parser.add_argument('--config-dir', default=str(Path(__file__).resolve().parent.parent / 'config'))
+    args = parser.parse_args(argv)
+    try:
+        json_path, shell_path = write_snapshot(Path(args.config_dir))
+    except ConfigError as e:
+        print(f"Invalid configuration: {e}")
+        return 1
+    print(f"Wrote {json_path} and {shell_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
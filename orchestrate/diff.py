@@ -0,0 +1,44 @@
+"""Differences between the last applied configuration and the current one.
+
+Entries map a config name to what the manager installs: for system packages
+``name`` → the manager-specific package (after ``<manager>-override``), for
+pipx and npm the package name itself. A changed entry is one whose key stays
+but whose installed package differs, e.g. a new ``apt-override``.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class EntryDiff(NamedTuple):
+    """Added, removed and changed entries of one manager."""
+
+    added: Dict[str, str]
+    removed: Dict[str, str]
+    changed: Dict[str, Tuple[str, str]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def to_install(self) -> List[str]:
+        """Return the packages that have to be installed."""
+        return list(self.added.values()) + [new for _, new in self.changed.values()]
+
+    def to_remove(self, current: Dict[str, str]) -> List[str]:
+        """Return packages no longer wanted by any entry of ``current``."""
+        wanted = set(current.values())
+        dropped = list(self.removed.values()) + [old for old, _ in self.changed.values()]
+        return [pkg for pkg in dict.fromkeys(dropped) if pkg not in wanted]
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.changed)}"
+
+
+def diff_entries(previous: Dict[str, str], current: Dict[str, str]) -> EntryDiff:
+    """Compare two entry maps."""
+    return EntryDiff(
+        added={k: v for k, v in current.items() if k not in previous},
+        removed={k: v for k, v in previous.items() if k not in current},
+        changed={k: (previous[k], v) for k, v in current.items() if k in previous and previous[k] != v},
+    )
@@ -0,0 +1,488 @@
+"""Export and import a provisioned environment as one archive.
+
+``snapshot export`` packs what a bootstrap run spent most of its time on:
+
+    pyenv/<version>/       $PYENV_ROOT/versions/<version>
+    pipx/<venv>/           the pipx venvs of the configured tools
+    npm/<package>/         <npm prefix>/lib/node_modules/<package>
+
+It also writes ``manifest.json`` with the source paths, the launcher
+symlinks in the pipx and npm bin directories, and the installed versions
+of the configured apt packages. apt packages are listed, not packed. The
+archive is a gzip-compressed tar with normalised owners and a fixed gzip
+timestamp. It is named after the SHA-256 of its bytes, so identical
+environments give identical files.
+
+``snapshot import`` checks the digest and the platform, then extracts
+into a staging directory. It moves each tree into place, skipping trees
+that already exist unless forced. When the home, pyenv, pipx or npm
+locations differ from the exporting machine, it rewrites absolute
+symlinks, shebangs, ``pyvenv.cfg`` and the prefix records of the pyenv
+build. It then compares the result with the current config and reports
+what is still missing, and any restored Python that cannot load.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import IO, Dict, Iterable, List, Optional, Tuple
+
+from orchestrate.config import BootstrapConfig
+from orchestrate.npm import spec_satisfied, split_spec
+from orchestrate.state import default_cache_dir, npm_global_prefix, pipx_venvs_dir
+
+SNAPSHOT_FORMAT = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+_ARCHIVE_NAME = re.compile(r'^foundry-env-([0-9a-f]{16})\.tar\.gz$')
+
+
+class SnapshotError(Exception):
+    """Raised when an archive cannot be written or does not fit this host."""
+
+
+@dataclass
+class SnapshotRoots:
+    """Locations an environment lives in on one machine."""
+
+    home: Path
+    pyenv_root: Path
+    pipx_home: Path
+    pipx_bin: Path
+    npm_prefix: Optional[Path]
+
+    @classmethod
+    def current(cls) -> 'SnapshotRoots':
+        home = Path.home()
+        return cls(
+            home=home,
+            pyenv_root=Path(os.environ.get('PYENV_ROOT') or home / '.pyenv'),
+            pipx_home=pipx_venvs_dir().parent,
+            pipx_bin=Path(os.environ.get('PIPX_BIN_DIR') or home / '.local' / 'bin'),
+            npm_prefix=npm_global_prefix(),
+        )
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {k: str(v) if v is not None else None for k, v in self.__dict__.items()}
+
+    def relocation(self, recorded: Dict[str, Optional[str]]) -> List[Tuple[str, str]]:
+        """Return (old, new) path prefixes, longest first, that differ from ``recorded``."""
+        pairs = []
+        for key, new in self.to_dict().items():
+            old = recorded.get(key)
+            if old and new and old != new:
+                pairs.append((old, new))
+        return sorted(pairs, key=lambda pair: len(pair[0]), reverse=True)
+
+
+@dataclass
+class ImportReport:
+    """What ``import_snapshot`` restored and what it could not."""
+
+    archive: Path
+    restored: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    relocated: List[Tuple[str, str]] = field(default_factory=list)
+    missing: Dict[str, List[str]] = field(default_factory=dict)
+    problems: List[str] = field(default_factory=list)
+
+
+def platform_tag() -> Dict[str, str]:
+    return {'system': sys.platform, 'machine': platform.machine()}
+
+
+def apt_versions(packages: List[str]) -> Dict[str, str]:
+    """Return the installed version of each of ``packages`` known to dpkg."""
+    if not packages or shutil.which('dpkg-query') is None:
+        return {}
+    proc = subprocess.run(['dpkg-query', '-W', '-f', '${Package}\t${Version}\t${db:Status-Status}\n', *packages],
+                          capture_output=True, text=True)
+    versions = {}
+    for line in proc.stdout.splitlines():
+        name, _, rest = line.partition('\t')
+        version, _, status = rest.partition('\t')
+        if status == 'installed':
+            versions[name] = version
+    return versions
+
+
+def _venv_base_version(venv: Path, roots: SnapshotRoots) -> Optional[str]:
+    """Return the pyenv version a pipx venv was created from, if any."""
+    try:
+        cfg = (venv / 'pyvenv.cfg').read_text()
+    except OSError:
+        return None
+    match = re.search(r'^home\s*=\s*(.+)$', cfg, re.MULTILINE)
+    versions = roots.pyenv_root / 'versions'
+    if match and match.group(1).strip().startswith(str(versions) + os.sep):
+        return Path(match.group(1).strip()).relative_to(versions).parts[0]
+    return None
+
+
+def _links_into(bin_dir: Optional[Path], base: Path, trees: List[Path]) -> Dict[str, str]:
+    """Return bin_dir symlinks resolving into ``trees``, targets relative to ``base``."""
+    links: Dict[str, str] = {}
+    if bin_dir is None or not bin_dir.is_dir():
+        return links
+    resolved_trees = [tree.resolve() for tree in trees]
+    for entry in sorted(bin_dir.iterdir()):
+        if not entry.is_symlink():
+            continue
+        target = entry.resolve()
+        if any(target == tree or tree in target.parents for tree in resolved_trees):
+            links[entry.name] = os.path.relpath(target, base.resolve())
+    return links
+
+
+def _normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    return info
+
+
+class _HashingWriter(io.RawIOBase):
+    def __init__(self, target: IO[bytes]):
+        self.target = target
+        self.digest = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        return self.target.write(data)
+
+
+def export_snapshot(config: BootstrapConfig, output_dir: Path,
+                    roots: Optional[SnapshotRoots] = None) -> Tuple[Path, Dict[str, object]]:
+    """Write the archive into ``output_dir`` and return its path and manifest."""
+    roots = roots or SnapshotRoots.current()
+    venvs_dir = roots.pipx_home / 'venvs'
+    trees: List[Tuple[str, Path]] = []
+    missing: Dict[str, List[str]] = {}
+
+    venvs = [venvs_dir / name for name in config.pipx if (venvs_dir / name).is_dir()]
+    missing['pipx'] = [name for name in config.pipx if not (venvs_dir / name).is_dir()]
+    pyenv_versions = {config.pyenv_version} if config.pyenv_version else set()
+    pyenv_versions.update(v for v in (_venv_base_version(venv, roots) for venv in venvs) if v)
+    for version in sorted(pyenv_versions):
+        path = roots.pyenv_root / 'versions' / version
+        if path.is_dir():
+            trees.append((f'pyenv/{version}', path))
+        else:
+            missing.setdefault('pyenv', []).append(version)
+    trees.extend((f'pipx/{venv.name}', venv) for venv in venvs)
+
+    npm_packages: List[Path] = []
+    if roots.npm_prefix is not None:
+        modules = roots.npm_prefix / 'lib' / 'node_modules'
+        for spec in config.npm_specs():
+            name, _ = split_spec(spec)
+            if (modules / name).is_dir():
+                npm_packages.append(modules / name)
+                trees.append((f'npm/{name}', modules / name))
+            else:
+                missing.setdefault('npm', []).append(spec)
+    else:
+        missing['npm'] = config.npm_specs()
+
+    manifest: Dict[str, object] = {
+        'format': SNAPSHOT_FORMAT,
+        'platform': platform_tag(),
+        'roots': roots.to_dict(),
+        'config': {
+            'pyenv_version': config.pyenv_version,
+            'pipx': list(config.pipx),
+            'npm': config.npm_specs(),
+            'apt': config.system_packages('apt'),
+        },
+        'trees': [name for name, _ in trees],
+        'links': {
+            'pipx': _links_into(roots.pipx_bin, roots.pipx_home, venvs),
+            'npm': _links_into(roots.npm_prefix / 'bin', roots.npm_prefix, npm_packages) if roots.npm_prefix else {},
+        },
+        'apt': apt_versions(config.system_packages('apt')),
+        'missing': {k: v for k, v in missing.items() if v},
+    }
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tmp = output_dir / f'.foundry-env.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as raw:
+        hashing = _HashingWriter(raw)
+        with gzip.GzipFile(fileobj=hashing, mode='wb', mtime=0) as gz, tarfile.open(fileobj=gz, mode='w') as tar:
+            payload = json.dumps(manifest, indent=2, sort_keys=True).encode()
+            info = _normalize(tarfile.TarInfo(MANIFEST_NAME))
+            info.size = len(payload)
+            tar.addfile(info, io.BytesIO(payload))
+            for name, path in trees:
+                tar.add(path, arcname=name, filter=_normalize)
+    archive = output_dir / f'foundry-env-{hashing.digest.hexdigest()[:16]}.tar.gz'
+    os.replace(tmp, archive)
+    return archive, manifest
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(archive: Path) -> Dict[str, object]:
+    with tarfile.open(archive, 'r:gz') as tar:
+        member = tar.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise SnapshotError(f"{archive}: no manifest")
+        stream = tar.extractfile(member)
+        assert stream is not None
+        return json.loads(stream.read())
+
+
+def _safe_name(name: str, trees: List[str]) -> bool:
+    path = PurePosixPath(name)
+    if path.is_absolute() or '..' in path.parts:
+        return False
+    return name == MANIFEST_NAME or any(name == t or name.startswith(t + '/') for t in trees)
+
+
+def _destinations(roots: SnapshotRoots) -> Dict[str, Optional[Path]]:
+    return {
+        'pyenv': roots.pyenv_root / 'versions',
+        'pipx': roots.pipx_home / 'venvs',
+        'npm': roots.npm_prefix / 'lib' / 'node_modules' if roots.npm_prefix else None,
+    }
+
+
+def _prefix_pattern(pairs: List[Tuple[str, str]]) -> 're.Pattern[str]':
+    """Match any old prefix as whole path components, longest first.
+
+    ``/home/al`` matches in ``/home/al/.pyenv``, ``"/home/al"`` and
+    ``-L/home/al/lib`` but not in ``/home/alice`` or ``/srv/home/al``.
+    """
+    olds = sorted({old.rstrip('/') or old for old, _ in pairs}, key=len, reverse=True)
+    start = r'(?:(?<![\w./-])|(?<=-[A-Za-z])(?<![\w./-]-[A-Za-z]))'
+    return re.compile(start + '(?:' + '|'.join(map(re.escape, olds)) + r')(?![\w.-])')
+
+
+def _rewrite_mode(path: Path) -> Optional[str]:
+    """Return how ``relocate_tree`` rewrites ``path``: whole file, first line or not at all.
+
+    Besides venv files, the pyenv build records its prefix in
+    ``_sysconfigdata*.py`` (read by ``sysconfig`` when building extensions),
+    ``python3-config`` and the pkgconfig files.
+    """
+    name, parent = path.name, path.parent.name
+    if name == 'pyvenv.cfg' or (name.startswith('_sysconfigdata') and name.endswith('.py')):
+        return 'file'
+    if parent == 'pkgconfig' and name.endswith('.pc'):
+        return 'file'
+    if parent == 'bin':
+        return 'file' if re.fullmatch(r'python[\d.]*-config', name) else 'shebang'
+    return None
+
+
+def relocate_tree(root: Path, pairs: List[Tuple[str, str]]) -> int:
+    """Rewrite absolute paths under ``root`` from old to new prefixes.
+
+    Absolute symlinks, shebangs and the files named by ``_rewrite_mode`` are
+    rewritten. Returns the number of files and links changed.
+    """
+    if not pairs:
+        return 0
+    pattern = _prefix_pattern(pairs)
+    replacements = {old.rstrip('/') or old: new.rstrip('/') or new for old, new in pairs}
+
+    def moved(text: str) -> str:
+        return pattern.sub(lambda match: replacements[match.group(0)], text)
+
+    changed = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            path = Path(dirpath) / name
+            if path.is_symlink():
+                target = os.readlink(path)
+                if os.path.isabs(target) and moved(target) != target:
+                    path.unlink()
+                    path.symlink_to(moved(target))
+                    changed += 1
+                continue
+            if name in dirnames:
+                continue
+            mode = _rewrite_mode(path)
+            if mode is None:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    head = f.read(2)
+                    if mode == 'shebang' and head != b'#!':
+                        continue
+                    data = head + f.read()
+                text = data.decode()
+            except (OSError, UnicodeDecodeError):
+                continue
+            if mode == 'file':
+                updated = moved(text)
+            else:
+                first, sep, rest = text.partition('\n')
+                updated = moved(first) + sep + rest
+            if updated != text:
+                permissions = path.stat().st_mode
+                path.write_text(updated)
+                path.chmod(permissions)
+                changed += 1
+    return changed
+
+
+def import_snapshot(archive: Path, config: BootstrapConfig, roots: Optional[SnapshotRoots] = None,
+                    force: bool = False) -> ImportReport:
+    """Restore ``archive`` into ``roots`` and compare it with ``config``."""
+    roots = roots or SnapshotRoots.current()
+    report = ImportReport(archive)
+    match = _ARCHIVE_NAME.match(archive.name)
+    if match and not _file_digest(archive).startswith(match.group(1)):
+        raise SnapshotError(f"{archive}: content does not match its digest; the file is corrupt")
+    manifest = read_manifest(archive)
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{archive}: unsupported snapshot format {manifest.get('format')!r}")
+    if manifest.get('platform') != platform_tag():
+        raise SnapshotError(f"{archive}: built for {manifest.get('platform')}, this host is {platform_tag()}")
+
+    trees = list(manifest.get('trees') or [])
+    destinations = _destinations(roots)
+    report.relocated = roots.relocation(manifest.get('roots') or {})
+
+    staging_root = default_cache_dir()
+    staging_root.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix='snapshot-import-', dir=staging_root) as tmp:
+        staging = Path(tmp)
+        with tarfile.open(archive, 'r:gz') as tar:
+            members = []
+            for member in tar.getmembers():
+                if not _safe_name(member.name, trees) or member.isdev():
+                    raise SnapshotError(f"{archive}: refusing to extract {member.name!r}")
+                if member.islnk() and not _safe_name(member.linkname, trees):
+                    raise SnapshotError(f"{archive}: refusing hard link to {member.linkname!r}")
+                if member.name != MANIFEST_NAME:
+                    members.append(member)
+            # The "tar" filter keeps absolute symlinks such as venv/bin/python;
+            # member names were checked above.
+            extra = {'filter': 'tar'} if hasattr(tarfile, 'tar_filter') else {}
+            tar.extractall(staging, members=members, **extra)
+
+        for tree in trees:
+            kind, _, name = tree.partition('/')
+            parent = destinations.get(kind)
+            if parent is None:
+                report.skipped.append(f"{tree} (no {kind} location on this host)")
+                continue
+            target = parent / name
+            if target.exists() or target.is_symlink():
+                if not force:
+                    report.skipped.append(f"{tree} (already present)")
+                    continue
+                if target.is_dir() and not target.is_symlink():
+                    shutil.rmtree(target)
+                else:
+                    target.unlink()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(staging / kind / name), target)
+            if report.relocated:
+                relocate_tree(target, report.relocated)
+            report.restored.append(tree)
+
+    _restore_links(manifest, roots, report)
+    report.missing = _compare(config, roots)
+    pyenv_versions = [tree.partition('/')[2] for tree in report.restored if tree.startswith('pyenv/')]
+    report.problems.extend(_check_interpreters(config, roots, pyenv_versions))
+    return report
+
+
+def _restore_links(manifest: Dict[str, object], roots: SnapshotRoots, report: ImportReport) -> None:
+    links = manifest.get('links') or {}
+    for kind, bin_dir, base in (('pipx', roots.pipx_bin, roots.pipx_home),
+                                ('npm', roots.npm_prefix / 'bin' if roots.npm_prefix else None, roots.npm_prefix)):
+        entries = links.get(kind) or {}  # type: ignore[union-attr]
+        if not entries or bin_dir is None or base is None:
+            continue
+        bin_dir.mkdir(parents=True, exist_ok=True)
+        for name, relative in entries.items():
+            link = bin_dir / name
+            if link.exists() or link.is_symlink():
+                continue
+            target = base / relative
+            link.symlink_to(os.path.relpath(target, bin_dir) if kind == 'npm' else target)
+
+
+def _compare(config: BootstrapConfig, roots: SnapshotRoots) -> Dict[str, List[str]]:
+    """Return the configured packages the host still lacks after the import."""
+    missing: Dict[str, List[str]] = {}
+    if config.pyenv_version and not (roots.pyenv_root / 'versions' / config.pyenv_version).is_dir():
+        missing['pyenv'] = [config.pyenv_version]
+    venvs = roots.pipx_home / 'venvs'
+    missing['pipx'] = [name for name in config.pipx if not (venvs / name).is_dir()]
+    installed: Dict[str, str] = {}
+    if roots.npm_prefix is not None:
+        for spec in config.npm_specs():
+            name, _ = split_spec(spec)
+            try:
+                package = json.loads((roots.npm_prefix / 'lib' / 'node_modules' / name / 'package.json').read_text())
+                installed[name] = str(package.get('version') or '')
+            except (OSError, ValueError):
+                continue
+    missing['npm'] = [spec for spec in config.npm_specs() if not spec_satisfied(spec, installed)]
+    apt = config.system_packages('apt')
+    if sys.platform.startswith('linux') and shutil.which('dpkg-query'):
+        present = apt_versions(apt)
+        missing['apt'] = [pkg for pkg in apt if pkg not in present]
+    return {k: v for k, v in missing.items() if v}
+
+
+def missing_libraries(binary: Path) -> List[str]:
+    """Return the shared libraries ``ldd`` cannot find for ``binary``.
+
+    Empty when ``ldd`` is not available or ``binary`` is not dynamically
+    linked.
+    """
+    if shutil.which('ldd') is None:
+        return []
+    proc = subprocess.run(['ldd', str(binary)], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return []
+    return [line.split()[0] for line in proc.stdout.splitlines() if '=> not found' in line]
+
+
+def _check_interpreters(config: BootstrapConfig, roots: SnapshotRoots,
+                        pyenv_versions: Iterable[str] = ()) -> List[str]:
+    """Return venvs whose base interpreter does not exist on this host.
+
+    Restored pyenv versions are also checked with ``ldd``: a Python built
+    with ``--enable-shared`` finds ``libpython`` through the absolute rpath
+    of the exporting machine, which no text rewrite can move.
+    """
+    problems = []
+    for name in config.pipx:
+        python = roots.pipx_home / 'venvs' / name / 'bin' / 'python'
+        if python.is_symlink() and not python.exists():
+            problems.append(f"pipx venv {name}: interpreter {os.readlink(python)} is missing")
+    for version in pyenv_versions:
+        python = roots.pyenv_root / 'versions' / version / 'bin' / 'python3'
+        missing = missing_libraries(python) if python.exists() else []
+        if missing:
+            problems.append(f"pyenv {version}: {python} cannot load {', '.join(missing)}; "
+                            f"import at the original pyenv root or rebuild it with 'pyenv install'")
+    return problems
@@ -0,0 +1,113 @@
+"""Stdlib-only fast path for ``status`` and ``check``.
+
+Shell hooks call the orchestrator often, mostly to learn that nothing needs
+doing. These commands answer from the JSON config snapshot and the state
+cache, without importing click, rich or a YAML parser. ``main.py`` tries
+:func:`run_fast` before its heavy imports; when the snapshot is missing or
+stale it returns None and the regular CLI handles the command instead.
+
+    status   configured vs. recorded packages per manager, last step timings
+    check    exit 0 when every package is recorded under the current manager
+             state, 1 when a run would have work to do
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from orchestrate.backends import detect_backend
+from orchestrate.config import BootstrapConfig, read_snapshot
+from orchestrate.state import StateCache
+
+FAST_COMMANDS = ('status', 'check')
+
+DEFAULT_CONFIG_DIR = '../config'
+
+
+def system_manager() -> str:
+    return detect_backend().name
+
+
+def managed_packages(config: BootstrapConfig) -> Dict[str, List[str]]:
+    """Return the packages each manager is responsible for."""
+    return {
+        system_manager(): config.system_packages(system_manager()),
+        'pipx': list(config.pipx),
+        'npm': config.npm_specs(),
+    }
+
+
+def pending_by_manager(config: BootstrapConfig, state: StateCache) -> Dict[str, List[str]]:
+    """Return the packages a run would still have to look at, per manager."""
+    return {manager: state.pending(manager, packages) for manager, packages in managed_packages(config).items()}
+
+
+def status(config: BootstrapConfig, state: StateCache, as_json: bool = False,
+           out: Optional[TextIO] = None) -> int:
+    out = out or sys.stdout
+    pending = pending_by_manager(config, state)
+    managers = managed_packages(config)
+    timings = {step: state.timing(step) for step in ('system', 'pipx', 'npm', 'direnv')}
+    if as_json:
+        document = {
+            'managers': {m: {'configured': len(p), 'pending': pending[m]} for m, p in managers.items()},
+            'timings': {k: v for k, v in timings.items() if v is not None},
+        }
+        out.write(json.dumps(document, indent=2) + '\n')
+        return 0
+    for manager, packages in managers.items():
+        waiting = pending[manager]
+        line = f"{manager}: {len(packages) - len(waiting)}/{len(packages)} up to date"
+        if waiting:
+            line += f" (pending: {', '.join(waiting)})"
+        out.write(line + '\n')
+    measured = [f"{step} {seconds:.1f}s" for step, seconds in timings.items() if seconds is not None]
+    if measured:
+        out.write(f"last run: {', '.join(measured)}\n")
+    return 0
+
+
+def check(config: BootstrapConfig, state: StateCache, out: Optional[TextIO] = None) -> int:
+    out = out or sys.stdout
+    pending = {m: p for m, p in pending_by_manager(config, state).items() if p}
+    if not pending:
+        out.write("up to date\n")
+        return 0
+    out.write(', '.join(f"{m}: {len(p)} pending" for m, p in pending.items()) + '\n')
+    return 1
+
+
+def parse_fast_args(argv: List[str]) -> Optional[Dict[str, object]]:
+    """Parse ``[--config-dir DIR] (status|check) [--json]``; None for anything else."""
+    args: Dict[str, object] = {'config_dir': DEFAULT_CONFIG_DIR, 'json': False, 'command': None}
+    rest = list(argv)
+    while rest:
+        arg = rest.pop(0)
+        if arg == '--config-dir' and rest:
+            args['config_dir'] = rest.pop(0)
+        elif arg.startswith('--config-dir='):
+            args['config_dir'] = arg.split('=', 1)[1]
+        elif arg in FAST_COMMANDS and args['command'] is None:
+            args['command'] = arg
+        elif arg == '--json' and args['command'] == 'status':
+            args['json'] = True
+        else:
+            return None
+    return args if args['command'] else None
+
+
+def run_fast(argv: List[str]) -> Optional[int]:
+    """Handle ``argv`` on the fast path and return an exit code, or None."""
+    args = parse_fast_args(argv)
+    if args is None:
+        return None
+    config = read_snapshot(Path(str(args['config_dir'])).resolve())
+    if config is None:
+        return None
+    state = StateCache.default()
+    if args['command'] == 'check':
+        return check(config, state)
+    return status(config, state, as_json=bool(args['json']))
@@ -0,0 +1,232 @@
+"""Run the orchestrator on many hosts at once.
+
+An inventory file lists the target hosts and how to reach them::
+
+    defaults:
+      repo_dir: /opt/foundry-bootstrap
+      jobs: 4
+    hosts:
+      - name: build-1
+        transport: ssh
+        address: ci@build-1.internal
+      - name: devbox
+        transport: container
+        container: foundry-dev
+      - name: localhost
+        transport: local
+        repo_dir: /srv/foundry-bootstrap
+
+Every transport turns ``orchestrate/main.py <args>`` into a command run on
+this machine: directly (``local``), through ``docker exec`` (``container``)
+or through ``ssh``. :class:`FleetRunner` runs up to ``parallel`` hosts at a
+time, streams each host's output line by line and applies the ``continue``
+or ``fail-fast`` policy. Only the standard library is used.
+"""
+
+from __future__ import annotations
+
+import shlex
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from orchestrate.config import ConfigError, read_yaml
+
+FAIL_POLICIES = ('continue', 'fail-fast')
+
+OK = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# Lines of output kept per host for the summary.
+TAIL_LINES = 20
+
+# Config directory of a checkout, relative to the ``repo_dir`` every
+# transport runs in. main.py's own default is relative to orchestrate/.
+HOST_CONFIG_DIR = 'config'
+
+
+@dataclass(frozen=True)
+class Host:
+    """A target machine from the inventory."""
+
+    name: str
+    transport: str = 'ssh'
+    address: Optional[str] = None
+    container: Optional[str] = None
+    repo_dir: str = '.'
+    python: str = 'python3'
+    jobs: Optional[int] = None
+
+
+@dataclass
+class HostResult:
+    name: str
+    status: str
+    exit_code: Optional[int] = None
+    duration: float = 0.0
+    tail: List[str] = field(default_factory=list)
+
+
+class Transport(ABC):
+    """Builds the local command that runs the orchestrator on a host.
+
+    Every transport starts the orchestrator from the host's ``repo_dir``.
+    """
+
+    @abstractmethod
+    def command(self, host: Host, argv: List[str]) -> List[str]:
+        """Return the command that runs ``orchestrate/main.py argv`` on ``host``."""
+
+    def cwd(self, host: Host) -> Optional[str]:
+        return None
+
+    def orchestrator(self, host: Host, argv: List[str]) -> List[str]:
+        return [host.python, 'orchestrate/main.py', *argv]
+
+
+class LocalTransport(Transport):
+    """Run in a local checkout, e.g. a chroot or a second working tree."""
+
+    def command(self, host: Host, argv: List[str]) -> List[str]:
+        return self.orchestrator(host, argv)
+
+    def cwd(self, host: Host) -> Optional[str]:
+        return host.repo_dir
+
+
+class ContainerTransport(Transport):
+    """Run inside a running container with ``docker exec`` (or podman)."""
+
+    def __init__(self, engine: str = 'docker'):
+        self.engine = engine
+
+    def command(self, host: Host, argv: List[str]) -> List[str]:
+        return [self.engine, 'exec', '-w', host.repo_dir, host.container or host.name,
+                *self.orchestrator(host, argv)]
+
+
+class SshTransport(Transport):
+    """Run on a remote machine over ssh without prompting."""
+
+    def command(self, host: Host, argv: List[str]) -> List[str]:
+        remote = f"cd {shlex.quote(host.repo_dir)} && {shlex.join(self.orchestrator(host, argv))}"
+        return ['ssh', '-o', 'BatchMode=yes', host.address or host.name, remote]
+
+
+TRANSPORTS: Dict[str, Transport] = {
+    'local': LocalTransport(),
+    'container': ContainerTransport(),
+    'ssh': SshTransport(),
+}
+
+
+def parse_inventory(data: Any, path: Path) -> List[Host]:
+    """Validate an inventory document."""
+    if not isinstance(data, dict) or not isinstance(data.get('hosts'), list):
+        raise ConfigError(f"{path}: expected a mapping with a 'hosts' list")
+    defaults = data.get('defaults') or {}
+    if not isinstance(defaults, dict):
+        raise ConfigError(f"{path}: 'defaults' must be a mapping")
+    known = set(Host.__dataclass_fields__)
+    hosts = []
+    for item in data['hosts']:
+        if isinstance(item, str):
+            item = {'name': item}
+        if not isinstance(item, dict) or not isinstance(item.get('name'), str):
+            raise ConfigError(f"{path}: invalid host entry {item!r}")
+        entry = {**defaults, **item}
+        unknown = set(entry) - known
+        if unknown:
+            raise ConfigError(f"{path}: {item['name']}: unknown keys {', '.join(sorted(unknown))}")
+        if entry.get('transport', 'ssh') not in TRANSPORTS:
+            raise ConfigError(f"{path}: {item['name']}: unknown transport {entry['transport']!r}")
+        hosts.append(Host(**entry))
+    names = [h.name for h in hosts]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ConfigError(f"{path}: duplicate hosts {', '.join(duplicates)}")
+    return hosts
+
+
+def load_inventory(path: Path) -> List[Host]:
+    """Read the hosts of an inventory YAML file."""
+    return parse_inventory(read_yaml(path), path)
+
+
+class FleetRunner:
+    """Runs the orchestrator on several hosts, ``parallel`` at a time."""
+
+    def __init__(self, parallel: int = 4, policy: str = 'continue',
+                 transports: Optional[Dict[str, Transport]] = None):
+        self.parallel = max(1, parallel)
+        self.policy = policy
+        self.transports = transports or TRANSPORTS
+        self._stop = threading.Event()
+
+    def host_argv(self, host: Host, argv: List[str]) -> List[str]:
+        """Return the orchestrator arguments for ``host``.
+
+        The checkout's config directory is passed unless ``argv`` sets one.
+        """
+        options = []
+        if not any(arg == '--config-dir' or arg.startswith('--config-dir=') for arg in argv):
+            options += ['--config-dir', HOST_CONFIG_DIR]
+        if host.jobs is not None:
+            options += ['--jobs', str(host.jobs)]
+        return [*options, *argv]
+
+    def run_host(self, host: Host, argv: List[str],
+                 on_line: Optional[Callable[[str, str], None]] = None) -> HostResult:
+        """Run the orchestrator on one host, streaming its output."""
+        if self._stop.is_set():
+            return HostResult(host.name, SKIPPED)
+        transport = self.transports[host.transport]
+        cmd = transport.command(host, self.host_argv(host, argv))
+        tail: deque = deque(maxlen=TAIL_LINES)
+        start = time.monotonic()
+        try:
+            proc = subprocess.Popen(cmd, cwd=transport.cwd(host), stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                    text=True, errors='replace')
+        except OSError as e:
+            # A missing or unusable transport fails this host, not the fleet.
+            tail.append(str(e))
+            exit_code = 127 if isinstance(e, FileNotFoundError) else 126
+        else:
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                line = line.rstrip('\n')
+                tail.append(line)
+                if on_line:
+                    on_line(host.name, line)
+            exit_code = proc.wait()
+        status = OK if exit_code == 0 else FAILED
+        if status == FAILED and self.policy == 'fail-fast':
+            self._stop.set()
+        return HostResult(host.name, status, exit_code, time.monotonic() - start, list(tail))
+
+    def run(self, hosts: List[Host], argv: List[str],
+            on_line: Optional[Callable[[str, str], None]] = None,
+            on_done: Optional[Callable[[HostResult], None]] = None) -> List[HostResult]:
+        """Run every host and return the results in inventory order.
+
+        Under ``fail-fast`` hosts that have not started when one fails are
+        skipped; hosts already running are left to finish.
+        """
+        self._stop.clear()
+
+        def run_one(host: Host) -> HostResult:
+            result = self.run_host(host, argv, on_line)
+            if on_done:
+                on_done(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            return list(pool.map(run_one, hosts))
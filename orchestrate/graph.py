@@ -0,0 +1,186 @@
+"""Dependency graph of bootstrap steps.
+
+Each node is a callable returning a success flag. Requirements point at
+other nodes, optionally narrowed to a single package (``system:node``): such
+a requirement still holds when the required node failed for other packages,
+as long as that particular package did not fail.
+
+:meth:`TaskGraph.run` starts every node whose requirements are met, running
+up to ``jobs`` nodes at a time, and skips nodes below a failed requirement.
+:meth:`TaskGraph.critical_path` and :meth:`TaskGraph.parallelism` describe
+the plan using per-node duration estimates.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+OK = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class GraphError(ValueError):
+    """Raised for unknown requirements or dependency cycles."""
+
+
+@dataclass(frozen=True)
+class Requirement:
+    """Dependency on ``node``, or only on ``item`` installed by ``node``."""
+
+    node: str
+    item: Optional[str] = None
+
+    @classmethod
+    def parse(cls, text: str) -> 'Requirement':
+        node, _, item = text.partition(':')
+        return cls(node, item or None)
+
+    def __str__(self) -> str:
+        return f"{self.node}:{self.item}" if self.item else self.node
+
+
+@dataclass
+class Node:
+    name: str
+    action: Callable[[], bool]
+    requires: List[Requirement] = field(default_factory=list)
+    weight: float = 1.0
+
+
+@dataclass
+class NodeResult:
+    name: str
+    status: str
+    duration: float = 0.0
+    reason: str = ''
+
+
+class TaskGraph:
+    """A DAG of named steps executed in dependency order."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, Node] = {}
+
+    def add(self, name: str, action: Callable[[], bool], requires: Optional[List[str]] = None,
+            weight: float = 1.0) -> Node:
+        """Add a node; ``requires`` entries are ``node`` or ``node:item`` strings."""
+        node = Node(name, action, [Requirement.parse(r) for r in requires or []], weight)
+        self.nodes[name] = node
+        return node
+
+    def require(self, name: str, requirement: str) -> None:
+        """Add ``requirement`` to an existing node unless already present."""
+        req = Requirement.parse(requirement)
+        if req.node == name:
+            return
+        if req not in self.nodes[name].requires:
+            self.nodes[name].requires.append(req)
+
+    def topological_order(self) -> List[str]:
+        """Return node names so that every node follows its requirements.
+
+        Ties keep insertion order, so the order is deterministic.
+        """
+        for node in self.nodes.values():
+            for req in node.requires:
+                if req.node not in self.nodes:
+                    raise GraphError(f"{node.name} requires unknown step {req.node}")
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise GraphError(f"dependency cycle: {' -> '.join(path + (name,))}")
+            state[name] = 1
+            for req in self.nodes[name].requires:
+                visit(req.node, path + (name,))
+            state[name] = 2
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, ())
+        return order
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """Return the heaviest chain of nodes and its total weight."""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.topological_order():
+            node = self.nodes[name]
+            best, start = None, 0.0
+            for req in node.requires:
+                if finish[req.node] > start:
+                    best, start = req.node, finish[req.node]
+            finish[name] = start + node.weight
+            previous[name] = best
+        if not finish:
+            return [], 0.0
+        last = max(finish, key=lambda n: finish[n])
+        path = []
+        cursor: Optional[str] = last
+        while cursor is not None:
+            path.append(cursor)
+            cursor = previous[cursor]
+        return list(reversed(path)), finish[last]
+
+    def parallelism(self) -> float:
+        """Return total work divided by the critical path length."""
+        _, length = self.critical_path()
+        total = sum(node.weight for node in self.nodes.values())
+        return total / length if length else 1.0
+
+    def run(self, jobs: int = 1,
+            item_failed: Optional[Callable[[str, str], bool]] = None) -> Dict[str, NodeResult]:
+        """Run all nodes, at most ``jobs`` at a time.
+
+        ``item_failed(node, item)`` tells whether a narrowed requirement
+        failed; without it any failure of the required node counts.
+        """
+        order = self.topological_order()
+        results: Dict[str, NodeResult] = {}
+        running: Dict[Future, Tuple[str, float]] = {}
+        pending: List[str] = list(order)
+
+        def blocked_by(node: Node) -> Optional[Requirement]:
+            for req in node.requires:
+                status = results[req.node].status
+                if status == OK:
+                    continue
+                if status == FAILED and req.item and item_failed and not item_failed(req.node, req.item):
+                    continue
+                return req
+            return None
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while pending or running:
+                for name in list(pending):
+                    node = self.nodes[name]
+                    if any(req.node not in results for req in node.requires):
+                        continue
+                    pending.remove(name)
+                    blocker = blocked_by(node)
+                    if blocker is not None:
+                        results[name] = NodeResult(name, SKIPPED, reason=f"{blocker} did not complete")
+                        continue
+                    if len(running) >= max(1, jobs):
+                        pending.insert(0, name)
+                        break
+                    running[pool.submit(node.action)] = (name, time.monotonic())
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, start = running.pop(future)
+                    try:
+                        ok = bool(future.result())
+                        reason = ''
+                    except Exception as e:
+                        ok, reason = False, str(e)
+                    results[name] = NodeResult(name, OK if ok else FAILED, time.monotonic() - start, reason)
+        return {name: results[name] for name in order}
@@ -0,0 +1,154 @@
+"""Installed packages read from the package managers' own files.
+
+``brew list``, ``pipx list`` and ``npm ls -g`` each take a second or more
+to start and print text meant for people. The same information is on disk:
+
+    apt    /var/lib/dpkg/status              one paragraph per package
+    pipx   <pipx home>/venvs/*/pipx_metadata.json
+    npm    <npm prefix>/lib/node_modules/**/package.json
+    brew   <prefix>/Cellar/<formula>/<version>, <prefix>/Caskroom/<cask>
+
+:class:`Inventory` reads these and returns name → version maps. A manager
+whose files are not where they are expected maps to None, and callers fall
+back to running the manager.
+
+Only the standard library is used so that ``test_setup.py`` can share it.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from orchestrate.state import brew_cellar, npm_global_modules, pipx_venvs_dir
+
+DPKG_STATUS = Path('/var/lib/dpkg/status')
+
+MANAGERS = ('apt', 'brew', 'pipx', 'npm')
+
+
+def parse_dpkg_status(lines: Iterable[str]) -> Dict[str, str]:
+    """Return the installed packages in dpkg status ``lines``.
+
+    Only ``Package``, ``Status`` and ``Version`` are looked at. For
+    multi-arch packages the first architecture listed wins.
+    """
+    installed: Dict[str, str] = {}
+    package = status = version = None
+    for line in lines:
+        if line[:1] in (' ', '\t'):
+            continue
+        if line.strip() == '':
+            if package and version and status and status.split()[-1] == 'installed':
+                installed.setdefault(package, version)
+            package = status = version = None
+        elif line.startswith('Package:'):
+            package = line[8:].strip()
+        elif line.startswith('Status:'):
+            status = line[7:].strip()
+        elif line.startswith('Version:'):
+            version = line[8:].strip()
+    if package and version and status and status.split()[-1] == 'installed':
+        installed.setdefault(package, version)
+    return installed
+
+
+def read_dpkg_status(path: Path = DPKG_STATUS) -> Optional[Dict[str, str]]:
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return parse_dpkg_status(f)
+    except OSError:
+        return None
+
+
+def read_pipx_venvs(venvs: Path) -> Optional[Dict[str, str]]:
+    """Return each pipx venv's main package and version.
+
+    Venvs are listed under their directory name, which is what ``pipx
+    install`` was given, and under the package name when that differs.
+    """
+    if not venvs.is_dir():
+        return None
+    installed: Dict[str, str] = {}
+    for venv in sorted(venvs.iterdir()):
+        try:
+            main = json.loads((venv / 'pipx_metadata.json').read_text()).get('main_package') or {}
+        except (OSError, ValueError):
+            continue
+        version = str(main.get('package_version') or '')
+        installed[venv.name] = version
+        if main.get('package'):
+            installed.setdefault(str(main['package']), version)
+    return installed
+
+
+def _package_version(directory: Path) -> Optional[str]:
+    try:
+        return str(json.loads((directory / 'package.json').read_text()).get('version') or '')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def read_npm_globals(modules: Optional[Path]) -> Optional[Dict[str, str]]:
+    """Return the global npm packages, including ``@scope/name`` ones."""
+    if modules is None or not modules.is_dir():
+        return None
+    installed: Dict[str, str] = {}
+    for entry in sorted(modules.iterdir()):
+        if entry.name.startswith('.'):
+            continue
+        children = sorted(entry.iterdir()) if entry.name.startswith('@') and entry.is_dir() else [entry]
+        for package in children:
+            version = _package_version(package)
+            if version is not None:
+                installed[package.relative_to(modules).as_posix()] = version
+    return installed
+
+
+def read_brew_cellar(cellar: Optional[Path]) -> Optional[Dict[str, str]]:
+    """Return Homebrew formulae and casks with their newest installed version."""
+    if cellar is None or not cellar.is_dir():
+        return None
+    installed: Dict[str, str] = {}
+    for root in (cellar, cellar.parent / 'Caskroom'):
+        if not root.is_dir():
+            continue
+        for entry in sorted(root.iterdir()):
+            versions = sorted(v.name for v in entry.iterdir() if not v.name.startswith('.')) if entry.is_dir() else []
+            if versions:
+                installed.setdefault(entry.name, versions[-1])
+    return installed
+
+
+class Inventory:
+    """Installed-package view across apt, brew, pipx and npm.
+
+    Locations default to the current user's; pass paths to read another
+    tree. Every call reads the files again, so installs made earlier in the
+    run are seen.
+    """
+
+    def __init__(self, dpkg_status: Path = DPKG_STATUS, pipx_venvs: Optional[Path] = None,
+                 npm_modules: Optional[Path] = None, brew_cellar: Optional[Path] = None):
+        self.dpkg_status = dpkg_status
+        self.pipx_venvs = pipx_venvs
+        self.npm_modules = npm_modules
+        self.brew_cellar = brew_cellar
+
+    def versions(self, manager: str) -> Optional[Dict[str, str]]:
+        """Return name → version for ``manager``, or None if its state is not readable here."""
+        if manager == 'apt':
+            return read_dpkg_status(self.dpkg_status)
+        if manager == 'pipx':
+            return read_pipx_venvs(self.pipx_venvs or pipx_venvs_dir())
+        if manager == 'npm':
+            return read_npm_globals(self.npm_modules or npm_global_modules())
+        if manager == 'brew':
+            return read_brew_cellar(self.brew_cellar or brew_cellar())
+        return None
+
+    def index(self) -> Dict[str, Dict[str, str]]:
+        """Return every readable manager's packages, keyed by manager."""
+        found = {manager: self.versions(manager) for manager in MANAGERS}
+        return {manager: versions for manager, versions in found.items() if versions is not None}
@@ -0,0 +1,108 @@
+"""Checkpoint journal of the packages a run has finished.
+
+The state cache is only written when a run ends, and its fingerprints
+change with every install. The journal instead appends one line per
+finished package as soon as its install command succeeds, so a run that
+was interrupted or failed can be continued with ``--resume`` without
+touching packages it already installed. A successful run removes the
+journal.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from orchestrate.state import default_cache_dir
+
+JOURNAL_VERSION = 1
+
+
+class Journal:
+    """Append-only record of finished ``(manager, package)`` pairs.
+
+    A journal created without a path keeps nothing, like an in-memory
+    :class:`~orchestrate.state.StateCache`.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._resumed: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def default(cls) -> 'Journal':
+        return cls(default_cache_dir() / 'journal.jsonl')
+
+    def begin(self, config_dir: Path, resume: bool = False) -> int:
+        """Start journaling a run of ``config_dir``.
+
+        With ``resume``, packages finished by the previous run of the same
+        config directory are loaded and kept; otherwise the journal starts
+        empty. Returns the number of packages resumed.
+        """
+        self._resumed = {}
+        if self.path is None:
+            return 0
+        if resume:
+            self._resumed = self._load(str(config_dir))
+            if self._resumed:
+                return sum(len(packages) for packages in self._resumed.values())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {'journal': JOURNAL_VERSION, 'config_dir': str(config_dir), 'started': time.time()}
+        with self._lock:
+            self.path.write_text(json.dumps(header) + '\n')
+        return 0
+
+    def _load(self, config_dir: str) -> Dict[str, Set[str]]:
+        assert self.path is not None
+        try:
+            lines = self.path.read_text().splitlines()
+        except OSError:
+            return {}
+        finished: Dict[str, Set[str]] = {}
+        for number, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash; everything before it counts.
+                break
+            if number == 0:
+                if entry.get('journal') != JOURNAL_VERSION or entry.get('config_dir') != config_dir:
+                    return {}
+                continue
+            finished.setdefault(entry['manager'], set()).add(entry['package'])
+        return finished
+
+    def resumed(self, manager: str) -> Set[str]:
+        """Return the packages of ``manager`` finished before this run resumed."""
+        return set(self._resumed.get(manager, ()))
+
+    def record(self, manager: str, packages: Iterable[str]) -> None:
+        """Append ``packages`` as finished."""
+        if self.path is None:
+            return
+        payload = ''.join(json.dumps({'manager': manager, 'package': pkg}) + '\n' for pkg in packages)
+        if not payload:
+            return
+        with self._lock, open(self.path, 'a') as f:
+            f.write(payload)
+
+    def clear(self) -> None:
+        """Remove the journal after a run that finished everything."""
+        self._resumed = {}
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    def has_progress(self) -> bool:
+        """Return True if the journal on disk lists any finished package."""
+        if self.path is None:
+            return False
+        try:
+            with open(self.path) as f:
+                return sum(1 for _ in f) > 1
+        except OSError:
+            return False
@@ -6,274 +6,790 @@ This script handles the installation of development tools based on configuration
 It reads YAML configs and installs tools via subprocess calls.
 """
 
-import os
 import sys
-import subprocess
-from ruamel.yaml import YAML
 from pathlib import Path
-from typing import List, Dict, Any
+
+if __package__ in (None, ''):
+    # Running as ``python3 main.py`` from inside orchestrate/
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+if __name__ == '__main__':
+    # status/check answer from the config snapshot before anything else loads.
+    from orchestrate.fast import run_fast
+
+    _fast_exit = run_fast(sys.argv[1:])
+    if _fast_exit is not None:
+        sys.exit(_fast_exit)
+
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+from typing import List, Dict, Any, Set, Tuple
 import click
 from rich.console import Console
+from rich.live import Live
+from rich.markup import escape
+from rich.table import Table
+
+from orchestrate.apt_cache import (
+    DEFAULT_LISTS_TTL,
+    REFRESH_POLICIES,
+    AptCandidate,
+    decide_refresh,
+)
+from orchestrate.artifacts import FALLBACK_SCRIPTS, ArtifactCache, default_artifact_dir
+from orchestrate.backends import BACKENDS, PackageBackend, detect_backend
+from orchestrate.config import (
+    SYSTEM_MANAGERS,
+    BootstrapConfig,
+    ConfigError,
+    load_bootstrap_config,
+    write_snapshot,
+)
+from orchestrate.diff import EntryDiff, diff_entries
+from orchestrate.fleet import FAIL_POLICIES, FleetRunner, HostResult, load_inventory
+from orchestrate.graph import FAILED, SKIPPED, GraphError, TaskGraph
+from orchestrate.inventory import MANAGERS as INVENTORY_MANAGERS, Inventory
+from orchestrate.journal import Journal
+from orchestrate.npm import parse_ls_json, spec_satisfied, split_spec
+from orchestrate.pipeline import FetchPipeline
+from orchestrate.retry import DEFAULT_RETRY_POLICIES, NO_RETRY, RetryPolicy, retryable, with_mirror
+from orchestrate.runner import EXIT_NOT_FOUND, CommandResult, CommandRunner
+from orchestrate.scheduler import MANAGER_LOCKS, InstallResult, InstallScheduler, InstallTask
+from orchestrate.state import StateCache, fingerprint, manager_stamp, pipx_venvs_dir
+from orchestrate.suggest import format_suggestions
+from orchestrate.todo import MissingPackages
+from orchestrate.tools import ToolIndex
+from orchestrate.trace import TRACE_FORMATS, Tracer
+from orchestrate.wheelhouse import Wheelhouse, link_duplicate_files
 
 console = Console()
 
+TODO_PATH = Path(__file__).resolve().parent.parent / 'TODO.md'
+
+# Bootstrap steps in their default order.
+PHASES = ('system', 'pipx', 'npm', 'direnv')
+
+# Requirements every run adds on top of the ``requires:`` keys in config.
+# pipx only needs the Python that bootstrap.sh provides, so it has none.
+PHASE_REQUIRES: Dict[str, List[str]] = {
+    'npm': ['system:node'],
+    'direnv': ['system:direnv'],
+}
+
+# Commands removing packages dropped from config with ``--prune``.
+UNINSTALL_COMMANDS: Dict[str, List[str]] = {
+    **{name: backend.remove_command([]) for name, backend in BACKENDS.items()},
+    'pipx': ['pipx', 'uninstall'],
+    'npm': ['npm', 'uninstall', '-g'],
+}
+
+# Managers whose uninstall command accepts a single package only.
+UNINSTALL_ONE_AT_A_TIME = {'pipx'}
+
+
+# Default per-command timeout in seconds.
+DEFAULT_STEP_TIMEOUT = 3600
+
+
+def _output_size(*streams: str | None) -> int:
+    """Return the combined size in bytes of captured command output."""
+    return sum(len(stream.encode()) for stream in streams if stream)
+
+
+class LiveOutput:
+    """Live view of the latest output line of every running command.
+
+    Only shown on a terminal; elsewhere the updates are dropped.
+    """
+
+    def __init__(self, console: Console):
+        self.console = console
+        self.enabled = console.is_terminal
+        self._running: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._live: Live | None = None
+        self._next = 0
+
+    def __rich__(self) -> Table:
+        table = Table.grid(padding=(0, 1))
+        with self._lock:
+            running = list(self._running.values())
+        for description, line in running:
+            table.add_row(f"[cyan]{escape(description)}[/cyan]", f"[dim]{escape(line[-120:])}[/dim]")
+        return table
+
+    def start(self, description: str) -> int:
+        with self._lock:
+            self._next += 1
+            key = self._next
+            self._running[key] = (description, '')
+            if self.enabled and self._live is None:
+                self._live = Live(self, console=self.console, refresh_per_second=8, transient=True)
+                self._live.start()
+        return key
+
+    def update(self, key: int, line: str) -> None:
+        if self.enabled and line.strip():
+            with self._lock:
+                if key in self._running:
+                    self._running[key] = (self._running[key][0], line)
+
+    def finish(self, key: int) -> None:
+        with self._lock:
+            self._running.pop(key, None)
+            live = self._live if not self._running else None
+            if live is not None:
+                self._live = None
+        if live is not None:
+            live.stop()
+
+
 class BootstrapOrchestrator:
     """Orchestrates the installation of development tools."""
     
-    def __init__(self, config_dir: Path):
+    def __init__(self, config_dir: Path, jobs: int = 1, state: StateCache | None = None,
+                 apt_refresh: str = 'auto', apt_lists_ttl: float = DEFAULT_LISTS_TTL,
+                 trace_file: Path | None = None, trace_format: str = 'jsonl',
+                 artifacts: ArtifactCache | None = None, incremental: bool = False,
+                 prune: bool = False, wheelhouse: Wheelhouse | None = None,
+                 runner: CommandRunner | None = None, journal: Journal | None = None,
+                 resume: bool = False, missing: MissingPackages | None = None,
+                 inventory: Inventory | None = None, pipeline: FetchPipeline | None = None,
+                 backend: PackageBackend | None = None):
         self.config_dir = config_dir
-        self.console = Console()
-    
-    def load_config(self, filename: str) -> Dict[str, Any]:
-        """Load a YAML configuration file."""
-        config_path = self.config_dir / filename
-        if not config_path.exists():
-            self.console.print(f"[red]Config file not found: {config_path}[/red]")
-            return {}
-        
-        yaml = YAML(typ='safe')
-        with open(config_path, 'r') as f:
-            return yaml.load(f)
+        self.console = console
+        self.jobs = max(1, jobs)
+        self.scheduler = InstallScheduler(self.jobs)
+        self.state = state if state is not None else StateCache()
+        self.apt_refresh = apt_refresh
+        self.apt_lists_ttl = apt_lists_ttl
+        # Decisions taken during the run, printed with the results summary.
+        self.report: Dict[str, Any] = {}
+        self.tracer = Tracer()
+        self.trace_file = trace_file
+        self.trace_format = trace_format
+        # Local artifact cache read before the network, if configured.
+        self.artifacts = artifacts
+        # Trust the last applied config instead of re-checking every package.
+        self.incremental = incremental
+        self.prune = prune
+        # Build pipx tools from one shared wheelhouse when set.
+        self.wheelhouse = wheelhouse
+        self.runner = runner if runner is not None else CommandRunner(DEFAULT_STEP_TIMEOUT)
+        self.live = LiveOutput(self.console)
+        # Executables on PATH, scanned once and re-listed when a directory changes.
+        self.tools = ToolIndex()
+        # Installed packages read from dpkg, pipx, npm and Homebrew files.
+        self.inventory = inventory if inventory is not None else Inventory()
+        # Background downloads that installs wait for, when pipelining.
+        self.pipeline = pipeline
+        # System package manager; detected from the platform unless given.
+        self.backend = backend
+        # Packages finished so far, for continuing an interrupted run.
+        self.journal = journal if journal is not None else Journal()
+        self.resume = resume
+        # apt packages without a candidate, written to TODO.md once per run.
+        self.missing = missing if missing is not None else MissingPackages(TODO_PATH, 'orchestrator',
+                                                                           create_todo=False)
+        # Packages that failed per phase; a phase that failed without
+        # per-package detail maps to None.
+        self.failed_packages: Dict[str, Set[str] | None] = {}
+        self._failed_lock = threading.Lock()
     
-    def run_command(self, cmd: List[str], description: str, env: Dict[str, str] | None = None) -> bool:
-        """Run a command and return success status."""
+    def load_config(self) -> BootstrapConfig | None:
+        """Load the typed configuration, or None if it is invalid."""
         try:
+            return load_bootstrap_config(self.config_dir)
+        except ConfigError as e:
+            self.console.print(f"[red]Invalid configuration: {e}[/red]")
+            return None
+    
+    def retry_policy(self, manager: str | None) -> RetryPolicy:
+        """Return the retry policy for ``manager`` from config or the defaults."""
+        if manager is None:
+            return NO_RETRY
+        config = self.load_config()
+        retries = config.retries if config is not None else {}
+        return retries.get(manager) or retries.get('default') or DEFAULT_RETRY_POLICIES.get(manager, NO_RETRY)
+
+    def run_command(self, cmd: List[str], description: str, env: Dict[str, str] | None = None,
+                    timeout: float | None = None, manager: str | None = None, cwd: Path | None = None) -> bool:
+        """Run a command, streaming its output, and return success status.
+
+        With ``manager`` set, transient failures are retried under that
+        manager's retry policy, moving to the next configured mirror on each
+        attempt.
+        """
+        policy = self.retry_policy(manager)
+        config = self.load_config() if manager else None
+        mirrors = list(config.mirrors.get(manager, ())) if config is not None else []
+        attempts = max(policy.attempts, len(mirrors))
+        for attempt in range(1, attempts + 1):
+            mirror = mirrors[(attempt - 1) % len(mirrors)] if mirrors else None
+            attempt_cmd, attempt_env = with_mirror(manager or '', mirror, cmd, env)
+            result = self._run_once(attempt_cmd, description, attempt_env, timeout, attempt, cwd)
+            if result.ok:
+                return True
+            if attempt == attempts or not retryable(result, manager):
+                return False
+            delay = policy.wait_before(attempt + 1)
+            next_mirror = f" via {mirrors[attempt % len(mirrors)]}" if len(mirrors) > 1 else ''
+            self.console.print(f"[yellow]↻ Retrying {description} in {delay:.0f}s{next_mirror} "
+                               f"(attempt {attempt + 1}/{attempts})[/yellow]")
+            if not self.runner.wait(delay):
+                return False
+        return False
+
+    def _run_once(self, cmd: List[str], description: str, env: Dict[str, str] | None,
+                  timeout: float | None, attempt: int = 1, cwd: Path | None = None) -> CommandResult:
+        """Run ``cmd`` once, streaming and reporting its output."""
+        with self.tracer.span(description, 'command', cmd=cmd, attempt=attempt) as span:
             self.console.print(f"[blue]Running: {description}[/blue]")
-            subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True,
-                env=env
-            )
-            self.console.print(f"[green]✅ {description} completed[/green]")
-            return True
-        except subprocess.CalledProcessError as e:
-            self.console.print(f"[red]❌ {description} failed: {e.stderr}[/red]")
-            return False
+            key = self.live.start(description)
+            try:
+                result = self.runner.run(cmd, env=env, timeout=timeout, cwd=str(cwd) if cwd else None,
+                                         on_line=lambda line: self.live.update(key, line))
+            finally:
+                self.live.finish(key)
+            span.exit_code = result.returncode
+            span.output_bytes = result.output_bytes
+            span.retries = attempt - 1
+            if result.ok:
+                self.console.print(f"[green]✅ {description} completed[/green]")
+            elif result.returncode == EXIT_NOT_FOUND and len(result.lines) == 1:
+                self.console.print(f"[red]❌ {description} failed: {cmd[0]} not found[/red]")
+            elif result.timed_out:
+                self.console.print(f"[red]❌ {description} timed out and was stopped[/red]")
+            elif result.cancelled:
+                self.console.print(f"[red]❌ {description} cancelled[/red]")
+            else:
+                self.console.print(f"[red]❌ {description} failed:[/red]")
+                self.console.print(escape(result.tail()), style='red', highlight=False)
+            return result
+
+    def list_installed(self, cmd: List[str], check: bool = True) -> str | None:
+        """Run a package listing command and return its stdout, or None on failure.
+
+        With ``check=False`` the output is returned whatever the exit status,
+        for commands like ``npm ls`` that report problems but still list.
+        """
+        with self.tracer.span(' '.join(cmd), 'probe') as span:
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, check=check)
+            except subprocess.CalledProcessError as e:
+                span.exit_code = e.returncode
+                return None
+            except OSError:
+                span.exit_code = EXIT_NOT_FOUND
+                return None
+            span.exit_code = result.returncode
+            span.output_bytes = _output_size(result.stdout, result.stderr)
+            return result.stdout
     
-    def check_command_exists(self, cmd: str) -> bool:
-        """Check if a command exists in PATH."""
+    def installed_packages(self, manager: str) -> Dict[str, str] | None:
+        """Return installed name → version from the manager's own files.
+
+        None means the files are not readable here and the caller should ask
+        the manager instead.
+        """
+        with self.tracer.span(f"{manager} inventory", 'probe') as span:
+            versions = self.inventory.versions(manager)
+            if versions is None and manager not in INVENTORY_MANAGERS and manager in BACKENDS:
+                versions = self.backend_for(manager).installed()
+            span.exit_code = 0 if versions is not None else 1
+        return versions
+
+    def fetched(self, key: str) -> bool:
+        """Wait for the pipeline's download ``key``; True if it is in the artifact cache."""
+        return self.pipeline is not None and self.pipeline.wait(key)
+
+    def _command_action(self, cmd: List[str], description: str, env: Dict[str, str] | None = None,
+                        manager: str | None = None, package: str | None = None, cwd: Path | None = None):
+        """Return a callable that runs ``cmd`` via :meth:`run_command`.
+
+        When ``package`` is given, its success is written to the journal.
+        """
+        def action() -> bool:
+            ok = self.run_command(cmd, description, env=env, manager=manager, cwd=cwd)
+            if ok and manager is not None and package is not None:
+                self.journal.record(manager, [package])
+            return ok
+        return action
+
+    def print_results(self, results: List[InstallResult]) -> None:
+        """Print a per-package summary of scheduled installs."""
+        for key, refresh in self.report.items():
+            if key.endswith('_refresh'):
+                manager = key[:-len('_refresh')]
+                self.console.print(f"[dim]{manager} lists: {refresh['action']} ({refresh['reason']})[/dim]")
+        if not results:
+            return
+        table = Table(title="Install results")
+        table.add_column("Manager")
+        table.add_column("Package")
+        table.add_column("Status")
+        table.add_column("Time", justify="right")
+        for result in results:
+            status = "[green]ok[/green]" if result.success else "[red]failed[/red]"
+            table.add_row(result.manager, result.package, status, f"{result.duration:.1f}s")
+        self.console.print(table)
+
+    def print_slowest_steps(self, count: int = 10) -> None:
+        """Print the slowest traced commands and probes."""
+        spans = self.tracer.slowest(count, categories=['command', 'probe', 'check'])
+        if not spans:
+            return
+        table = Table(title="Slowest steps")
+        table.add_column("Step")
+        table.add_column("Kind")
+        table.add_column("Exit", justify="right")
+        table.add_column("Output", justify="right")
+        table.add_column("Time", justify="right")
+        for span in spans:
+            exit_code = '' if span.exit_code is None else str(span.exit_code)
+            table.add_row(span.name, span.category, exit_code, f"{span.output_bytes}B", f"{span.duration:.2f}s")
+        self.console.print(table)
+
+    def write_trace(self) -> None:
+        """Write the collected trace to ``trace_file`` when one was requested."""
+        if self.trace_file is None:
+            return
         try:
-            subprocess.run([cmd, '--version'], capture_output=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+            self.tracer.write(self.trace_file, self.trace_format, self.report)
+            self.console.print(f"[dim]Trace written to {self.trace_file}[/dim]")
+        except OSError as e:
+            self.console.print(f"[red]Failed to write trace {self.trace_file}: {e}[/red]")
+
+    def check_command_exists(self, cmd: str) -> bool:
+        """Check if a command exists in PATH, without running it."""
+        return self.tools.exists(cmd)
+
+    def resolve_packages(self, backend: PackageBackend, packages: List[str]) -> Dict[str, AptCandidate]:
+        """Return availability and candidate version from ``backend`` in one query."""
+        with self.tracer.span(f"{backend.name} available", 'probe', packages=len(packages)):
+            return backend.available(packages)
+
+    def refresh_package_lists(self, backend: PackageBackend,
+                              packages: List[str]) -> Dict[str, AptCandidate] | None:
+        """Refresh ``backend``'s repository metadata if the refresh policy asks for it.
+
+        Returns the availability of ``packages`` after any refresh, or None
+        when the refresh failed.
+        """
+        refresh = backend.refresh_command()
+        if refresh is None:
+            return self.resolve_packages(backend, packages)
+        age = backend.lists_age()
+        availability = None
+        if self.apt_refresh == 'auto' and age is not None and age < self.apt_lists_ttl:
+            availability = self.resolve_packages(backend, packages)
+        decision = decide_refresh(self.apt_refresh, age, availability, self.apt_lists_ttl)
+        self.report[f'{backend.name}_refresh'] = {
+            'policy': self.apt_refresh,
+            'action': 'update' if decision.refresh else 'skip',
+            'reason': decision.reason,
+            'lists_age': age,
+        }
+        if decision.refresh:
+            self.console.print(f"[blue]Updating {backend.name} package lists ({decision.reason})...[/blue]")
+            if not self.run_command(refresh, ' '.join(refresh), manager=backend.name):
+                return None
+            backend.refreshed()
+            availability = None
+        else:
+            self.console.print(f"[dim]Skipping {' '.join(refresh)}: {decision.reason}[/dim]")
+        if availability is None:
+            availability = self.resolve_packages(backend, packages)
+        return availability
 
     def apt_package_exists(self, package: str) -> bool:
         """Return True if an apt package is available."""
+        return self.resolve_packages(self.backend_for('apt'), [package])[package].available
+
+    def suggest_packages(self, backend: PackageBackend, packages: List[str]) -> Dict[str, List[str]]:
+        """Return existing package names close to each of ``packages``."""
+        if not packages:
+            return {}
+        with self.tracer.span(f"{backend.name} name suggestions", 'probe', packages=len(packages)):
+            return backend.suggest(packages)
+
+    def record_missing_package(self, package: str, suggestions: List[str] | None = None,
+                               manager: str = 'apt') -> None:
+        """Queue a TODO entry for a system package ``manager`` does not offer."""
+        self.missing.add(package, manager, suggestions=suggestions or ())
+
+    def flush_missing_packages(self) -> None:
+        """Write the queued TODO entries in one locked update."""
         try:
-            result = subprocess.run(
-                ['apt-cache', 'show', package], capture_output=True, text=True, check=True
+            self.missing.flush()
+        except OSError as e:
+            self.console.print(f"[red]Failed to write to {self.missing.todo_path}: {e}[/red]")
+
+    def install_fallback(self, package: str, backend: PackageBackend | None = None) -> bool:
+        """Attempt to install a package using the backend's fallback command.
+
+        Offline, only install scripts from the artifact cache are run.
+        """
+        backend = backend or self.backend_for(self.system_manager())
+        cmd = self.artifacts.fallback_command(package) if self.artifacts else None
+        if cmd is None and package in backend.fallbacks and self.artifacts and self.artifacts.offline:
+            self.console.print(
+                f"[red]❌ Offline: no cached install script for {package} in {self.artifacts.scripts_dir}; "
+                f"run prefetch with network access first[/red]"
             )
-            return 'No packages found' not in result.stdout
-        except subprocess.CalledProcessError:
             return False
-
-    def record_missing_package(self, package: str) -> None:
-        """Append a TODO entry for a missing apt package."""
-        todo_path = Path(__file__).resolve().parent.parent / 'TODO.md'
-        line = f"- [ ] Add apt installation method for {package}\n"
-        try:
-            if todo_path.exists():
-                with open(todo_path, 'r+') as f:
-                    contents = f.read()
-                    if line.strip() not in contents:
-                        f.write(line)
-        except Exception as e:
-            self.console.print(f"[red]Failed to write to {todo_path}: {e}[/red]")
-
-    APT_FALLBACKS: Dict[str, List[str]] = {
-        "direnv": [
-            "bash",
-            "-c",
-            "curl -sfL https://direnv.net/install.sh | bash",
-        ],
-        "just": [
-            "bash",
-            "-c",
-            "curl -fsSL https://just.systems/install.sh | bash -s -- --to /usr/local/bin",
-        ],
-        "gh": [
-            "bash",
-            "-c",
-            "type -p curl >/dev/null && curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg | dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg && chmod go+r /usr/share/keyrings/githubcli-archive-keyring.gpg && echo 'deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg] https://cli.github.com/packages stable main' | tee /etc/apt/sources.list.d/github-cli.list > /dev/null && apt-get update && apt-get install -y gh",
-        ],
-    }
-
-    def install_fallback(self, package: str) -> bool:
-        """Attempt to install a package using a fallback command."""
-        cmd = self.APT_FALLBACKS.get(package)
+        cmd = cmd or backend.fallbacks.get(package)
         if not cmd:
             self.console.print(
                 f"[yellow]No fallback installer for {package}. Package remains missing.[/yellow]"
             )
             return True
-        return self.run_command(cmd, f"fallback install {package}")
+        if not self.run_command(cmd, f"fallback install {package}", manager='fallback'):
+            return False
+        self.journal.record(backend.name, [package])
+        return True
+
+    def config_entries(self, manager: str, config: BootstrapConfig) -> Dict[str, str]:
+        """Return config name → installed package for ``manager``."""
+        if manager in SYSTEM_MANAGERS:
+            return {p.name: p.for_manager(manager) for p in config.packages}
+        if manager == 'npm':
+            return dict(zip(config.npm, config.npm_specs()))
+        return {name: name for name in getattr(config, manager, ())}
+
+    def config_diff(self, manager: str) -> EntryDiff | None:
+        """Diff the current config against the last applied one, if recorded."""
+        config = self.load_config()
+        previous = self.state.applied(manager)
+        if config is None or previous is None:
+            return None
+        return diff_entries(previous, self.config_entries(manager, config))
+
+    def pending_packages(self, manager: str, packages: List[str]) -> List[str]:
+        """Return packages not recorded as installed under the current manager state.
+
+        In incremental mode only packages added or changed since the last
+        applied config are pending. When resuming, packages the interrupted
+        run already finished are never pending.
+        """
+        finished = self.journal.resumed(manager) & set(packages)
+        if finished:
+            self.console.print(f"[dim]Resuming: {len(finished)} {manager} packages finished by the previous run[/dim]")
+            packages = [pkg for pkg in packages if pkg not in finished]
+        if self.incremental:
+            diff = self.config_diff(manager)
+            if diff is not None:
+                wanted = set(diff.to_install())
+                self.console.print(f"[dim]{manager} config changes since last apply: {diff.summary()}[/dim]")
+                return [pkg for pkg in packages if pkg in wanted]
+        return self.state.pending(manager, packages)
+
+    def remember_packages(self, manager: str, packages: List[str],
+                          versions: Dict[str, str | None] | None = None) -> None:
+        """Record packages as installed under the manager's post-install state."""
+        stamp = manager_stamp(manager)
+        versions = versions or {}
+        for pkg in packages:
+            self.state.record(manager, pkg, fingerprint(manager, pkg, stamp), versions.get(pkg))
+
+    def system_manager(self) -> str:
+        """Return the system package manager for this platform."""
+        if self.backend is None:
+            self.backend = detect_backend()
+        return self.backend.name
+
+    def backend_for(self, manager: str) -> PackageBackend:
+        """Return the backend driving the system package manager ``manager``."""
+        if self.backend is not None and self.backend.name == manager:
+            return self.backend
+        return BACKENDS[manager]
+
+    def mark_failed(self, phase: str, packages: List[str]) -> None:
+        """Record packages of ``phase`` that could not be installed."""
+        with self._failed_lock:
+            failed = self.failed_packages.setdefault(phase, set())
+            if failed is not None:
+                failed.update(packages)
+
+    def package_failed(self, phase: str, package: str) -> bool:
+        """Return True if ``package`` from ``phase`` is known not to be installed.
+
+        Packages that ``phase`` does not manage never count as failed.
+        """
+        config = self.load_config()
+        if config is None:
+            return True
+        manager = self.phase_manager(phase)
+        if manager is None:
+            return False
+        entries = self.config_entries(manager, config)
+        name = entries.get(package, package)
+        if name not in entries.values():
+            return False
+        with self._failed_lock:
+            if phase not in self.failed_packages:
+                return True
+            failed = self.failed_packages[phase]
+        return failed is None or name in failed
+
+    def _install_and_remember(self, manager: str, configured: List[str], tasks: List[InstallTask]) -> bool:
+        """Run ``tasks`` and record every configured package that did not fail."""
+        results = self.scheduler.run(tasks)
+        failed = {r.package for r in results if not r.success}
+        if failed:
+            self.console.print(f"[red]❌ Failed to install: {', '.join(sorted(failed))}[/red]")
+            self.mark_failed('system' if manager in SYSTEM_MANAGERS else manager, sorted(failed))
+        self.remember_packages(manager, [pkg for pkg in configured if pkg not in failed])
+        return not failed
+
     def install_system_packages(self) -> bool:
-        """Install system packages using brew on macOS or apt on Linux."""
-        config = self.load_config('packages.yaml')
-        package_entries = config.get('packages', [])
+        """Install system packages with the platform's package manager.
+
+        Every backend takes the same path: the installed set, availability
+        and the install are one batch call each. Name suggestions, fallback
+        installers and artifact-cache options come from backend hooks.
+        """
+        config = self.load_config()
+        if config is None:
+            return False
 
-        if not package_entries:
+        if not config.packages:
             self.console.print("[yellow]No system packages configured[/yellow]")
             return True
 
-        os_name = sys.platform
-        if os_name.startswith('darwin'):
-            manager = 'brew'
-        else:
-            manager = 'apt'
-
-        packages: List[str] = []
-        for item in package_entries:
-            name = None
-            override = None
-            if isinstance(item, str):
-                name = item
-            elif isinstance(item, dict):
-                if 'name' in item:
-                    name = item.get('name')
-                    override = item.get('apt-override')
-                elif len(item) == 1:
-                    name, meta = next(iter(item.items()))
-                    if isinstance(meta, dict):
-                        override = meta.get('apt-override')
-            if not name:
-                continue
-            packages.append(override if manager == 'apt' and override else name)
+        manager = self.system_manager()
+        backend = self.backend_for(manager)
+        packages = config.system_packages(manager)
 
         if not packages:
             self.console.print(f"[yellow]No packages defined for {manager}[/yellow]")
             return True
 
-        if manager == 'brew':
-            if not self.check_command_exists('brew'):
-                self.console.print("[red]Homebrew not found. Please install it first.[/red]")
-                return False
-
-            try:
-                result = subprocess.run(['brew', 'list'], capture_output=True, text=True, check=True)
-                installed = result.stdout.split()
-            except subprocess.CalledProcessError:
-                installed = []
-
-            to_install = [pkg for pkg in packages if pkg not in installed]
+        configured = packages
+        packages = self.pending_packages(manager, configured)
+        if not packages:
+            self.console.print(f"[green]All {manager} packages unchanged since last run[/green]")
+            return True
 
-            if not to_install:
-                self.console.print("[green]All Homebrew packages already installed[/green]")
-                return True
+        if not self.check_command_exists(backend.executable):
+            self.console.print(f"[red]{backend.title} not found. Please install it first.[/red]")
+            return False
 
-            self.console.print(f"[blue]Installing {len(to_install)} Homebrew packages...[/blue]")
-            for package in to_install:
-                if not self.run_command(['brew', 'install', package], f"brew install {package}"):
-                    return False
+        installed_versions = self.installed_packages(manager) or {}
+        packages = [pkg for pkg in packages if pkg not in installed_versions]
+        if not packages:
+            self.console.print(f"[green]All {manager} packages already installed[/green]")
+            self.remember_packages(manager, configured, installed_versions)
+            return True
 
-        else:  # apt
-            if not self.check_command_exists('apt-get'):
-                self.console.print("[red]apt-get not found. Cannot install packages[/red]")
-                return False
+        availability = self.refresh_package_lists(backend, packages)
+        if availability is None:
+            return False
 
-            self.console.print("[blue]Updating apt package list...[/blue]")
-            if not self.run_command(['apt-get', 'update'], 'apt-get update'):
-                return False
+        valid_packages = [pkg for pkg in packages if availability[pkg].available]
+        missing_packages = [pkg for pkg in packages if not availability[pkg].available]
+        suggestions = self.suggest_packages(backend, missing_packages)
+        for package in missing_packages:
+            hint = format_suggestions(suggestions.get(package, []))
+            fallback = ' Attempting fallback.' if package in backend.fallbacks else ''
+            self.console.print(
+                f"[yellow]⚠️  {manager} package not found: {package}.{fallback}"
+                f"{f' ({hint})' if hint else ''}[/yellow]"
+            )
+            self.record_missing_package(package, suggestions.get(package), manager=manager)
 
-            valid_packages: List[str] = []
-            missing_packages: List[str] = []
-            for package in packages:
-                if self.apt_package_exists(package):
-                    valid_packages.append(package)
-                else:
-                    self.console.print(
-                        f"[yellow]⚠️  apt package not found: {package}. Attempting fallback.[/yellow]"
-                    )
-                    self.record_missing_package(package)
-                    missing_packages.append(package)
-
-            if valid_packages:
-                self.console.print(f"[blue]Installing {len(valid_packages)} apt packages...[/blue]")
-                install_cmd = ['apt-get', 'install', '-y'] + valid_packages
-                if not self.run_command(install_cmd, 'apt-get install'):
-                    return False
-
-            for pkg in missing_packages:
-                if not self.install_fallback(pkg):
-                    return False
-
-            if not valid_packages and not missing_packages:
-                self.console.print("[yellow]No valid apt packages to install[/yellow]")
-                return True
+        installed_now: List[str] = []
+        failed: List[str] = []
+        if valid_packages:
+            self.console.print(f"[blue]Installing {len(valid_packages)} {manager} packages...[/blue]")
+            install_cmd = backend.install_command(valid_packages) + backend.install_options(self.artifacts)
+            with self.scheduler.hold(MANAGER_LOCKS.get(manager)):
+                ok = self.run_command(install_cmd, f"{backend.executable} install", manager=manager)
+            if ok:
+                installed_now = valid_packages
+            else:
+                # Managers like brew install what they can; keep whatever made it.
+                after = self.installed_packages(manager) or {}
+                installed_now = [pkg for pkg in valid_packages if pkg in after]
+                failed = [pkg for pkg in valid_packages if pkg not in after]
+            self.journal.record(manager, installed_now)
 
-        return True
+        fallback_tasks = [
+            InstallTask('fallback', pkg, lambda pkg=pkg: self.install_fallback(pkg, backend),
+                        lock=MANAGER_LOCKS.get(manager) if pkg in backend.fallback_locked else None)
+            for pkg in missing_packages
+            if pkg in backend.fallbacks
+        ]
+        fallback_results = self.scheduler.run(fallback_tasks)
+        failed += [r.package for r in fallback_results if not r.success]
+        if failed:
+            self.console.print(f"[red]❌ Failed to install: {', '.join(failed)}[/red]")
+        self.mark_failed('system', failed + [pkg for pkg in missing_packages if pkg not in backend.fallbacks])
+        installed_by_fallback = [r.package for r in fallback_results if r.success]
+        unchanged = [pkg for pkg in configured if pkg not in packages]
+        self.remember_packages(
+            manager,
+            unchanged + installed_now + installed_by_fallback,
+            {**installed_versions, **{pkg: availability[pkg].version for pkg in installed_now}},
+        )
+        return not failed
     
     def install_pipx_packages(self) -> bool:
         """Install pipx packages from config."""
-        config = self.load_config('pipx.yaml')
-        packages = config.get('packages', [])
+        config = self.load_config()
+        if config is None:
+            return False
+        packages = list(config.pipx)
         
         if not packages:
             self.console.print("[yellow]No pipx packages configured[/yellow]")
             return True
         
+        configured = packages
+        packages = self.pending_packages('pipx', configured)
+        if not packages:
+            self.console.print("[green]All pipx packages unchanged since last run[/green]")
+            return True
+        
         # Check if pipx is available
         if not self.check_command_exists('pipx'):
             self.console.print("[red]pipx not found. Please install it first.[/red]")
             return False
         
         # Get list of already installed packages
-        try:
-            result = subprocess.run(['pipx', 'list'], capture_output=True, text=True, check=True)
-            installed = [line.split()[0] for line in result.stdout.split('\n') if line.strip()]
-        except subprocess.CalledProcessError:
-            installed = []
+        installed = self.installed_packages('pipx')
+        if installed is None:
+            output = self.list_installed(['pipx', 'list']) or ''
+            installed = [line.split()[0] for line in output.split('\n') if line.strip()]
         
         # Install missing packages
         to_install = [pkg for pkg in packages if pkg not in installed]
         
         if not to_install:
             self.console.print("[green]All pipx packages already installed[/green]")
+            self.remember_packages('pipx', configured)
             return True
         
         self.console.print(f"[blue]Installing {len(to_install)} pipx packages...[/blue]")
         
-        for package in to_install:
-            if not self.run_command(['pipx', 'install', package], f"pipx install {package}"):
-                return False
-        
-        return True
+        env = self.artifacts.pip_env() if self.artifacts else None
+        if self.wheelhouse is not None:
+            env = self.build_wheelhouse(to_install, env)
+        # pipx creates its shared pip venv on the first install, and
+        # concurrent first installs race to build it; the others wait.
+        shared = threading.Event()
+        if (pipx_venvs_dir().parent / 'shared').is_dir():
+            shared.set()
+
+        def first(action):
+            def run() -> bool:
+                try:
+                    return action()
+                finally:
+                    shared.set()
+            return run
+
+        def ready(package: str) -> None:
+            self.fetched(f'pipx:{package}')
+            shared.wait()
+
+        tasks = [InstallTask('pipx', to_install[0], first(self._pipx_action(to_install[0], env)),
+                             ready=lambda: self.fetched(f'pipx:{to_install[0]}'))]
+        tasks += [
+            InstallTask('pipx', package, self._pipx_action(package, env),
+                        ready=lambda package=package: ready(package))
+            for package in to_install[1:]
+        ]
+        ok = self._install_and_remember('pipx', configured, tasks)
+        if self.wheelhouse is not None:
+            with self.tracer.span('link duplicate venv files', 'command'):
+                saved = link_duplicate_files(pipx_venvs_dir())
+            if saved:
+                self.console.print(f"[dim]Hard-linked duplicate venv files, {saved / 1e6:.1f} MB freed[/dim]")
+        return ok
+
+    def _pipx_action(self, package: str, env: Dict[str, str] | None):
+        """Return the ``pipx install`` action for ``package``.
+
+        Once the pipeline has downloaded the tool, it is installed without
+        the index, falling back to the network if the cache turns out to be
+        incomplete (e.g. an sdist whose build requirements were not fetched).
+        """
+        install = self._command_action(['pipx', 'install', package], f"pipx install {package}",
+                                       env, manager='pipx', package=package)
+
+        def action() -> bool:
+            if not self.fetched(f'pipx:{package}'):
+                return install()
+            if self.run_command(['pipx', 'install', package], f"pipx install {package} (cached)",
+                                self.artifacts.pip_env(env, offline=True)):
+                self.journal.record('pipx', [package])
+                return True
+            self.console.print(f"[yellow]⚠️  {package} is not fully cached; installing from the index[/yellow]")
+            return install()
+        return action
+
+    def build_wheelhouse(self, packages: List[str], env: Dict[str, str] | None) -> Dict[str, str] | None:
+        """Build wheels for all ``packages`` in one resolve.
+
+        Returns the environment restricting pip to the wheelhouse, or ``env``
+        unchanged if the wheels could not be built together (e.g. the tools
+        pin conflicting versions), in which case pipx resolves each tool alone.
+        """
+        assert self.wheelhouse is not None
+        self.wheelhouse.root.mkdir(parents=True, exist_ok=True)
+        offline = self.artifacts is not None and self.artifacts.offline
+        attempts = [True] if offline else [True, False]
+        for local_only in attempts:
+            cmd = self.wheelhouse.build_command(packages, offline=local_only)
+            description = 'pip wheel (wheelhouse)' if local_only else 'pip wheel'
+            with self.tracer.span(description, 'command', cmd=cmd) as span:
+                result = self.runner.run(cmd, env=env)
+                span.exit_code = result.returncode
+                span.output_bytes = result.output_bytes
+            if result.ok:
+                self.console.print(f"[green]✅ Wheelhouse ready for {len(packages)} pipx packages[/green]")
+                return self.wheelhouse.pip_env(env)
+        self.console.print("[yellow]⚠️  Could not build a shared wheelhouse; installing tools separately[/yellow]")
+        return env
     
     def install_npm_packages(self) -> bool:
         """Install npm global packages from config."""
-        config = self.load_config('npm.yaml')
-        packages = config.get('packages', [])
+        config = self.load_config()
+        if config is None:
+            return False
+        packages = config.npm_specs()
         
         if not packages:
             self.console.print("[yellow]No npm packages configured[/yellow]")
             return True
         
+        configured = packages
+        packages = self.pending_packages('npm', configured)
+        if not packages:
+            self.console.print("[green]All npm packages unchanged since last run[/green]")
+            return True
+        
         # Check if npm is available
         if not self.check_command_exists('npm'):
             self.console.print("[red]npm not found. Please install Node.js first.[/red]")
             return False
         
-        # Get list of already installed packages
-        try:
-            result = subprocess.run(['npm', 'list', '-g', '--depth=0'], capture_output=True, text=True, check=True)
-            installed = []
-            for line in result.stdout.split('\n'):
-                if line.strip() and not line.startswith('/') and not line.startswith('npm'):
-                    # Extract package name from npm list output
-                    parts = line.split()
-                    if parts:
-                        installed.append(parts[0])
-        except subprocess.CalledProcessError:
-            installed = []
+        installed = self.installed_packages('npm')
+        if installed is None:
+            # npm ls exits non-zero for extraneous or invalid packages but still lists them
+            output = self.list_installed(['npm', 'ls', '-g', '--json', '--depth=0'], check=False)
+            installed = parse_ls_json(output or '')
         
-        # Install missing packages
-        to_install = [pkg for pkg in packages if pkg not in installed]
+        # Install missing packages and packages not at their pinned version
+        to_install = [spec for spec in packages if not spec_satisfied(spec, installed)]
         
         if not to_install:
             self.console.print("[green]All npm packages already installed[/green]")
+            self.remember_packages('npm', configured)
             return True
         
         self.console.print(f"[blue]Installing {len(to_install)} npm packages...[/blue]")
@@ -283,11 +799,26 @@ class BootstrapOrchestrator:
         # Skip those downloads in restricted environments.
         env.setdefault('PUPPETEER_SKIP_DOWNLOAD', '1')
 
-        for package in to_install:
-            if not self.run_command(['npm', 'install', '-g', package], f"npm install -g {package}", env=env):
-                return False
-        
-        return True
+        cache_args = self.artifacts.npm_args() if self.artifacts else []
+        # With the pipeline, the packages were installed into a throwaway
+        # prefix in the background and everything is in the npm cache.
+        batch_args = self.artifacts.npm_args(offline=True) if self.fetched('npm') else cache_args
+        # One transaction resolves the shared dependency tree once.
+        if self.run_command(['npm', 'install', '-g', *batch_args, *to_install],
+                            f"npm install -g ({len(to_install)} packages)", env, manager='npm'):
+            self.journal.record('npm', to_install)
+            self.remember_packages('npm', configured)
+            return True
+
+        # Retry one at a time so that a single broken package does not fail the rest.
+        self.console.print("[yellow]⚠️  Batched npm install failed; retrying packages individually[/yellow]")
+        tasks = [
+            InstallTask('npm', package, self._command_action(['npm', 'install', '-g', *cache_args, package],
+                                                             f"npm install -g {package}", env,
+                                                             manager='npm', package=package))
+            for package in to_install
+        ]
+        return self._install_and_remember('npm', configured, tasks)
     
     def setup_direnv(self) -> bool:
         """Setup direnv configuration."""
@@ -310,49 +841,530 @@ class BootstrapOrchestrator:
         
         return True
     
+    def prefetch(self) -> bool:
+        """Download every configured package into the artifact cache.
+
+        Downloads for the different managers run in parallel; nothing is
+        installed except into a throwaway npm prefix.
+        """
+        config = self.load_config()
+        if config is None:
+            return False
+        cache = self.artifacts or ArtifactCache(default_artifact_dir())
+        cache.ensure()
+        self.console.print(f"[bold blue]📦 Prefetching artifacts into {cache.root}[/bold blue]")
+
+        tasks: List[InstallTask] = []
+        temp_dirs: List[Path] = []
+        manager = self.system_manager()
+        backend = self.backend_for(manager)
+        if config.packages and self.check_command_exists(backend.executable):
+            packages = config.system_packages(manager)
+            availability = self.refresh_package_lists(backend, packages)
+            if availability is None:
+                return False
+            found = [pkg for pkg in packages if availability[pkg].available]
+            dest = cache.packages_dir(manager)
+            with self.tracer.span(f"{manager} download plan", 'probe', packages=len(found)):
+                command = backend.download_command(found, dest) if found else None
+            if command:
+                dest.mkdir(parents=True, exist_ok=True)
+                tasks.append(InstallTask(manager, 'packages', self._command_action(
+                    command, f"{' '.join(command[:2])} ({len(found)} packages)", manager=manager, cwd=dest)))
+            for pkg in packages:
+                if not availability[pkg].available and pkg in backend.fallbacks and pkg in FALLBACK_SCRIPTS:
+                    tasks.append(InstallTask('fallback', pkg, lambda pkg=pkg: self.fetch_script(cache, pkg)))
+        if config.pipx:
+            tasks.append(InstallTask('pipx', 'wheels', self._command_action(
+                cache.pip_prefetch_command(list(config.pipx)), 'pip download', manager='pipx')))
+        if config.npm and self.check_command_exists('npm'):
+            prefix = Path(tempfile.mkdtemp(prefix='foundry-npm-'))
+            temp_dirs.append(prefix)
+            env = os.environ.copy()
+            env.setdefault('PUPPETEER_SKIP_DOWNLOAD', '1')
+            tasks.append(InstallTask('npm', 'cache', self._command_action(
+                cache.npm_prefetch_command(config.npm_specs(), prefix), 'npm cache fill', env, manager='npm')))
+
+        try:
+            results = self.scheduler.run(tasks)
+        finally:
+            import shutil
+
+            for directory in temp_dirs:
+                shutil.rmtree(directory, ignore_errors=True)
+        self.print_results(results)
+        return all(result.success for result in results)
+
+    def start_fetches(self) -> None:
+        """Start downloading the pipx tools and npm globals this run will install.
+
+        Only packages that are not installed yet are fetched. npm is fetched
+        only when it is already on PATH, not when the system phase is about
+        to install Node.js.
+        """
+        config = self.load_config()
+        if config is None or self.pipeline is None:
+            return
+        if self.artifacts is None:
+            self.artifacts = ArtifactCache(default_artifact_dir())
+        cache = self.artifacts
+        cache.ensure()
+
+        fetches = []
+        # A wheelhouse already downloads every tool in one resolve.
+        if config.pipx and self.wheelhouse is None and self.check_command_exists('pipx'):
+            installed = self.installed_packages('pipx') or {}
+            for package in self.state.pending('pipx', list(config.pipx)):
+                if package not in installed and package not in self.journal.resumed('pipx'):
+                    fetches.append((f'pipx:{package}', self._command_action(
+                        cache.pip_prefetch_command([package]), f"pip download {package}", manager='pipx')))
+        specs = self.state.pending('npm', config.npm_specs())
+        if specs and self.check_command_exists('npm'):
+            installed = self.installed_packages('npm')
+            if installed is not None:
+                specs = [spec for spec in specs if not spec_satisfied(spec, installed)]
+            if specs:
+                fetches.append(('npm', lambda: self.fetch_npm(cache, specs)))
+        if fetches:
+            self.console.print(f"[dim]Pipelining {len(fetches)} downloads into {cache.root}[/dim]")
+        self.pipeline.start(fetches)
+
+    def fetch_npm(self, cache: ArtifactCache, specs: List[str]) -> bool:
+        """Fill the npm cache by installing ``specs`` into a throwaway prefix."""
+        import shutil
+
+        prefix = Path(tempfile.mkdtemp(prefix='foundry-npm-'))
+        env = os.environ.copy()
+        env.setdefault('PUPPETEER_SKIP_DOWNLOAD', '1')
+        try:
+            return self.run_command(cache.npm_prefetch_command(specs, prefix), 'npm cache fill', env, manager='npm')
+        finally:
+            shutil.rmtree(prefix, ignore_errors=True)
+
+    def fetch_script(self, cache: ArtifactCache, package: str) -> bool:
+        """Download the fallback install script for ``package``."""
+        with self.tracer.span(f"fetch {package} install script", 'command') as span:
+            try:
+                path = cache.fetch_script(package)
+            except OSError as e:
+                span.exit_code = 1
+                self.console.print(f"[red]❌ Failed to fetch {package} install script: {e}[/red]")
+                return False
+            span.exit_code = 0
+            span.output_bytes = path.stat().st_size
+        self.console.print(f"[green]✅ Cached {package} install script[/green]")
+        return True
+
+    def write_config_snapshot(self) -> None:
+        """Refresh the JSON/shell config snapshot read by the bash installers."""
+        config = self.load_config()
+        if config is None:
+            return
+        try:
+            write_snapshot(self.config_dir, config)
+        except OSError as e:
+            self.console.print(f"[yellow]⚠️  Could not write config snapshot: {e}[/yellow]")
+
+    def phase_manager(self, phase: str) -> str | None:
+        """Return the package manager used by ``phase``."""
+        if phase == 'system':
+            return self.system_manager()
+        return phase if phase in UNINSTALL_COMMANDS else None
+
+    def prune_packages(self, manager: str) -> bool:
+        """Uninstall packages dropped from config since the last apply."""
+        config = self.load_config()
+        diff = self.config_diff(manager)
+        if config is None or not diff:
+            return True
+        current = self.config_entries(manager, config)
+        to_remove = diff.to_remove(current)
+        if manager == 'npm':
+            # A changed pin is handled by installing the new version over it.
+            to_remove = [spec for spec in to_remove if split_spec(spec)[0] not in current]
+        if not to_remove:
+            return True
+        self.console.print(f"[blue]Removing {len(to_remove)} {manager} packages dropped from config...[/blue]")
+        command = UNINSTALL_COMMANDS[manager]
+        names = {pkg: split_spec(pkg)[0] if manager == 'npm' else pkg for pkg in to_remove}
+        if manager in UNINSTALL_ONE_AT_A_TIME:
+            tasks = [
+                InstallTask(manager, pkg, self._command_action([*command, names[pkg]], f"{' '.join(command)} {pkg}"))
+                for pkg in to_remove
+            ]
+            removed = [r.package for r in self.scheduler.run(tasks) if r.success]
+        else:
+            ok = self.run_command([*command, *names.values()], ' '.join(command))
+            removed = to_remove if ok else []
+        for pkg in removed:
+            self.state.forget(manager, pkg)
+        return len(removed) == len(to_remove)
+
+    def record_applied(self, phase: str, keep_removed: bool = True) -> None:
+        """Record the config entries ``phase`` applied, minus failed packages.
+
+        Unless ``keep_removed`` is False, entries dropped from config stay in
+        the record because their packages are still installed; a later
+        ``--prune`` run removes them.
+        """
+        manager = self.phase_manager(phase)
+        config = self.load_config()
+        if manager is None or config is None:
+            return
+        with self._failed_lock:
+            failed = self.failed_packages.get(phase, set())
+        if failed is None:
+            return
+        entries = self.config_entries(manager, config)
+        applied = {k: v for k, v in entries.items() if v not in failed}
+        if keep_removed:
+            previous = self.state.applied(manager) or {}
+            applied.update({k: v for k, v in previous.items() if k not in entries})
+        self.state.record_applied(manager, applied)
+
+    def _phase(self, name: str, install):
+        """Wrap an install phase so that it is traced as a single step."""
+        def traced() -> bool:
+            with self.tracer.span(name, 'phase') as span:
+                manager = self.phase_manager(name)
+                pruned = self.prune_packages(manager) if self.prune and manager else True
+                ok = install()
+                span.exit_code = 0 if ok and pruned else 1
+            self.state.record_timing(name, span.duration)
+            if ok:
+                self.record_applied(name, keep_removed=not (self.prune and pruned))
+            else:
+                with self._failed_lock:
+                    self.failed_packages.setdefault(name, None)
+            return ok and pruned
+        return traced
+
+    def _resolve_requirement(self, requirement: str, config: BootstrapConfig) -> str:
+        """Turn a ``requires:`` entry into a ``step`` or ``step:package`` requirement."""
+        if ':' in requirement or requirement in PHASES:
+            return requirement
+        if any(requirement in (p.name, *p.overrides.values()) for p in config.packages):
+            return f"system:{requirement}"
+        for phase in ('pipx', 'npm'):
+            if requirement in getattr(config, phase):
+                return f"{phase}:{requirement}"
+        raise GraphError(f"unknown requirement {requirement!r}")
+
+    def build_graph(self) -> TaskGraph:
+        """Return the dependency graph of the bootstrap steps."""
+        config = self.load_config() or BootstrapConfig()
+        actions = {
+            'system': self.install_system_packages,
+            'pipx': self.install_pipx_packages,
+            'npm': self.install_npm_packages,
+            'direnv': self.setup_direnv,
+        }
+        graph = TaskGraph()
+        for name in PHASES:
+            graph.add(name, self._phase(name, actions[name]), weight=self.state.timing(name) or 1.0)
+        for name in PHASES:
+            for requirement in PHASE_REQUIRES.get(name, []) + list(config.requires.get(name, ())):
+                graph.require(name, self._resolve_requirement(requirement, config))
+        return graph
+
+    def print_plan(self) -> bool:
+        """Print the execution plan without installing anything."""
+        try:
+            graph = self.build_graph()
+            order = graph.topological_order()
+            path, length = graph.critical_path()
+        except GraphError as e:
+            self.console.print(f"[red]Invalid dependency graph: {e}[/red]")
+            return False
+        table = Table(title="Bootstrap plan")
+        table.add_column("Step")
+        table.add_column("Requires")
+        table.add_column("Estimate", justify="right")
+        for name in order:
+            node = graph.nodes[name]
+            estimate = self.state.timing(name)
+            table.add_row(name, ', '.join(str(r) for r in node.requires) or '-',
+                          f"{estimate:.1f}s" if estimate is not None else '-')
+        self.console.print(table)
+        measured = all(self.state.timing(name) is not None for name in order)
+        unit = 's' if measured else ' steps'
+        self.console.print(f"Critical path: {' → '.join(path)} ({length:.1f}{unit})")
+        self.console.print(f"Expected parallelism: {graph.parallelism():.2f}")
+        return True
+
     def run(self) -> bool:
         """Run the complete orchestration process."""
         self.console.print("[bold blue]🔧 foundry-bootstrap orchestrator[/bold blue]")
+        self.write_config_snapshot()
+        resumed = self.journal.begin(self.config_dir, resume=self.resume)
+        if self.resume and not resumed:
+            self.console.print("[yellow]Nothing to resume; running every step[/yellow]")
         
-        success = True
-        
-        # Install system packages
-        if not self.install_system_packages():
-            success = False
-        
-        # Install pipx packages
-        if not self.install_pipx_packages():
-            success = False
-        
-        # Install npm packages
-        if not self.install_npm_packages():
-            success = False
+        try:
+            graph = self.build_graph()
+            graph.topological_order()
+        except GraphError as e:
+            self.console.print(f"[red]Invalid dependency graph: {e}[/red]")
+            return False
+
+        with self.tracer.span('run', 'run'):
+            try:
+                if self.pipeline is not None:
+                    self.start_fetches()
+                results = graph.run(min(self.jobs, len(PHASES)), item_failed=self.package_failed)
+            finally:
+                if self.pipeline is not None:
+                    self.pipeline.close()
+        self.flush_missing_packages()
+        for result in results.values():
+            if result.status == SKIPPED:
+                self.console.print(f"[yellow]⏭️  Skipped {result.name}: {result.reason}[/yellow]")
+            elif result.status == FAILED and result.reason:
+                self.console.print(f"[red]❌ {result.name} failed: {result.reason}[/red]")
+        success = all(result.status not in (FAILED, SKIPPED) for result in results.values())
+        self.state.save()
         
-        # Setup direnv
-        if not self.setup_direnv():
-            success = False
+        self.print_results(self.scheduler.results)
+        self.print_slowest_steps()
+        self.write_trace()
         
         if success:
+            self.journal.clear()
             self.console.print("[bold green]✅ All tools installed successfully![/bold green]")
         else:
             self.console.print("[bold red]❌ Some installations failed[/bold red]")
+            if self.journal.has_progress():
+                self.console.print("[dim]Finished packages are journaled; rerun with --resume to continue[/dim]")
         
         return success
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option('--config-dir', default='../config', help='Path to configuration directory')
-def main(config_dir: str):
+@click.option('--jobs', '-j', default=4, show_default=True, type=click.IntRange(min=1),
+              help='Number of package installs to run in parallel')
+@click.option('--no-state-cache', is_flag=True,
+              help='Ignore the installed-state cache and re-check every package')
+@click.option('--apt-refresh', type=click.Choice(REFRESH_POLICIES), default='auto', show_default=True,
+              help='When to run apt-get update')
+@click.option('--apt-lists-ttl', default=DEFAULT_LISTS_TTL, show_default=True, type=click.IntRange(min=0),
+              help='Age in seconds below which apt package lists count as fresh')
+@click.option('--trace-file', type=click.Path(dir_okay=False, path_type=Path),
+              help='Write per-step timings to this file')
+@click.option('--trace-format', type=click.Choice(TRACE_FORMATS), default='jsonl', show_default=True,
+              help='Trace file format; "chrome" loads in chrome://tracing or Perfetto')
+@click.option('--plan', is_flag=True,
+              help='Print the step graph, critical path and expected parallelism, then exit')
+@click.option('--artifact-dir', envvar='FOUNDRY_ARTIFACT_DIR', type=click.Path(file_okay=False, path_type=Path),
+              help='Install from this prefetched artifact cache before using the network')
+@click.option('--offline', is_flag=True,
+              help='Install only from the artifact cache; never download')
+@click.option('--pipx-wheelhouse', is_flag=True,
+              help='Resolve all pipx tools together into a shared wheelhouse and hard-link duplicate venv files')
+@click.option('--pipeline', 'pipelined', is_flag=True,
+              help='Download pipx tools and npm packages in the background while earlier installs run')
+@click.option('--step-timeout', default=DEFAULT_STEP_TIMEOUT, show_default=True, type=click.IntRange(min=0),
+              help='Seconds after which a single command is killed (0: no limit)')
+@click.option('--timeout', type=click.IntRange(min=1),
+              help='Seconds after which the whole run is stopped')
+@click.option('--incremental', is_flag=True,
+              help='Only install packages added or changed since the last applied config')
+@click.option('--prune', is_flag=True,
+              help='Uninstall packages removed from config since the last applied config')
+@click.option('--resume', is_flag=True,
+              help='Skip packages finished by the previous, interrupted or failed run')
+@click.pass_context
+def main(ctx: click.Context, config_dir: str, jobs: int, no_state_cache: bool, apt_refresh: str,
+         apt_lists_ttl: int, trace_file: Path | None, trace_format: str, plan: bool,
+         artifact_dir: Path | None, offline: bool, pipx_wheelhouse: bool, pipelined: bool, step_timeout: int,
+         timeout: int | None, incremental: bool, prune: bool, resume: bool):
     """foundry-bootstrap orchestrator."""
+    if ctx.invoked_subcommand == 'fleet':
+        # Fleet runs the orchestrator on the targets; nothing is set up locally.
+        return
     config_path = Path(config_dir).resolve()
     
     if not config_path.exists():
         console.print(f"[red]Configuration directory not found: {config_path}[/red]")
         sys.exit(1)
     
-    orchestrator = BootstrapOrchestrator(config_path)
-    success = orchestrator.run()
+    if offline and artifact_dir is None:
+        artifact_dir = default_artifact_dir()
+    artifacts = ArtifactCache(artifact_dir, offline=offline) if artifact_dir else None
+    if offline and apt_refresh == 'auto':
+        apt_refresh = 'never'
+
+    wheelhouse = None
+    if pipx_wheelhouse:
+        wheelhouse = Wheelhouse(artifacts.wheels_dir if artifacts else None)
+
+    # Offline runs have nothing to download.
+    pipeline = FetchPipeline() if pipelined and not offline else None
+
+    state = StateCache() if no_state_cache else StateCache.default()
+    orchestrator = BootstrapOrchestrator(config_path, jobs=jobs, state=state,
+                                         apt_refresh=apt_refresh, apt_lists_ttl=apt_lists_ttl,
+                                         trace_file=trace_file, trace_format=trace_format,
+                                         artifacts=artifacts, incremental=incremental, prune=prune,
+                                         wheelhouse=wheelhouse,
+                                         runner=CommandRunner(step_timeout or None, timeout),
+                                         journal=Journal.default(), resume=resume, pipeline=pipeline)
+
+    def interrupt(signum, frame):
+        # Commands run in their own process groups and do not see Ctrl-C.
+        orchestrator.runner.cancel()
+        signal.default_int_handler(signum, frame)
+
+    signal.signal(signal.SIGINT, interrupt)
+    if ctx.invoked_subcommand is not None:
+        ctx.obj = orchestrator
+        return
+    success = orchestrator.print_plan() if plan else orchestrator.run()
     
     sys.exit(0 if success else 1)
 
+
+@main.command()
+@click.pass_obj
+def prefetch(orchestrator: BootstrapOrchestrator):
+    """Download .debs, wheels, npm packages and install scripts into the artifact cache."""
+    success = orchestrator.prefetch()
+    orchestrator.write_trace()
+    sys.exit(0 if success else 1)
+
+
+@main.command(context_settings={'ignore_unknown_options': True})
+@click.argument('inventory', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--parallel', '-p', default=4, show_default=True, type=click.IntRange(min=1),
+              help='Number of hosts to bootstrap at the same time')
+@click.option('--policy', type=click.Choice(FAIL_POLICIES), default='continue', show_default=True,
+              help='Whether to start remaining hosts after a host fails')
+@click.option('--quiet', '-q', is_flag=True, help='Only print the summary, not the per-host output')
+@click.argument('orchestrator_args', nargs=-1, type=click.UNPROCESSED)
+def fleet(inventory: Path, parallel: int, policy: str, quiet: bool, orchestrator_args: tuple):
+    """Run the orchestrator on every host of INVENTORY.
+
+    Arguments after the inventory (e.g. ``-- --apt-refresh never``) are
+    passed to the orchestrator on each host.
+    """
+    try:
+        hosts = load_inventory(inventory)
+    except ConfigError as e:
+        console.print(f"[red]Invalid inventory: {e}[/red]")
+        sys.exit(1)
+
+    done: List[HostResult] = []
+    lock = threading.Lock()
+
+    def on_line(host: str, line: str) -> None:
+        if not quiet:
+            console.print(f"[cyan]{host}[/cyan] │ {escape(line)}", highlight=False)
+
+    def on_done(result: HostResult) -> None:
+        with lock:
+            done.append(result)
+            count = len(done)
+        colour = {'ok': 'green', 'failed': 'red'}.get(result.status, 'yellow')
+        console.print(f"[{colour}]{result.name}: {result.status}[/{colour}] "
+                      f"[dim]({count}/{len(hosts)}, {result.duration:.1f}s)[/dim]")
+
+    console.print(f"[bold blue]🔧 Bootstrapping {len(hosts)} hosts, {parallel} at a time[/bold blue]")
+    runner = FleetRunner(parallel=parallel, policy=policy)
+    results = runner.run(hosts, list(orchestrator_args), on_line=on_line, on_done=on_done)
+
+    table = Table(title="Fleet results")
+    table.add_column("Host")
+    table.add_column("Status")
+    table.add_column("Exit", justify="right")
+    table.add_column("Time", justify="right")
+    for result in results:
+        status = {'ok': "[green]ok[/green]", 'failed': "[red]failed[/red]"}.get(result.status, "[yellow]skipped[/yellow]")
+        exit_code = '' if result.exit_code is None else str(result.exit_code)
+        table.add_row(result.name, status, exit_code, f"{result.duration:.1f}s")
+    console.print(table)
+    for result in results:
+        if result.status == 'failed' and quiet and result.tail:
+            console.print(f"[red]{result.name} output (last {len(result.tail)} lines):[/red]")
+            console.print('\n'.join(result.tail), markup=False, highlight=False)
+    sys.exit(0 if all(r.status == 'ok' for r in results) else 1)
+
+@main.group()
+def snapshot():
+    """Export or import a provisioned environment as one archive."""
+
+
+@snapshot.command('export')
+@click.option('--output', '-o', 'output_dir', default='.', show_default=True,
+              type=click.Path(file_okay=False, path_type=Path), help='Directory to write the archive to')
+@click.pass_obj
+def snapshot_export(orchestrator: BootstrapOrchestrator, output_dir: Path):
+    """Pack the pyenv Python, pipx venvs, npm globals and an apt manifest."""
+    from orchestrate.envsnapshot import SnapshotError, export_snapshot
+
+    config = orchestrator.load_config()
+    if config is None:
+        sys.exit(1)
+    try:
+        archive, manifest = export_snapshot(config, output_dir)
+    except (OSError, SnapshotError) as e:
+        console.print(f"[red]❌ Snapshot export failed: {e}[/red]")
+        sys.exit(1)
+    for kind, names in manifest['missing'].items():
+        console.print(f"[yellow]⚠️  Not installed, left out: {kind}: {', '.join(names)}[/yellow]")
+    size = archive.stat().st_size / 1e6
+    console.print(f"[green]✅ Wrote {archive} ({len(manifest['trees'])} trees, {size:.1f} MB)[/green]")
+
+
+@snapshot.command('import')
+@click.argument('archive', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--force', is_flag=True, help='Replace trees that already exist')
+@click.pass_obj
+def snapshot_import(orchestrator: BootstrapOrchestrator, archive: Path, force: bool):
+    """Restore ARCHIVE and report what the config still needs."""
+    from orchestrate.envsnapshot import SnapshotError, import_snapshot
+
+    config = orchestrator.load_config()
+    if config is None:
+        sys.exit(1)
+    try:
+        report = import_snapshot(archive, config, force=force)
+    except (OSError, SnapshotError) as e:
+        console.print(f"[red]❌ Snapshot import failed: {e}[/red]")
+        sys.exit(1)
+    for old, new in report.relocated:
+        console.print(f"[dim]Relocated {old} → {new}[/dim]")
+    for tree in report.skipped:
+        console.print(f"[yellow]⏭️  Skipped {tree}[/yellow]")
+    console.print(f"[green]✅ Restored {len(report.restored)} trees from {archive.name}[/green]")
+    if orchestrator.check_command_exists('pyenv'):
+        orchestrator.run_command(['pyenv', 'rehash'], 'pyenv rehash')
+    for problem in report.problems:
+        console.print(f"[red]❌ {problem}[/red]")
+    for kind, names in report.missing.items():
+        console.print(f"[yellow]Still missing for {kind}: {', '.join(names)}[/yellow]")
+    if report.missing:
+        console.print("[dim]Run the orchestrator to install the rest.[/dim]")
+    sys.exit(1 if report.problems else 0)
+
+
+@main.command()
+@click.option('--json', 'as_json', is_flag=True, help='Print the status as JSON')
+@click.pass_obj
+def status(orchestrator: BootstrapOrchestrator, as_json: bool):
+    """Show configured vs. recorded packages per manager."""
+    from orchestrate import fast
+
+    config = orchestrator.load_config()
+    sys.exit(1 if config is None else fast.status(config, orchestrator.state, as_json=as_json))
+
+
+@main.command()
+@click.pass_obj
+def check(orchestrator: BootstrapOrchestrator):
+    """Exit 0 if a run would have nothing to do, 1 otherwise."""
+    from orchestrate import fast
+
+    config = orchestrator.load_config()
+    sys.exit(1 if config is None else fast.check(config, orchestrator.state))
+
 if __name__ == '__main__':
     main() 
\ No newline at end of file
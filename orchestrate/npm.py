@@ -0,0 +1,56 @@
+"""Helpers for npm global packages.
+
+Packages in ``config/npm.yaml`` may carry a version: ``prettier@3.3.3``,
+``"@scope/tool@^2"`` or ``{name: prettier, version: 3.3.3}``. Installed
+packages are read from ``npm ls -g --json`` rather than the text tree.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Dict, Optional, Tuple
+
+# A fully specified version; anything else (ranges, dist-tags) is a pin npm
+# has to resolve.
+_EXACT_VERSION = re.compile(r'^v?\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.-]+)?$')
+
+
+def split_spec(spec: str) -> Tuple[str, Optional[str]]:
+    """Split ``name@version`` into name and version, handling scoped names."""
+    at = spec.rfind('@')
+    if at <= 0:
+        return spec, None
+    return spec[:at], spec[at + 1:] or None
+
+
+def join_spec(name: str, version: Optional[str]) -> str:
+    return f"{name}@{version}" if version else name
+
+
+def parse_ls_json(output: str) -> Dict[str, str]:
+    """Return name → version from ``npm ls -g --json --depth=0`` output."""
+    try:
+        document = json.loads(output or '{}')
+    except ValueError:
+        return {}
+    dependencies = document.get('dependencies') or {}
+    return {
+        name: str(info.get('version') or '')
+        for name, info in dependencies.items()
+        if isinstance(info, dict) and not info.get('missing')
+    }
+
+
+def spec_satisfied(spec: str, installed: Dict[str, str]) -> bool:
+    """Return True if ``spec`` is installed.
+
+    Exact versions must match; ranges and dist-tags only require the package
+    to be present, since evaluating them needs npm's semver implementation.
+    """
+    name, version = split_spec(spec)
+    if name not in installed:
+        return False
+    if version and _EXACT_VERSION.match(version):
+        return installed[name] == version.lstrip('v')
+    return True
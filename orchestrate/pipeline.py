@@ -0,0 +1,112 @@
+"""Downloads run ahead of the installs that need them.
+
+Installing is mostly unpacking and configuring: while ``apt-get install``
+spends its time in dpkg and ``pipx install`` builds venvs, the network sits
+idle. With ``--pipeline`` the orchestrator queues one download per upcoming
+install into a :class:`FetchPipeline` when the run starts:
+
+    pipx:<tool>   pip download of the tool and its dependencies
+    npm           every npm global, installed into a throwaway prefix so the
+                  npm cache holds their whole dependency trees
+
+A few worker threads take fetches off a bounded queue in install order. An
+install waits only for its own fetch, then installs from the artifact cache
+without touching the network. Fetches that fail leave the install to
+download as usual.
+
+apt has no fetch unit: ``apt-get install`` already downloads every archive
+before dpkg starts, and a download needs the lists the system phase
+refreshes. The overlap comes from the other managers downloading while dpkg
+runs.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Downloads running at the same time.
+DEFAULT_FETCH_WORKERS = 2
+
+# Fetches waiting for a worker; the feeder blocks while the queue is full.
+DEFAULT_QUEUE_DEPTH = 4
+
+Fetch = Tuple[str, Callable[[], bool]]
+
+
+class FetchPipeline:
+    """Run fetches in the background and let installs wait for them by key."""
+
+    def __init__(self, workers: int = DEFAULT_FETCH_WORKERS, depth: int = DEFAULT_QUEUE_DEPTH):
+        self.workers = max(1, workers)
+        self._queue: 'queue.Queue[Optional[Fetch]]' = queue.Queue(maxsize=max(1, depth))
+        self._done: Dict[str, threading.Event] = {}
+        self._results: Dict[str, bool] = {}
+        self._guard = threading.Lock()
+        self._closed = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self, fetches: List[Fetch]) -> None:
+        """Queue ``fetches`` in order and start the workers."""
+        with self._guard:
+            for key, _ in fetches:
+                self._done.setdefault(key, threading.Event())
+        feeder = threading.Thread(target=self._feed, args=(fetches,), name='fetch-feeder', daemon=True)
+        self._threads.append(feeder)
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._work, name=f'fetch-{i}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _feed(self, fetches: List[Fetch]) -> None:
+        for key, fetch in fetches:
+            while True:
+                if self._closed.is_set():
+                    self._finish(key, False)
+                    break
+                try:
+                    self._queue.put((key, fetch), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        for _ in range(self.workers):
+            self._queue.put(None)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            key, fetch = item
+            ok = False
+            if not self._closed.is_set():
+                try:
+                    ok = bool(fetch())
+                except Exception:
+                    ok = False
+            self._finish(key, ok)
+
+    def _finish(self, key: str, ok: bool) -> None:
+        with self._guard:
+            self._results[key] = ok
+            event = self._done.setdefault(key, threading.Event())
+        event.set()
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> bool:
+        """Block until the fetch for ``key`` ends; return whether it succeeded.
+
+        Keys that were never queued return False at once.
+        """
+        with self._guard:
+            event = self._done.get(key)
+        if event is None or not event.wait(timeout):
+            return False
+        return self._results.get(key, False)
+
+    def close(self) -> None:
+        """Skip fetches that have not started and release installs waiting on them.
+
+        Fetches already running are left to finish in the background.
+        """
+        self._closed.set()
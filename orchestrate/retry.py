@@ -0,0 +1,122 @@
+"""Retry policies and mirror failover for package manager commands.
+
+Installs whose output shows a network error are retried with exponential
+backoff; other failures (an unknown package, a dependency conflict) would
+fail the same way again and are not. Each attempt may use the next mirror
+from ``config/network.yaml``:
+
+    pipx   PIP_INDEX_URL
+    npm    --registry
+    brew   HOMEBREW_BOTTLE_DOMAIN
+
+apt is not listed; it fails over by itself with a ``mirror+file:`` source,
+as dnf, apk and pacman do with their own mirror lists.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from orchestrate.runner import CommandResult
+
+# Managers whose installs may be retried; ``fallback`` covers the upstream
+# install scripts used for apt packages without a candidate.
+RETRY_MANAGERS = ('apt', 'brew', 'dnf', 'apk', 'pacman', 'pipx', 'npm', 'fallback')
+
+# Managers that can be pointed at a mirror.
+MIRROR_MANAGERS = ('brew', 'pipx', 'npm')
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """How often and how patiently to retry a failed command.
+
+    ``delay`` is the wait before the second attempt; every further wait is
+    ``backoff`` times longer, up to ``max_delay``. ``jitter`` adds up to that
+    share of random extra wait so fleet hosts do not retry in lockstep.
+    """
+
+    attempts: int = 3
+    delay: float = 2.0
+    backoff: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.1
+
+    def wait_before(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """Return the seconds to wait before ``attempt`` (2 for the first retry)."""
+        base = min(self.max_delay, self.delay * self.backoff ** max(0, attempt - 2))
+        return base * (1 + self.jitter * (rng or random).random())
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+DEFAULT_RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    'apt': RetryPolicy(attempts=3, delay=5.0),
+    'brew': RetryPolicy(attempts=3, delay=5.0),
+    'dnf': RetryPolicy(attempts=3, delay=5.0),
+    'apk': RetryPolicy(attempts=3, delay=5.0),
+    'pacman': RetryPolicy(attempts=3, delay=5.0),
+    'pipx': RetryPolicy(attempts=3, delay=2.0),
+    'npm': RetryPolicy(attempts=3, delay=2.0),
+    'fallback': RetryPolicy(attempts=2, delay=5.0),
+}
+
+
+# Output of failed downloads that every manager passes through from curl,
+# libc or the kernel.
+NETWORK_ERRORS = (
+    r'temporary failure (in name resolution|resolving)',
+    r'could not resolve host',
+    r'connection (timed out|reset|refused)',
+    r'network is unreachable',
+    r'curl: \((6|7|18|28|35|52|56)\)',
+)
+
+# Per-manager output that means a download failed, not the install itself.
+TRANSIENT_ERRORS: Dict[str, Tuple[str, ...]] = {
+    'apt': (r'failed to fetch', r'unable to fetch some archives', r'hash sum mismatch',
+            r'could not get lock'),
+    'brew': (r'failed to download', r'download failed'),
+    'dnf': (r'cannot download', r'curl error', r'failed to download metadata', r'cannot retrieve'),
+    'apk': (r'temporary error', r'network error', r'could not connect'),
+    'pacman': (r'failed retrieving file', r'failed to synchronize'),
+    'pipx': (r'connectionerror', r'readtimeouterror', r'newconnectionerror', r'connection broken',
+             r'max retries exceeded', r'http error 5\d\d', r'503 service unavailable'),
+    'npm': (r'\b(etimedout|econnreset|econnrefused|eai_again|esockettimedout)\b',
+            r'npm err! code e(5\d\d|429)', r'network request .* failed'),
+    'fallback': (),
+}
+
+_TRANSIENT_PATTERNS: Dict[str, re.Pattern] = {
+    manager: re.compile('|'.join((*NETWORK_ERRORS, *patterns)), re.IGNORECASE)
+    for manager, patterns in TRANSIENT_ERRORS.items()
+}
+
+
+def retryable(result: CommandResult, manager: Optional[str] = None) -> bool:
+    """Return True if ``result`` failed in a way another attempt may fix.
+
+    Only failures whose output shows a network error for ``manager`` are
+    retried. Timeouts are not: the step timeout already allowed a long wait.
+    """
+    if result.ok or result.timed_out or result.cancelled:
+        return False
+    pattern = _TRANSIENT_PATTERNS.get(manager or '')
+    return pattern is not None and any(pattern.search(line) for line in result.lines)
+
+
+def with_mirror(manager: str, mirror: Optional[str], cmd: List[str],
+                env: Optional[Dict[str, str]] = None) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    """Return ``cmd`` and ``env`` pointed at ``mirror``."""
+    if mirror is None or manager not in MIRROR_MANAGERS:
+        return cmd, env
+    if manager == 'npm':
+        return [*cmd, '--registry', mirror], env
+    env = dict(os.environ if env is None else env)
+    env['PIP_INDEX_URL' if manager == 'pipx' else 'HOMEBREW_BOTTLE_DOMAIN'] = mirror
+    return cmd, env
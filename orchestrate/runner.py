@@ -0,0 +1,199 @@
+"""Streaming command runner.
+
+Commands run under asyncio with stdout and stderr merged and read line by
+line. Lines go to an optional callback as they arrive and into a bounded
+ring buffer, so a long ``apt-get install`` neither sits in memory whole nor
+stays silent until it exits.
+
+Each command runs in its own process group. On a per-step timeout, when the
+global deadline passes or on :meth:`CommandRunner.cancel`, the whole group
+gets SIGTERM and then SIGKILL, which also stops pipelines like
+``curl | bash``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import os
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+# Lines of output kept per command.
+DEFAULT_BUFFER_LINES = 200
+
+READ_CHUNK = 64 * 1024
+
+# Seconds between SIGTERM and SIGKILL.
+KILL_GRACE = 5.0
+
+# Exit codes reported for commands that did not exit on their own.
+EXIT_NOT_FOUND = 127
+EXIT_CANNOT_RUN = 126
+EXIT_TIMEOUT = 124
+EXIT_CANCELLED = 130
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a command run by :class:`CommandRunner`."""
+
+    returncode: int
+    lines: List[str] = field(default_factory=list)
+    output_bytes: int = 0
+    duration: float = 0.0
+    timed_out: bool = False
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    def tail(self, count: int = 20) -> str:
+        return '\n'.join(self.lines[-count:])
+
+
+class CommandRunner:
+    """Runs commands with streamed output, timeouts and cancellation.
+
+    ``step_timeout`` bounds each command; ``deadline`` is a total budget in
+    seconds counted from construction. Both may be None. :meth:`run` may be
+    called from several threads at once.
+    """
+
+    def __init__(self, step_timeout: Optional[float] = None, deadline: Optional[float] = None,
+                 buffer_lines: int = DEFAULT_BUFFER_LINES):
+        self.step_timeout = step_timeout
+        self.deadline_at = time.monotonic() + deadline if deadline is not None else None
+        self.buffer_lines = buffer_lines
+        self._groups: Set[int] = set()
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def timeout_for(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Return the time a command started now may take."""
+        limit = timeout if timeout is not None else self.step_timeout
+        if self.deadline_at is not None:
+            remaining = max(0.0, self.deadline_at - time.monotonic())
+            limit = remaining if limit is None else min(limit, remaining)
+        return limit
+
+    def run(self, cmd: List[str], env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            on_line: Optional[Callable[[str], None]] = None, cwd: Optional[str] = None) -> CommandResult:
+        """Run ``cmd`` to completion in a private event loop."""
+        return asyncio.run(self.run_async(cmd, env, timeout, on_line, cwd))
+
+    def run_many(self, cmds: List[List[str]], env: Optional[Dict[str, str]] = None,
+                 timeout: Optional[float] = None) -> List[CommandResult]:
+        """Run several commands concurrently and return results in order."""
+        async def gather() -> List[CommandResult]:
+            return list(await asyncio.gather(*(self.run_async(cmd, env, timeout) for cmd in cmds)))
+        return asyncio.run(gather())
+
+    async def run_async(self, cmd: List[str], env: Optional[Dict[str, str]] = None,
+                        timeout: Optional[float] = None, on_line: Optional[Callable[[str], None]] = None,
+                        cwd: Optional[str] = None) -> CommandResult:
+        start = time.monotonic()
+        if self._cancelled.is_set():
+            return CommandResult(EXIT_CANCELLED, ['cancelled before start'], cancelled=True)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL, env=env, cwd=cwd, start_new_session=True,
+            )
+        except OSError as e:
+            # Like the shell: 127 for a missing command, 126 when it cannot
+            # be started (not executable, or a bad working directory).
+            if e.errno == errno.ENOENT and e.filename != cwd:
+                return CommandResult(EXIT_NOT_FOUND, [f"{cmd[0]}: command not found"])
+            return CommandResult(EXIT_CANNOT_RUN, [f"{cmd[0]}: {e}"])
+        with self._lock:
+            self._groups.add(proc.pid)
+
+        lines: Deque[str] = deque(maxlen=self.buffer_lines)
+        size = 0
+
+        def emit(raw: bytes) -> None:
+            line = raw.decode(errors='replace')
+            lines.append(line)
+            if on_line:
+                on_line(line)
+
+        async def pump() -> None:
+            # Read chunks rather than lines: progress bars redraw with bare
+            # carriage returns and would otherwise form one unbounded line.
+            nonlocal size
+            assert proc.stdout is not None
+            pending = b''
+            while True:
+                chunk = await proc.stdout.read(READ_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                parts = (pending + chunk).replace(b'\r\n', b'\n').replace(b'\r', b'\n').split(b'\n')
+                pending = parts.pop()
+                for raw in parts:
+                    emit(raw)
+                if len(pending) > READ_CHUNK:
+                    emit(pending)
+                    pending = b''
+            if pending:
+                emit(pending)
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(asyncio.gather(pump(), proc.wait()), self.timeout_for(timeout))
+        except asyncio.TimeoutError:
+            timed_out = True
+            await self._terminate(proc)
+        finally:
+            with self._lock:
+                self._groups.discard(proc.pid)
+
+        cancelled = self._cancelled.is_set() and proc.returncode != 0
+        returncode = proc.returncode if proc.returncode is not None else -signal.SIGKILL
+        if timed_out:
+            lines.append(f"timed out after {time.monotonic() - start:.0f}s")
+            returncode = EXIT_TIMEOUT
+        elif cancelled:
+            returncode = EXIT_CANCELLED
+        return CommandResult(returncode, list(lines), size, time.monotonic() - start, timed_out, cancelled)
+
+    async def _terminate(self, proc: asyncio.subprocess.Process) -> None:
+        """Stop the process group of ``proc``, escalating to SIGKILL."""
+        _signal_group(proc.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(proc.wait(), KILL_GRACE)
+        except asyncio.TimeoutError:
+            _signal_group(proc.pid, signal.SIGKILL)
+            await proc.wait()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep between attempts; return False if cancelled or out of time."""
+        limit = self.timeout_for(seconds)
+        if self._cancelled.wait(limit):
+            return False
+        return limit is not None and limit >= seconds
+
+    def cancel(self) -> None:
+        """Kill every running command and refuse to start new ones."""
+        self._cancelled.set()
+        with self._lock:
+            groups = list(self._groups)
+        for pgid in groups:
+            _signal_group(pgid, signal.SIGTERM)
+        if groups:
+            timer = threading.Timer(KILL_GRACE, lambda: [_signal_group(g, signal.SIGKILL) for g in groups])
+            timer.daemon = True
+            timer.start()
+
+
+def _signal_group(pgid: int, sig: int) -> None:
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
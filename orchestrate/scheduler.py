@@ -0,0 +1,112 @@
+"""Worker-pool scheduler for independent package installs.
+
+Installs handed to the scheduler run concurrently on a bounded pool of worker
+threads. Tasks that share a manager lock (for example every apt/dpkg
+transaction) are serialized against each other while unrelated installs keep
+running.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Managers that hold a system-wide lock while installing. Tasks mapped to the
+# same lock name never run at the same time.
+MANAGER_LOCKS: Dict[str, str] = {
+    "apt": "dpkg",
+    "dnf": "rpm",
+    "apk": "apk",
+    "pacman": "pacman",
+    # brew takes a per-formula lock and fails a second install that needs
+    # the same dependency instead of waiting for it.
+    "brew": "brew",
+}
+
+
+@dataclass
+class InstallTask:
+    """A single unit of install work."""
+
+    manager: str
+    package: str
+    action: Callable[[], bool]
+    lock: Optional[str] = None
+    # Called before the task takes a lock or worker slot, e.g. to wait for
+    # its download, so that waiting does not block other installs.
+    ready: Optional[Callable[[], object]] = None
+
+    def __post_init__(self) -> None:
+        if self.lock is None:
+            self.lock = MANAGER_LOCKS.get(self.manager)
+
+
+@dataclass
+class InstallResult:
+    """Outcome of an :class:`InstallTask`."""
+
+    manager: str
+    package: str
+    success: bool
+    duration: float
+
+
+class InstallScheduler:
+    """Run install tasks on a shared pool of at most ``jobs`` workers."""
+
+    def __init__(self, jobs: int = 1):
+        self.jobs = max(1, jobs)
+        self.results: List[InstallResult] = []
+        self._slots = threading.BoundedSemaphore(self.jobs)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    @contextmanager
+    def hold(self, name: Optional[str]) -> Iterator[None]:
+        """Hold lock ``name`` outside a task, e.g. for a batch install."""
+        if name is None:
+            yield
+            return
+        with self._lock(name):
+            yield
+
+    def _execute(self, task: InstallTask) -> InstallResult:
+        if task.ready is not None:
+            task.ready()
+        lock = self._lock(task.lock) if task.lock else None
+        # Take the manager lock before a worker slot so a task waiting on dpkg
+        # does not keep an unrelated install from running.
+        if lock:
+            lock.acquire()
+        try:
+            with self._slots:
+                start = time.monotonic()
+                try:
+                    success = bool(task.action())
+                except Exception:
+                    success = False
+                duration = time.monotonic() - start
+        finally:
+            if lock:
+                lock.release()
+        result = InstallResult(task.manager, task.package, success, duration)
+        with self._guard:
+            self.results.append(result)
+        return result
+
+    def run(self, tasks: List[InstallTask]) -> List[InstallResult]:
+        """Run ``tasks`` concurrently and return their results in task order."""
+        if not tasks:
+            return []
+        if self.jobs == 1 or len(tasks) == 1:
+            return [self._execute(task) for task in tasks]
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(tasks))) as pool:
+            return list(pool.map(self._execute, tasks))
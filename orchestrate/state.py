@@ -0,0 +1,244 @@
+"""Persistent record of what previous runs installed.
+
+Each installed package is stored with a fingerprint of its config entry and
+of the package manager's on-disk state. When neither changed since the last
+run the package is known to be installed and no subprocess needs to run for
+it. Manager state is sampled with ``stat`` calls only, never by spawning the
+manager itself.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+STATE_VERSION = 1
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, honouring ``XDG_CACHE_HOME``."""
+    base = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / '.cache')
+    return Path(base) / 'foundry-bootstrap'
+
+
+def fingerprint(*parts: Any) -> str:
+    """Return a stable hash of JSON-serialisable ``parts``."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _stat_stamp(paths: List[Path]) -> str:
+    stamps = []
+    for path in paths:
+        try:
+            st = path.stat()
+            stamps.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            stamps.append(f"{path}:-")
+    return ';'.join(stamps)
+
+
+def pipx_venvs_dir() -> Path:
+    """Return the pipx venv directory for the current user."""
+    if os.environ.get('PIPX_HOME'):
+        return Path(os.environ['PIPX_HOME']) / 'venvs'
+    legacy = Path.home() / '.local' / 'pipx' / 'venvs'
+    if legacy.exists():
+        return legacy
+    return Path.home() / '.local' / 'share' / 'pipx' / 'venvs'
+
+
+def _npm_env(key: str) -> Optional[str]:
+    """Return npm config ``key`` from the environment; npm accepts either case."""
+    return os.environ.get(f'NPM_CONFIG_{key.upper()}') or os.environ.get(f'npm_config_{key}') or None
+
+
+def npmrc_value(path: Path, key: str) -> Optional[str]:
+    """Return ``key`` from an npmrc file, with ``~`` and ``${VAR}`` expanded."""
+    try:
+        lines = path.read_text(errors='replace').splitlines()
+    except OSError:
+        return None
+    value = None
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        name, sep, rest = line.partition('=')
+        if sep and name.strip() == key:
+            value = rest.strip().strip('"\'')
+    if not value:
+        return None
+    return os.path.expanduser(re.sub(r'\$\{(\w+)\}', lambda m: os.environ.get(m.group(1), ''), value))
+
+
+def _resolved_executable(name: str) -> Optional[Path]:
+    found = shutil.which(name)
+    return Path(found).resolve() if found else None
+
+
+def npm_global_prefix() -> Optional[Path]:
+    """Return the npm global prefix without running npm.
+
+    Follows npm's own lookup: the ``npm_config_prefix`` environment
+    variable, then ``prefix`` in the user npmrc, the global
+    ``<prefix>/etc/npmrc`` and npm's builtin ``npmrc``, then the default
+    of two levels above the real ``node`` binary. Symlinks are resolved
+    first, so nvm's per-version directories are found. Shims that are not
+    symlinks (volta, asdf) give a prefix without ``lib/node_modules``, and
+    callers fall back to asking npm.
+    """
+    prefix = _npm_env('prefix')
+    if prefix:
+        return Path(os.path.expanduser(prefix))
+    userconfig = Path(os.path.expanduser(_npm_env('userconfig') or '~/.npmrc'))
+    prefix = npmrc_value(userconfig, 'prefix')
+    if prefix:
+        return Path(prefix)
+
+    node = _resolved_executable('node')
+    npm = _resolved_executable('npm')
+    if node is not None:
+        default = node.parent.parent
+    elif npm is not None:
+        # <prefix>/bin/npm links to <prefix>/lib/node_modules/npm/bin/npm-cli.js
+        default = next((p.parent.parent for p in npm.parents
+                        if p.name == 'node_modules' and p.parent.name == 'lib'), npm.parent.parent)
+    else:
+        return None
+    globalconfig = Path(_npm_env('globalconfig') or default / 'etc' / 'npmrc')
+    prefix = npmrc_value(globalconfig, 'prefix')
+    if prefix is None and npm is not None and npm.parent.name == 'bin':
+        # Distribution packages set the prefix in npm's builtin config,
+        # e.g. Debian's /usr/share/nodejs/npm/npmrc points at /usr/local.
+        prefix = npmrc_value(npm.parent.parent / 'npmrc', 'prefix')
+    return Path(prefix) if prefix else default
+
+
+def npm_global_modules() -> Optional[Path]:
+    """Return the ``node_modules`` directory holding npm global packages."""
+    prefix = npm_global_prefix()
+    if prefix is None:
+        return None
+    return prefix / 'lib' / 'node_modules'
+
+
+def brew_cellar() -> Optional[Path]:
+    """Return the Homebrew Cellar directory without running brew."""
+    brew = shutil.which('brew')
+    if not brew:
+        return None
+    return Path(brew).parent.parent / 'Cellar'
+
+
+def manager_stamp(manager: str) -> str:
+    """Return a cheap stamp that changes whenever ``manager`` installs anything."""
+    if manager == 'apt':
+        return _stat_stamp([Path('/var/lib/dpkg/status')])
+    if manager == 'pipx':
+        return _stat_stamp([pipx_venvs_dir()])
+    if manager == 'npm':
+        modules = npm_global_modules()
+        return _stat_stamp([modules]) if modules else '-'
+    if manager == 'brew':
+        cellar = brew_cellar()
+        return _stat_stamp([cellar]) if cellar else '-'
+    if manager == 'dnf':
+        return _stat_stamp([Path('/var/lib/rpm/rpmdb.sqlite'), Path('/var/lib/rpm/Packages')])
+    if manager == 'apk':
+        return _stat_stamp([Path('/lib/apk/db/installed')])
+    if manager == 'pacman':
+        return _stat_stamp([Path('/var/lib/pacman/local')])
+    return '-'
+
+
+class StateCache:
+    """JSON-backed record of installed packages keyed by manager.
+
+    A cache created without a path keeps its state in memory only.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {'version': STATE_VERSION, 'managers': {}}
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text())
+                if data.get('version') == STATE_VERSION:
+                    self._data = data
+            except (OSError, ValueError):
+                pass
+
+    @classmethod
+    def default(cls) -> 'StateCache':
+        return cls(default_cache_dir() / 'state.json')
+
+    def packages(self, manager: str) -> Dict[str, Dict[str, Any]]:
+        """Return the recorded packages for ``manager``."""
+        with self._lock:
+            return dict(self._data['managers'].get(manager, {}))
+
+    def is_current(self, manager: str, package: str, fp: str) -> bool:
+        """Return True if ``package`` was recorded with fingerprint ``fp``."""
+        with self._lock:
+            entry = self._data['managers'].get(manager, {}).get(package)
+        return bool(entry) and entry.get('fingerprint') == fp
+
+    def pending(self, manager: str, packages: List[str]) -> List[str]:
+        """Return ``packages`` not recorded under the manager's current state."""
+        stamp = manager_stamp(manager)
+        return [pkg for pkg in packages if not self.is_current(manager, pkg, fingerprint(manager, pkg, stamp))]
+
+    def record(self, manager: str, package: str, fp: str, version: Optional[str] = None) -> None:
+        """Record ``package`` as installed with the given fingerprint."""
+        with self._lock:
+            entries = self._data['managers'].setdefault(manager, {})
+            previous = entries.get(package, {})
+            entries[package] = {
+                'fingerprint': fp,
+                'version': version or previous.get('version'),
+            }
+
+    def forget(self, manager: str, package: str) -> None:
+        """Drop ``package`` from the cache."""
+        with self._lock:
+            self._data['managers'].get(manager, {}).pop(package, None)
+
+    def applied(self, manager: str) -> Optional[Dict[str, str]]:
+        """Return the config entries last applied for ``manager``, if any."""
+        with self._lock:
+            entries = self._data.get('applied', {}).get(manager)
+        return dict(entries) if entries is not None else None
+
+    def record_applied(self, manager: str, entries: Dict[str, str]) -> None:
+        """Remember the config entries successfully applied for ``manager``."""
+        with self._lock:
+            self._data.setdefault('applied', {})[manager] = dict(entries)
+
+    def timing(self, step: str) -> Optional[float]:
+        """Return the last recorded duration of ``step`` in seconds."""
+        with self._lock:
+            return self._data.get('timings', {}).get(step)
+
+    def record_timing(self, step: str, seconds: float) -> None:
+        """Remember how long ``step`` took, for planning later runs."""
+        with self._lock:
+            self._data.setdefault('timings', {})[step] = round(seconds, 3)
+
+    def save(self) -> None:
+        """Write the cache to disk atomically."""
+        if self.path is None:
+            return
+        with self._lock:
+            payload = json.dumps(self._data, indent=2, sort_keys=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(payload)
+        os.replace(tmp, self.path)
@@ -0,0 +1,280 @@
+"""Near-miss suggestions for apt package names that do not exist.
+
+All package names in the apt lists (60k+ on a stock Ubuntu) are indexed by
+their character bigrams, grouped by name length. A name within ``k`` edits
+of the query has the query's length ± ``k`` and lacks at most ``2k`` of
+its distinct bigrams. A lookup therefore reads the ``2k + 1`` shortest
+posting lists for each of those lengths, and computes the Levenshtein
+distance only for the few names found there, not for every name. Names
+are also indexed by their ``-``/``.``/``+`` separated words, so ``fd``
+finds ``fd-find`` even though the two are far apart in edit distance.
+
+The index is saved with ``marshal`` next to the other caches and stamped
+with the size and mtime of every list file, so it is rebuilt only after an
+``apt-get update``. ``python-Levenshtein`` is used for distances when
+installed, with a pure-Python fallback.
+
+Only the standard library is required so that
+``scripts/verify_apt_packages.py`` can share it.
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import marshal
+import os
+import re
+import shutil
+import subprocess
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from orchestrate.apt_cache import APT_LISTS_DIR
+from orchestrate.state import default_cache_dir, fingerprint
+
+INDEX_VERSION = 1
+
+DEFAULT_LIMIT = 3
+
+_PACKAGE_LINE = re.compile(rb'^Package: *(\S+)', re.MULTILINE)
+_TOKEN_SPLIT = re.compile(r'[-.+]')
+
+
+def _levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+try:
+    from Levenshtein import distance as edit_distance
+except ImportError:
+    edit_distance = _levenshtein
+
+
+def max_distance(name: str) -> int:
+    """Edits allowed for a suggestion: 1 for names up to 5 characters, else 2."""
+    return 1 if len(name) <= 5 else 2
+
+
+def tokens(name: str) -> List[str]:
+    return [t for t in _TOKEN_SPLIT.split(name) if len(t) > 1]
+
+
+def bigrams(name: str) -> Set[str]:
+    padded = f'^{name}$'
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class SuggestionIndex:
+    """Bigram and word index over a fixed set of package names.
+
+    ``postings[(bigram, length)]`` holds the positions in ``names`` of the
+    names of that length containing the bigram. ``words`` maps each name
+    word to the names containing it.
+    """
+
+    def __init__(self, names: List[str], postings: Mapping[Tuple[str, int], array], words: Mapping[str, array]):
+        self.names = names
+        self.postings = postings
+        self.words = words
+
+    @classmethod
+    def build(cls, names: Iterable[str]) -> 'SuggestionIndex':
+        ordered = sorted(set(names))
+        postings: Dict[Tuple[str, int], array] = {}
+        words: Dict[str, array] = {}
+        for i, name in enumerate(ordered):
+            for gram in bigrams(name):
+                postings.setdefault((gram, len(name)), array('I')).append(i)
+            for word in tokens(name):
+                words.setdefault(word, array('I')).append(i)
+        return cls(ordered, postings, words)
+
+    def within(self, name: str, limit: int) -> List[Tuple[int, str]]:
+        """Return ``(distance, name)`` for every name at most ``limit`` edits away."""
+        grams = bigrams(name)
+        # A name within ``limit`` edits lacks at most ``2 * limit`` of these
+        # bigrams, so it is in at least one of any ``2 * limit + 1`` posting
+        # lists. One-letter names have fewer; their neighbours sharing no
+        # bigram are missed.
+        scan = min(2 * limit + 1, len(grams))
+        found = []
+        for length in range(max(1, len(name) - limit), len(name) + limit + 1):
+            lists = sorted((self.postings.get((gram, length), _EMPTY) for gram in grams), key=len)
+            candidates: Set[int] = set()
+            for positions in lists[:scan]:
+                candidates.update(positions)
+            for i in candidates:
+                d = edit_distance(name, self.names[i])
+                if d <= limit:
+                    found.append((d, self.names[i]))
+        return sorted(found)
+
+    def suggest(self, name: str, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """Return up to ``limit`` existing names ``name`` was probably meant to be."""
+        # Names that contain the whole query as a word come first.
+        ranked: Dict[str, Tuple[int, int, str]] = {}
+        for i in self.words.get(name, _EMPTY):
+            candidate = self.names[i]
+            ranked[candidate] = (0, len(candidate), candidate)
+        for d, candidate in self.within(name, max_distance(name)):
+            ranked.setdefault(candidate, (d, len(candidate), candidate))
+        ranked.pop(name, None)
+        return [key[2] for key in sorted(ranked.values())[:limit]]
+
+    def save(self, path: Path, stamp: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        keys = sorted(self.postings)
+        words = sorted(self.words)
+        payload = (INDEX_VERSION, stamp, '\n'.join(self.names), keys, *_flatten(self.postings, keys),
+                   '\n'.join(words), *_flatten(self.words, words))
+        with open(tmp, 'wb') as f:
+            marshal.dump(payload, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, stamp: str) -> Optional['SuggestionIndex']:
+        """Return the saved index if it was built from lists matching ``stamp``."""
+        try:
+            with open(path, 'rb') as f:
+                payload = marshal.load(f)
+            version, saved_stamp, names, keys, offsets, positions, words, word_offsets, word_positions = payload
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != INDEX_VERSION or saved_stamp != stamp:
+            return None
+        return cls(
+            names.split('\n') if names else [],
+            _Flattened(keys, offsets, positions),
+            _Flattened(words.split('\n') if words else [], word_offsets, word_positions),
+        )
+
+
+_EMPTY = array('I')
+
+
+def _flatten(lists: Mapping, keys: List) -> Tuple[bytes, bytes]:
+    offsets, positions = array('I', [0]), array('I')
+    for key in keys:
+        positions.extend(lists[key])
+        offsets.append(len(positions))
+    return offsets.tobytes(), positions.tobytes()
+
+
+class _Flattened(Mapping):
+    """Read-only ``key -> array`` view over flattened lists, sliced on access."""
+
+    def __init__(self, keys: List, offsets: bytes, positions: bytes):
+        self._slots = {key: i for i, key in enumerate(keys)}
+        self._starts = _uint_array(offsets)
+        self._values = _uint_array(positions)
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __getitem__(self, key) -> array:
+        i = self._slots[key]
+        return self._values[self._starts[i]:self._starts[i + 1]]
+
+    def get(self, key, default: array = _EMPTY) -> array:
+        i = self._slots.get(key)
+        return default if i is None else self._values[self._starts[i]:self._starts[i + 1]]
+
+
+def _uint_array(data: bytes) -> array:
+    values = array('I')
+    values.frombytes(data)
+    return values
+
+
+def apt_list_files(lists_dir: Path = APT_LISTS_DIR) -> List[Path]:
+    """Return the ``Packages`` indexes apt downloaded, compressed or not."""
+    try:
+        return sorted(p for p in lists_dir.iterdir() if re.search(r'_Packages(\.(gz|xz|bz2|lz4))?$', p.name))
+    except OSError:
+        return []
+
+
+def _read_list(path: Path) -> bytes:
+    if path.suffix == '.gz':
+        return gzip.decompress(path.read_bytes())
+    if path.suffix == '.xz':
+        return lzma.decompress(path.read_bytes())
+    if path.suffix == '.bz2':
+        return bz2.decompress(path.read_bytes())
+    if path.suffix == '.lz4':
+        if shutil.which('lz4cat') is None:
+            return b''
+        return subprocess.run(['lz4cat', str(path)], capture_output=True).stdout
+    return path.read_bytes()
+
+
+def read_package_names(files: Iterable[Path]) -> List[str]:
+    names = set()
+    for path in files:
+        try:
+            data = _read_list(path)
+        except (OSError, EOFError, ValueError, lzma.LZMAError):
+            continue
+        names.update(m.group(1).decode('utf-8', 'replace') for m in _PACKAGE_LINE.finditer(data))
+    return sorted(names)
+
+
+def lists_stamp(files: List[Path]) -> str:
+    stamps = []
+    for path in files:
+        try:
+            st = path.stat()
+            stamps.append((path.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return fingerprint(INDEX_VERSION, stamps)
+
+
+def load_apt_index(lists_dir: Path = APT_LISTS_DIR, cache_path: Optional[Path] = None) -> Optional[SuggestionIndex]:
+    """Return the suggestion index for the current apt lists, rebuilding it if they changed.
+
+    Returns None when there are no apt lists to index.
+    """
+    files = apt_list_files(lists_dir)
+    if not files:
+        return None
+    cache_path = cache_path or default_cache_dir() / 'apt-names.idx'
+    stamp = lists_stamp(files)
+    index = SuggestionIndex.load(cache_path, stamp)
+    if index is None:
+        index = SuggestionIndex.build(read_package_names(files))
+        try:
+            index.save(cache_path, stamp)
+        except OSError:
+            pass
+    return index
+
+
+def suggest_apt_packages(packages: Iterable[str], index: Optional[SuggestionIndex] = None,
+                         limit: int = DEFAULT_LIMIT) -> Dict[str, List[str]]:
+    """Return suggestions for each of ``packages``, loading the index if not given."""
+    packages = list(packages)
+    if index is None and packages:
+        index = load_apt_index()
+    if index is None:
+        return {pkg: [] for pkg in packages}
+    return {pkg: index.suggest(pkg, limit) for pkg in packages}
+
+
+def format_suggestions(suggestions: List[str]) -> str:
+    return f"did you mean: {', '.join(suggestions)}?" if suggestions else ''
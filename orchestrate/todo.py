@@ -0,0 +1,134 @@
+"""Registry of packages that could not be installed, rendered into TODO.md.
+
+The orchestrator, ``scripts/verify_apt_packages.py`` and
+``install/install_apt.sh`` all record missing packages in two places:
+
+    .missing-packages.jsonl   one JSON object per (manager, package)
+    TODO.md                   ``- [ ] Add <manager> installation method for <pkg>``
+                              followed by ``(did you mean: <names>?)`` when
+                              similar package names exist
+
+Writers hold an exclusive ``flock`` on the sidecar while they update
+either file, so parallel runs in a shared checkout neither lose nor
+interleave lines. Python writers collect entries in memory and flush them
+once per run, rewriting TODO.md through a temporary file and an atomic
+rename. The shell installer appends under the same lock.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+SIDECAR_NAME = '.missing-packages.jsonl'
+
+TODO_HEADER = '# TODO\n'
+
+_ITEM = re.compile(r'^\s*- \[[ xX]\] (.*?)(?: \(did you mean: .*\))?\s*$')
+
+
+def todo_text(manager: str, package: str) -> str:
+    return f"Add {manager} installation method for {package}"
+
+
+def sidecar_for(todo_path: Path) -> Path:
+    return Path(todo_path).parent / SIDECAR_NAME
+
+
+class MissingPackages:
+    """Missing packages collected during a run and written out by :meth:`flush`.
+
+    ``source`` names the writer in the sidecar. Unless ``create_todo`` is
+    set, TODO.md is only appended to when it already exists.
+    """
+
+    def __init__(self, todo_path: Path, source: str, create_todo: bool = True):
+        self.todo_path = Path(todo_path)
+        self.sidecar_path = sidecar_for(self.todo_path)
+        self.source = source
+        self.create_todo = create_todo
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def add(self, package: str, manager: str = 'apt', suggestions: Sequence[str] = ()) -> None:
+        entry: Dict[str, Any] = {'manager': manager, 'package': package, 'source': self.source}
+        if suggestions:
+            entry['suggestions'] = list(suggestions)
+        with self._lock:
+            self._entries.setdefault((manager, package), entry)
+
+    def pending(self) -> List[str]:
+        """Return the packages waiting to be flushed."""
+        with self._lock:
+            return [package for _, package in self._entries]
+
+    def flush(self) -> int:
+        """Write the collected entries; return the number of new TODO items."""
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        if not entries:
+            return 0
+        with open(self.sidecar_path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            known = _known_entries(f.read())
+            new = [e for e in entries if (e['manager'], e['package']) not in known]
+            f.write(''.join(json.dumps(e, sort_keys=True) + '\n' for e in new))
+            f.flush()
+            return self._update_todo(entries)
+
+    def _update_todo(self, entries: List[Dict[str, Any]]) -> int:
+        try:
+            contents = self.todo_path.read_text()
+        except FileNotFoundError:
+            if not self.create_todo:
+                return 0
+            contents = TODO_HEADER
+        present = {m.group(1) for m in map(_ITEM.match, contents.splitlines()) if m}
+        lines = []
+        for entry in entries:
+            text = todo_text(entry['manager'], entry['package'])
+            if text not in present:
+                present.add(text)
+                hint = f" (did you mean: {', '.join(entry['suggestions'])}?)" if entry.get('suggestions') else ''
+                lines.append(f"- [ ] {text}{hint}\n")
+        if not lines:
+            return 0
+        if contents and not contents.endswith('\n'):
+            contents += '\n'
+        tmp = self.todo_path.with_name(f'.{self.todo_path.name}.{os.getpid()}.tmp')
+        tmp.write_text(contents + ''.join(lines))
+        os.replace(tmp, self.todo_path)
+        return len(lines)
+
+
+def _known_entries(text: str) -> Set[Tuple[str, str]]:
+    known = set()
+    for line in text.splitlines():
+        try:
+            entry = json.loads(line)
+            known.add((entry['manager'], entry['package']))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return known
+
+
+def read_sidecar(todo_path: Path) -> List[Dict[str, Any]]:
+    """Return every entry recorded next to ``todo_path``."""
+    try:
+        text = sidecar_for(todo_path).read_text()
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in text.splitlines():
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
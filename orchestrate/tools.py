@@ -0,0 +1,196 @@
+"""Index of the executables on PATH.
+
+Checking whether a tool exists used to mean running ``<tool> --version``,
+which starts nvim, node or npm just to throw the output away. The index
+lists every PATH directory once and answers existence checks from memory.
+A directory is listed again only when its mtime changes, e.g. after an
+install added a binary to it.
+
+Versions are probed only when asked for. Results are cached by binary
+path, inode, mtime and size, optionally on disk, so a re-run of
+``test_setup.py`` only starts the tools that changed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from orchestrate.config import VerifyOverrides
+
+TOOLS_CACHE_VERSION = 1
+
+DEFAULT_VERSION_TIMEOUT = 10.0
+
+
+@dataclass(frozen=True, slots=True)
+class ToolVersion:
+    """Outcome of a version probe."""
+
+    path: Optional[str]
+    ok: bool
+    detail: str
+    cached: bool = False
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+class ToolIndex:
+    """Resolves commands from one scan of PATH and caches their versions.
+
+    ``search_path`` defaults to ``$PATH`` at lookup time; a changed ``$PATH``
+    triggers a full rescan. ``overrides`` supplies the command and version
+    flag per package from ``test_overrides.yaml``. Without ``cache_path``
+    versions are kept in memory only. Lookups may come from several threads.
+    """
+
+    def __init__(self, search_path: Optional[str] = None, overrides: Optional[VerifyOverrides] = None,
+                 is_linux: Optional[bool] = None, cache_path: Optional[Path] = None):
+        self.search_path = search_path
+        self.overrides = overrides or VerifyOverrides()
+        self.is_linux = sys.platform.startswith('linux') if is_linux is None else is_linux
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._scanned_path: Optional[str] = None
+        self._dirs: List[Tuple[str, Optional[int]]] = []
+        self._names: Dict[str, List[str]] = {}
+        self._versions: Dict[str, Dict[str, object]] = {}
+        self._dirty = False
+        if cache_path is not None:
+            try:
+                data = json.loads(cache_path.read_text())
+                if data.get('version') == TOOLS_CACHE_VERSION:
+                    self._versions = data['tools']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    # -- resolution ---------------------------------------------------------
+
+    def _current_path(self) -> str:
+        return self.search_path if self.search_path is not None else os.environ.get('PATH', os.defpath)
+
+    def _list_dir(self, directory: str) -> Tuple[Optional[int], List[str]]:
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            return mtime, os.listdir(directory)
+        except OSError:
+            return None, []
+
+    def _scan(self, path: str) -> None:
+        self._scanned_path = path
+        self._dirs, self._names = [], {}
+        for directory in dict.fromkeys(d for d in path.split(os.pathsep) if d):
+            mtime, names = self._list_dir(directory)
+            self._dirs.append((directory, mtime))
+            for name in names:
+                self._names.setdefault(name, []).append(directory)
+
+    def _rescan_changed(self) -> bool:
+        """List directories whose mtime changed again; return True if any did."""
+        changed = False
+        for i, (directory, mtime) in enumerate(self._dirs):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                current = None
+            if current == mtime:
+                continue
+            changed = True
+            for dirs in self._names.values():
+                if directory in dirs:
+                    dirs.remove(directory)
+            current, names = self._list_dir(directory)
+            self._dirs[i] = (directory, current)
+            order = [d for d, _ in self._dirs]
+            for name in names:
+                dirs = self._names.setdefault(name, [])
+                dirs.append(directory)
+                dirs.sort(key=order.index)
+        return changed
+
+    def _candidate(self, cmd: str) -> Optional[str]:
+        for directory in self._names.get(cmd, ()):
+            path = os.path.join(directory, cmd)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+        return None
+
+    def resolve(self, cmd: str) -> Optional[str]:
+        """Return the full path ``cmd`` runs, like :func:`shutil.which`."""
+        if os.sep in cmd:
+            return cmd if os.path.isfile(cmd) and os.access(cmd, os.X_OK) else None
+        path = self._current_path()
+        with self._lock:
+            if path != self._scanned_path:
+                self._scan(path)
+            found = self._candidate(cmd)
+            if found is None and self._rescan_changed():
+                found = self._candidate(cmd)
+            return found
+
+    def exists(self, cmd: str) -> bool:
+        return self.resolve(cmd) is not None
+
+    def command_for(self, package: str) -> Tuple[str, str]:
+        """Return the executable and version flag that verify ``package``."""
+        return self.overrides.command_for(package, self.is_linux)
+
+    # -- versions -----------------------------------------------------------
+
+    def version(self, cmd: str, version_flag: str = '--version',
+                timeout: float = DEFAULT_VERSION_TIMEOUT) -> ToolVersion:
+        """Return the first line ``cmd version_flag`` prints.
+
+        A result is reused while the binary keeps its inode, mtime and size.
+        Timeouts are never cached.
+        """
+        path = self.resolve(cmd)
+        if path is None:
+            return ToolVersion(None, False, 'Not found')
+        key = f"{path} {version_flag}"
+        stamp = _stamp(path)
+        with self._lock:
+            entry = self._versions.get(key)
+        if entry is not None and entry['stamp'] == stamp:
+            return ToolVersion(path, bool(entry['ok']), str(entry['detail']), cached=True)
+        if timeout <= 0:
+            return ToolVersion(path, False, 'Deadline exceeded')
+        try:
+            proc = subprocess.run([path, version_flag], capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return ToolVersion(path, False, f'Timed out after {timeout:.0f}s')
+        except OSError:
+            return ToolVersion(path, False, 'Not found')
+        if proc.returncode != 0:
+            result = ToolVersion(path, False, 'Command failed')
+        else:
+            output = proc.stdout.strip() or proc.stderr.strip()
+            result = ToolVersion(path, True, output.split('\n')[0] if output else path)
+        with self._lock:
+            self._versions[key] = {'stamp': stamp, 'ok': result.ok, 'detail': result.detail}
+            self._dirty = True
+        return result
+
+    def save(self) -> None:
+        """Write the version cache to ``cache_path`` if it changed."""
+        if self.cache_path is None or not self._dirty:
+            return
+        with self._lock:
+            payload = json.dumps({'version': TOOLS_CACHE_VERSION, 'tools': self._versions}, indent=2, sort_keys=True)
+            self._dirty = False
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(payload)
+        os.replace(tmp, self.cache_path)
@@ -0,0 +1,107 @@
+"""Per-step timing for orchestration runs.
+
+A :class:`Tracer` collects :class:`Span` records for every command, probe
+and install phase. Spans can be written as JSON lines, as a single JSON
+document or in the Chrome trace-event format understood by
+``chrome://tracing``, Perfetto and speedscope.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_FORMATS = ('jsonl', 'json', 'chrome')
+
+
+@dataclass
+class Span:
+    """A timed step of the run."""
+
+    name: str
+    category: str
+    start: float = 0.0
+    duration: float = 0.0
+    exit_code: Optional[int] = None
+    output_bytes: int = 0
+    retries: int = 0
+    thread: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """Thread-safe collector of :class:`Span` records."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._wall_origin = time.time()
+
+    @contextmanager
+    def span(self, name: str, category: str, **attrs: Any) -> Iterator[Span]:
+        """Time the enclosed block; the yielded span may be annotated."""
+        span = Span(name, category, attrs=attrs, thread=threading.get_ident())
+        start = time.perf_counter()
+        span.start = start - self._origin
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - start
+            with self._lock:
+                self.spans.append(span)
+
+    def slowest(self, count: int = 10, categories: Optional[List[str]] = None) -> List[Span]:
+        """Return the ``count`` longest spans, optionally filtered by category."""
+        with self._lock:
+            spans = [s for s in self.spans if categories is None or s.category in categories]
+        return sorted(spans, key=lambda s: s.duration, reverse=True)[:count]
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Return the spans as a Chrome trace-event document."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                'name': s.name,
+                'cat': s.category,
+                'ph': 'X',
+                'ts': round(s.start * 1e6),
+                'dur': round(s.duration * 1e6),
+                'pid': pid,
+                'tid': s.thread,
+                'args': {
+                    'exit_code': s.exit_code,
+                    'output_bytes': s.output_bytes,
+                    'retries': s.retries,
+                    **s.attrs,
+                },
+            }
+            for s in spans
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: Path, fmt: str = 'jsonl', report: Optional[Dict[str, Any]] = None) -> None:
+        """Write the trace to ``path`` in ``fmt``."""
+        with self._lock:
+            spans = [asdict(s) for s in self.spans]
+        header = {'started': self._wall_origin, 'report': report or {}}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == 'chrome':
+            document = self.to_chrome()
+            document['otherData'] = header
+            path.write_text(json.dumps(document, default=str))
+        elif fmt == 'json':
+            path.write_text(json.dumps({**header, 'spans': spans}, indent=2, default=str))
+        else:
+            with open(path, 'w') as f:
+                f.write(json.dumps({'type': 'run', **header}, default=str) + '\n')
+                for span in spans:
+                    f.write(json.dumps({'type': 'span', **span}, default=str) + '\n')
@@ -0,0 +1,108 @@
+"""Shared wheelhouse for pipx installs.
+
+``pipx install`` resolves and downloads every tool's dependency tree on its
+own, although tools such as black, mypy, pytest and coverage share most of
+their dependencies. :class:`Wheelhouse` builds wheels for all tools once,
+into one directory, and points pip at it (``PIP_FIND_LINKS`` plus
+``PIP_NO_INDEX``) so each venv installs from local files.
+
+:func:`link_duplicate_files` then replaces identical files in different pipx
+venvs with hard links to one copy.
+"""
+
+from __future__ import annotations
+
+import filecmp
+import os
+import stat
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from orchestrate.state import default_cache_dir
+
+# Packages pipx installs into every venv besides the tool itself.
+SHARED_PACKAGES = ['pip', 'setuptools', 'wheel']
+
+
+def default_wheelhouse_dir() -> Path:
+    return default_cache_dir() / 'wheelhouse'
+
+
+def pipx_python() -> str:
+    """Return the interpreter pipx creates venvs with."""
+    return os.environ.get('PIPX_DEFAULT_PYTHON') or 'python3'
+
+
+class Wheelhouse:
+    """A directory of wheels shared by all pipx venvs."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root is not None else default_wheelhouse_dir()
+
+    def build_command(self, packages: List[str], offline: bool = False) -> List[str]:
+        """Return a ``pip wheel`` call resolving ``packages`` together.
+
+        Wheels already in the wheelhouse are reused; with ``offline`` the
+        index is not consulted, which succeeds only if nothing is missing.
+        """
+        cmd = [pipx_python(), '-m', 'pip', 'wheel', '--wheel-dir', str(self.root),
+               '--find-links', str(self.root)]
+        if offline:
+            cmd.append('--no-index')
+        return cmd + SHARED_PACKAGES + list(packages)
+
+    def pip_env(self, env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Return ``env`` with pip restricted to the wheelhouse."""
+        env = dict(os.environ if env is None else env)
+        env['PIP_FIND_LINKS'] = str(self.root)
+        env['PIP_NO_INDEX'] = '1'
+        return env
+
+
+def _site_files(venvs_dir: Path) -> Dict[Tuple[str, int], List[Path]]:
+    """Group regular site-packages files of all venvs by relative path and size."""
+    groups: Dict[Tuple[str, int], List[Path]] = {}
+    for site in venvs_dir.glob('*/lib/python*/site-packages'):
+        for dirpath, _, filenames in os.walk(site):
+            for filename in filenames:
+                if filename.endswith('.pyc'):
+                    continue
+                path = Path(dirpath) / filename
+                try:
+                    st = path.lstat()
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    groups.setdefault((str(path.relative_to(site)), st.st_size), []).append(path)
+    return groups
+
+
+def link_duplicate_files(venvs_dir: Path) -> int:
+    """Hard-link identical site-packages files across venvs.
+
+    Returns the number of bytes freed. Files on different devices or that
+    differ in content are left alone.
+    """
+    saved = 0
+    for (_, size), paths in _site_files(venvs_dir).items():
+        if len(paths) < 2 or size == 0:
+            continue
+        first = paths[0]
+        first_stat = first.stat()
+        for path in paths[1:]:
+            st = path.stat()
+            if (st.st_dev, st.st_ino) == (first_stat.st_dev, first_stat.st_ino):
+                continue
+            if st.st_dev != first_stat.st_dev or st.st_mode != first_stat.st_mode:
+                continue
+            if not filecmp.cmp(first, path, shallow=False):
+                continue
+            tmp = path.with_name(f'.{path.name}.{os.getpid()}.link')
+            try:
+                os.link(first, tmp)
+                os.replace(tmp, path)
+            except OSError:
+                tmp.unlink(missing_ok=True)
+                continue
+            saved += size
+    return saved
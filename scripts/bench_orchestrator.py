@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Benchmark the orchestrator against fake package managers.
+
+Fake ``apt-get``, ``apt-cache``, ``brew``, ``pipx`` and ``npm`` executables
+are put first on a temporary PATH. They sleep for a configurable latency per
+call and per package, fail a configurable share of installs and log every
+invocation, so runs are reproducible and need no network or root.
+
+Scenarios:
+
+    run      BootstrapOrchestrator.run() with N packages per manager
+    verify   scripts/verify_apt_packages.py main() with N apt packages
+    setup    test_setup.py main() with N system and N pipx tools
+
+Results are printed as JSON. ``--baseline`` compares them with an earlier
+result file and ``--max-seconds`` sets absolute limits; either makes the
+script exit 1 on a regression::
+
+    python3 scripts/bench_orchestrator.py --sizes 10 100 --output bench.json
+    python3 scripts/bench_orchestrator.py --sizes 10 100 --baseline bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+FAKE_COMMANDS = ("apt-get", "apt-cache", "brew", "pipx", "npm")
+SCENARIOS = ("run", "verify", "setup")
+DEFAULT_SIZES = (10, 100, 1000)
+
+# A single script serves every fake manager; it dispatches on argv[0].
+FAKE_MANAGER = r'''#!{python}
+import json, os, random, sys, time
+
+name = os.path.basename(sys.argv[0])
+args = sys.argv[1:]
+root = os.environ["FAKE_ROOT"]
+latency = float(os.environ.get("FAKE_LATENCY", "0"))
+per_package = float(os.environ.get("FAKE_PER_PACKAGE", "0"))
+fail_rate = float(os.environ.get("FAKE_FAIL_RATE", "0"))
+seed = os.environ.get("FAKE_SEED", "0")
+
+with open(os.path.join(root, "calls.log"), "a") as log:
+    log.write(json.dumps([name] + args) + "\n")
+time.sleep(latency)
+
+if args[:1] in (["--version"], ["-v"], ["-V"], ["version"]):
+    print(f"{name} 1.0.0")
+    sys.exit(0)
+
+installed_path = os.path.join(root, f"{name.split('-')[0]}.installed")
+installed = set(open(installed_path).read().split()) if os.path.exists(installed_path) else set()
+
+
+def attempt_fails(pkg):
+    # One byte per attempt, so retries of a package draw new outcomes.
+    os.makedirs(os.path.join(root, "attempts"), exist_ok=True)
+    with open(os.path.join(root, "attempts", pkg.replace("/", "_")), "ab") as f:
+        count = f.tell()
+        f.write(b".")
+    return random.Random(f"{seed}:{pkg}:{count}").random() < fail_rate
+
+
+def install(pkgs):
+    time.sleep(per_package * len(pkgs))
+    failed = [p for p in pkgs if attempt_fails(p)]
+    if failed:
+        # A network error, so that the orchestrator retries it.
+        print(f"E: failed to fetch {' '.join(failed)}: Connection reset by peer", file=sys.stderr)
+        sys.exit(100)
+    with open(installed_path, "a") as f:
+        f.write("".join(p + "\n" for p in pkgs))
+
+
+if name == "apt-cache" and args[:1] == ["policy"]:
+    for pkg in args[1:]:
+        print(f"{pkg}:")
+        print(f"  Installed: {'1.0' if pkg in installed else '(none)'}")
+        print(f"  Candidate: {'(none)' if pkg.startswith('missing-') else '1.0'}")
+elif name == "apt-get" and args[:1] == ["install"]:
+    pkgs = [a for a in args[1:] if not a.startswith("-") and "::" not in a]
+    install([p for p in pkgs if p not in installed])
+elif name == "apt-get":
+    pass
+elif name == "brew" and args[:1] == ["formulae"]:
+    # Every configured system package is a formula, except the missing ones.
+    with open(os.path.join(root, "config", "packages.yaml")) as f:
+        names = [line.split("-", 1)[1].strip() for line in f if line.startswith("  - ")]
+    print("\n".join(n for n in names if not n.startswith("missing-")))
+elif name == "brew" and args[:1] == ["casks"]:
+    pass
+elif name == "brew" and args[:1] == ["install"]:
+    install(args[1:])
+elif name == "pipx" and args[:1] == ["list"]:
+    print("\n".join(sorted(installed)))
+elif name == "pipx" and args[:1] == ["install"]:
+    install([a for a in args[1:] if not a.startswith("-")])
+elif name == "npm" and args[:1] in (["ls"], ["list"]):
+    print(json.dumps({"dependencies": {p: {"version": "1.0.0"} for p in installed}}))
+elif name == "npm" and args[:1] == ["install"]:
+    rest, pkgs, skip = args[1:], [], False
+    for arg in rest:
+        if skip:
+            skip = False
+        elif arg in ("--cache", "--prefix"):
+            skip = True
+        elif not arg.startswith("-"):
+            pkgs.append(arg)
+    install(pkgs)
+else:
+    print(f"{name}: unsupported fake call {args}", file=sys.stderr)
+    sys.exit(2)
+'''
+
+
+class FakeEnvironment:
+    """A temporary config, HOME and PATH with fake package managers."""
+
+    def __init__(self, root: Path, packages: int, latency: float = 0.0, per_package: float = 0.0,
+                 fail_rate: float = 0.0, seed: int = 0, missing: int = 0):
+        self.root = root
+        self.packages = packages
+        self.config_dir = root / "config"
+        self.bin_dir = root / "bin"
+        self.env = {
+            "FAKE_ROOT": str(root),
+            "FAKE_LATENCY": str(latency),
+            "FAKE_PER_PACKAGE": str(per_package),
+            "FAKE_FAIL_RATE": str(fail_rate),
+            "FAKE_SEED": str(seed),
+            "PATH": f"{self.bin_dir}:/usr/bin:/bin",
+            "HOME": str(root / "home"),
+            "XDG_CACHE_HOME": str(root / "cache"),
+            "PIPX_HOME": str(root / "pipx"),
+            "NPM_CONFIG_PREFIX": str(root / "npm"),
+        }
+        self.missing = missing
+        self._write()
+
+    def names(self, prefix: str) -> List[str]:
+        return [f"{prefix}-{i:04d}" for i in range(self.packages)]
+
+    def _write(self) -> None:
+        self.config_dir.mkdir(parents=True)
+        self.bin_dir.mkdir()
+        (self.root / "home").mkdir()
+        system = self.names("sys")
+        system[:self.missing] = [f"missing-{i:04d}" for i in range(min(self.missing, self.packages))]
+        for filename, names in (("packages.yaml", system), ("pipx.yaml", self.names("py")),
+                                ("npm.yaml", self.names("js"))):
+            (self.config_dir / filename).write_text("packages:\n" + "".join(f"  - {n}\n" for n in names))
+
+        fake = self.bin_dir / "fake-manager"
+        fake.write_text(FAKE_MANAGER.replace("{python}", sys.executable))
+        fake.chmod(0o755)
+        # The managers plus one executable per tool, so verification finds them.
+        for name in (*FAKE_COMMANDS, "pyenv", *system, *self.names("py")):
+            (self.bin_dir / name).symlink_to(fake)
+
+    def calls(self) -> List[List[str]]:
+        log = self.root / "calls.log"
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines()]
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["FakeEnvironment"]:
+        """Apply the environment to this process for in-process benchmarks."""
+        saved = {key: os.environ.get(key) for key in self.env}
+        os.environ.update(self.env)
+        try:
+            yield self
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def _load_script(path: Path) -> Any:
+    spec = importlib.util.spec_from_file_location(f"bench_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def scenario_run(env: FakeEnvironment, jobs: int) -> bool:
+    from orchestrate import main as orchestrator_main
+    from orchestrate.backends import AptBackend
+    from orchestrate.inventory import Inventory
+    from orchestrate.state import StateCache
+    from orchestrate.todo import MissingPackages
+
+    # The fake managers keep no dpkg status, so keep the host's out of the
+    # run, and drive the fake apt whatever manager the host has.
+    orchestrator = orchestrator_main.BootstrapOrchestrator(
+        env.config_dir, jobs=jobs, state=StateCache(), apt_refresh="never",
+        missing=MissingPackages(env.root / "TODO.md", "bench"),
+        inventory=Inventory(dpkg_status=env.root / "dpkg-status"),
+        backend=AptBackend(env.root / "dpkg-status", env.root / "update-success-stamp"))
+    orchestrator.console.quiet = True
+    try:
+        return orchestrator.run()
+    finally:
+        orchestrator.console.quiet = False
+
+
+def scenario_verify(env: FakeEnvironment, jobs: int) -> bool:
+    module = _load_script(REPO_ROOT / "scripts" / "verify_apt_packages.py")
+    module.CONFIG_DIR = env.config_dir
+    module.TODO_PATH = env.root / "TODO.md"
+    # The script exits 1 when it finds packages without a candidate.
+    return module.main() == (1 if env.missing else 0)
+
+
+def scenario_setup(env: FakeEnvironment, jobs: int) -> bool:
+    module = _load_script(REPO_ROOT / "test_setup.py")
+    module.console.quiet = True
+    report = env.root / "verify.json"
+    module.main(["--config-dir", str(env.config_dir), "--jobs", str(jobs), "--json", str(report)])
+    # Python packages are looked up in this interpreter, not on the fake PATH.
+    results = json.loads(report.read_text())["results"]
+    return all(r["ok"] for r in results if r["section"] != "Python Packages")
+
+
+SCENARIO_FUNCTIONS: Dict[str, Callable[[FakeEnvironment, int], bool]] = {
+    "run": scenario_run,
+    "verify": scenario_verify,
+    "setup": scenario_setup,
+}
+
+
+def bench(scenario: str, packages: int, runs: int = 1, jobs: int = 4, **fake_options: Any) -> Dict[str, Any]:
+    """Run ``scenario`` ``runs`` times, each in a fresh fake environment.
+
+    Seconds and manager calls are the medians over the runs; the calls of
+    each run are listed too, since retries make them vary with the seed.
+    """
+    timings, calls, ok = [], [], True
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="foundry-bench-") as tmp:
+            env = FakeEnvironment(Path(tmp), packages, **fake_options)
+            with env.activate(), contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                ok = SCENARIO_FUNCTIONS[scenario](env, jobs) and ok
+                timings.append(time.perf_counter() - start)
+            calls.append(len(env.calls()))
+    return {
+        "scenario": scenario,
+        "packages": packages,
+        "runs": runs,
+        "seconds": round(statistics.median(timings), 4),
+        "manager_calls": statistics.median(calls),
+        "manager_calls_per_run": calls,
+        "ok": ok,
+    }
+
+
+def regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float,
+                limits: Dict[str, float]) -> List[str]:
+    """Return a message for every result slower than its baseline or limit."""
+    previous = {(r["scenario"], r["packages"]): r for r in baseline}
+    messages = []
+    for result in results:
+        key = f"{result['scenario']}@{result['packages']}"
+        before = previous.get((result["scenario"], result["packages"]))
+        if before and result["seconds"] > before["seconds"] * (1 + tolerance):
+            messages.append(f"{key}: {result['seconds']}s vs baseline {before['seconds']}s")
+        if before and result["manager_calls"] > before["manager_calls"]:
+            messages.append(f"{key}: {result['manager_calls']} manager calls vs baseline {before['manager_calls']}")
+        if key in limits and result["seconds"] > limits[key]:
+            messages.append(f"{key}: {result['seconds']}s exceeds limit {limits[key]}s")
+    return messages
+
+
+def parse_limits(values: List[str]) -> Dict[str, float]:
+    limits = {}
+    for value in values:
+        key, _, seconds = value.partition("=")
+        scenario, _, size = key.partition("@")
+        if scenario not in SCENARIOS or not size.isdigit() or not seconds:
+            raise SystemExit(f"invalid --max-seconds {value!r}; expected SCENARIO@SIZE=SECONDS")
+        limits[key] = float(seconds)
+    return limits
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--runs", type=int, default=1, help="runs per scenario and size (median is reported)")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each fake call sleeps")
+    parser.add_argument("--per-package", type=float, default=0.0, help="seconds each installed package adds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of install attempts that fail")
+    parser.add_argument("--missing", type=int, default=0, help="apt packages without a candidate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="also write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown relative to the baseline (default 0.25)")
+    parser.add_argument("--max-seconds", action="append", default=[], metavar="SCENARIO@SIZE=SECONDS")
+    args = parser.parse_args(argv)
+    limits = parse_limits(args.max_seconds)
+
+    results = [
+        bench(scenario, size, runs=args.runs, jobs=args.jobs, latency=args.latency,
+              per_package=args.per_package, fail_rate=args.fail_rate, seed=args.seed, missing=args.missing)
+        for scenario in args.scenarios
+        for size in args.sizes
+    ]
+    document = json.dumps(results, indent=2)
+    print(document)
+    if args.output:
+        args.output.write_text(document + "\n")
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else []
+    problems = regressions(results, baseline, args.tolerance, limits)
+    for problem in problems:
+        print(f"❌ {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Measure orchestrator cold-start latency with ``python -X importtime``.
+
+Each scenario runs in a fresh interpreter several times; the report shows the
+median wall time, the median total import time and the slowest top-level
+imports. ``--max-ms`` turns the report into a regression check.
+
+    python3 scripts/bench_startup.py --runs 5 --max-ms status=150
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MAIN = REPO_ROOT / "orchestrate" / "main.py"
+CONFIG_DIR = REPO_ROOT / "config"
+
+SCENARIOS: Dict[str, List[str]] = {
+    "status": [str(MAIN), "--config-dir", str(CONFIG_DIR), "status"],
+    "check": [str(MAIN), "--config-dir", str(CONFIG_DIR), "check"],
+    "help": [str(MAIN), "--help"],
+    "import": ["-c", "import orchestrate.main"],
+}
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Return (module, self_us, cumulative_us, depth) for each imported module."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def run_once(args: List[str]) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=REPO_ROOT,
+                          capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def bench(name: str, runs: int) -> Dict[str, object]:
+    walls, imports = [], []
+    top: Dict[str, int] = {}
+    loaded = set()
+    for _ in range(runs):
+        wall, entries = run_once(SCENARIOS[name])
+        walls.append(wall)
+        imports.append(sum(cum for _, _, cum, depth in entries if depth == 0) / 1000)
+        for module, _, cumulative, depth in entries:
+            loaded.add(module)
+            if depth == 0:
+                top[module] = max(top.get(module, 0), cumulative)
+    slowest = sorted(top.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "scenario": name,
+        "runs": runs,
+        "wall_ms": round(statistics.median(walls), 1),
+        "import_ms": round(statistics.median(imports), 1),
+        "slowest_imports": [{"module": m, "ms": round(us / 1000, 1)} for m, us in slowest],
+        "loads_click": "click" in loaded,
+        "loads_rich": "rich" in loaded,
+    }
+
+
+def parse_thresholds(values: List[str]) -> Dict[str, float]:
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.partition("=")
+        if name not in SCENARIOS or not limit:
+            raise SystemExit(f"invalid --max-ms {value!r}; expected SCENARIO=MS")
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--max-ms", action="append", default=[], metavar="SCENARIO=MS",
+                        help="fail when the median wall time of SCENARIO exceeds MS")
+    args = parser.parse_args(argv)
+    thresholds = parse_thresholds(args.max_ms)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario {', '.join(unknown)}")
+
+    results = [bench(name, args.runs) for name in args.scenarios or SCENARIOS]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            heavy = [m for m, flag in (("click", result["loads_click"]), ("rich", result["loads_rich"])) if flag]
+            print(f"{result['scenario']:<8} {result['wall_ms']:>7.1f} ms wall  {result['import_ms']:>7.1f} ms imports"
+                  f"  loads: {', '.join(heavy) or 'stdlib only'}")
+            for entry in result["slowest_imports"]:
+                print(f"           {entry['ms']:>7.1f} ms  {entry['module']}")
+
+    failed = [r for r in results if r["scenario"] in thresholds and r["wall_ms"] > thresholds[r["scenario"]]]
+    for result in failed:
+        print(f"❌ {result['scenario']}: {result['wall_ms']} ms exceeds {thresholds[result['scenario']]} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,72 +1,53 @@
 #!/usr/bin/env python3
-"""Check that all apt package names in config/packages.yaml exist."""
+"""Check that all apt package names in config/packages.yaml exist.
+
+The package list comes from the JSON snapshot in ``config/.snapshot``, which
+needs only the standard library. When the snapshot is missing or older than
+the YAML files, the script parses the YAML instead, which needs the
+orchestrator's requirements (ruamel.yaml or PyYAML). Every orchestrator run
+refreshes the snapshot.
+"""
 
 from __future__ import annotations
 
-import subprocess
+import sys
 from pathlib import Path
 from typing import List
 
-from ruamel.yaml import YAML
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
 
-CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "packages.yaml"
-TODO_PATH = Path(__file__).resolve().parent.parent / "TODO.md"
+from orchestrate.apt_cache import resolve_apt_packages  # noqa: E402
+from orchestrate.config import load_bootstrap_config, read_snapshot  # noqa: E402
+from orchestrate.suggest import format_suggestions, suggest_apt_packages  # noqa: E402
+from orchestrate.todo import MissingPackages  # noqa: E402
 
-yaml = YAML(typ="safe")
+CONFIG_DIR = REPO_ROOT / "config"
+TODO_PATH = REPO_ROOT / "TODO.md"
 
 
 def load_packages() -> List[str]:
-    if not CONFIG_PATH.exists():
-        return []
-    with open(CONFIG_PATH, "r") as f:
-        data = yaml.load(f) or {}
-    packages = []
-    for item in data.get("packages", []):
-        name = None
-        override = None
-        if isinstance(item, str):
-            name = item
-        elif isinstance(item, dict):
-            if "name" in item:
-                name = item.get("name")
-                override = item.get("apt-override")
-            elif len(item) == 1:
-                name, meta = next(iter(item.items()))
-                if isinstance(meta, dict):
-                    override = meta.get("apt-override")
-        if name:
-            packages.append(override if override else name)
-    return packages
-
-
-def apt_exists(pkg: str) -> bool:
-    result = subprocess.run([
-        "apt-cache",
-        "show",
-        pkg,
-    ], capture_output=True, text=True)
-    return "Package:" in result.stdout
-
-
-def append_todo(pkg: str) -> None:
-    line = f"- [ ] Add apt installation method for {pkg}\n"
-    if TODO_PATH.exists():
-        with open(TODO_PATH, "r+") as f:
-            contents = f.read()
-            if line.strip() not in contents:
-                f.write(line)
-    else:
-        with open(TODO_PATH, "w") as f:
-            f.write("# TODO\n" + line)
+    # A current snapshot is read with json alone, like orchestrate/fast.py.
+    config = read_snapshot(CONFIG_DIR) or load_bootstrap_config(CONFIG_DIR)
+    return config.system_packages("apt")
 
 
 def main() -> int:
-    missing: List[str] = []
-    for pkg in load_packages():
-        if not apt_exists(pkg):
-            print(f"Missing apt package: {pkg}")
-            append_todo(pkg)
-            missing.append(pkg)
+    todo = MissingPackages(TODO_PATH, "verify_apt_packages.py")
+    try:
+        packages = load_packages()
+    except ImportError:
+        print("The config snapshot is missing or stale and no YAML parser is installed.")
+        print("Install the orchestrator requirements (ruamel.yaml or PyYAML) and run it again.")
+        return 2
+    availability = resolve_apt_packages(packages)
+    missing = [pkg for pkg in packages if not availability[pkg].available]
+    suggestions = suggest_apt_packages(missing)
+    for pkg in missing:
+        hint = format_suggestions(suggestions[pkg])
+        print(f"Missing apt package: {pkg}" + (f" ({hint})" if hint else ""))
+        todo.add(pkg, suggestions=suggestions[pkg])
+    todo.flush()
     if missing:
         print(f"\n{len(missing)} package(s) missing from apt")
         return 1
@@ -5,208 +5,270 @@ Test script to verify foundry-bootstrap setup
 This script checks that all required tools are properly installed and accessible.
 """
 
-import subprocess
+import argparse
+import importlib.util
+import json
 import sys
-import yaml  # type: ignore
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from rich.console import Console
 import platform
 
+from orchestrate.backends import detect_backend
+from orchestrate.config import ConfigError, VerifyOverrides, load_bootstrap_config
+from orchestrate.inventory import Inventory
+from orchestrate.state import default_cache_dir
+from orchestrate.tools import ToolIndex
+
 console = Console()
 
-def load_test_overrides(config_dir: Path) -> dict:
-    """Load test configuration overrides."""
-    overrides_file = config_dir / "test_overrides.yaml"
-    if overrides_file.exists():
-        try:
-            with open(overrides_file, 'r') as f:
-                return yaml.safe_load(f) or {}
-        except Exception as e:
-            console.print(f"[yellow]⚠️  Error reading test overrides: {e}[/yellow]")
-    return {}
+# Per-tool timeout for ``--version`` style probes and the overall budget (seconds).
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_DEADLINE = 30.0
+DEFAULT_JOBS = 16
+
+# PATH index shared by the probes; main() replaces it with a persistent one.
+TOOLS = ToolIndex()
+
+# Package versions read from dpkg, Homebrew and pipx files for --no-versions.
+INSTALLED = {}
+
+
+@dataclass
+class CheckResult:
+    """Outcome of verifying a single tool or Python package."""
+
+    section: str
+    name: str
+    command: str
+    ok: bool
+    detail: str
+    duration: float = 0.0
+
+def probe_command(cmd: str, name: str, version_flag='--version', section: str = '',
+                  timeout: float = DEFAULT_TIMEOUT, versions: bool = True) -> CheckResult:
+    """Check a command without printing anything.
+
+    The command is looked up in the PATH index, so missing tools cost no
+    process and unchanged binaries report their cached version. With
+    ``versions=False`` only existence is checked, and the package version
+    recorded by its manager is shown instead.
+    """
+    start = time.monotonic()
+    if not versions:
+        path = TOOLS.resolve(cmd)
+        detail = path or 'Not found'
+        if path and INSTALLED.get(name):
+            detail = f"{path} ({name} {INSTALLED[name]})"
+        return CheckResult(section, name, cmd, path is not None, detail, time.monotonic() - start)
+    version = TOOLS.version(cmd, version_flag, timeout)
+    return CheckResult(section, name, cmd, version.ok, version.detail, time.monotonic() - start)
+
+def probe_import(package: str, import_name: str, section: str = 'Python Packages') -> CheckResult:
+    """Check that a Python package is importable without importing it."""
+    start = time.monotonic()
+    try:
+        found = importlib.util.find_spec(import_name) is not None
+    except (ImportError, ValueError):
+        found = False
+    detail = 'Importable' if found else 'Import failed'
+    return CheckResult(section, package, import_name, found, detail, time.monotonic() - start)
+
+def print_result(result: CheckResult) -> None:
+    """Print a check result in the console style used by this script."""
+    display_name = f"{result.name} ({result.command})" if result.command != result.name else result.name
+    if result.ok:
+        console.print(f"[green]✅ {display_name}: {result.detail}[/green]")
+    else:
+        console.print(f"[red]❌ {display_name}: {result.detail}[/red]")
 
 def check_command(cmd: str, name: str, version_flag='--version') -> bool:
     """Check if a command is available and working."""
-    try:
-        result = subprocess.run([cmd, version_flag], capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            version = result.stdout.strip().split('\n')[0]
-            console.print(f"[green]✅ {name}: {version}[/green]")
-            return True
+    result = probe_command(cmd, name, version_flag)
+    print_result(result)
+    return result.ok
+
+def run_checks(checks: list, jobs: int = DEFAULT_JOBS, timeout: float = DEFAULT_TIMEOUT,
+               deadline: float = DEFAULT_DEADLINE, versions: bool = True) -> list:
+    """Run ``(section, cmd, name, version_flag)`` checks concurrently.
+
+    Every probe gets at most ``timeout`` seconds and none may run past the
+    global ``deadline``. Results are returned in input order.
+    """
+    end = time.monotonic() + deadline
+
+    def run_one(check):
+        section, cmd, name, version_flag = check
+        remaining = min(timeout, end - time.monotonic())
+        return probe_command(cmd, name, version_flag, section, remaining, versions)
+
+    if not checks:
+        return []
+    pool = ThreadPoolExecutor(max_workers=max(1, min(jobs, len(checks))))
+    futures = [pool.submit(run_one, check) for check in checks]
+    wait(futures, timeout=max(0.0, end - time.monotonic()))
+    results = []
+    for check, future in zip(checks, futures):
+        if future.done():
+            results.append(future.result())
         else:
-            console.print(f"[red]❌ {name}: Command failed[/red]")
-            return False
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.CalledProcessError):
-        console.print(f"[red]❌ {name}: Not found[/red]")
-        return False
+            future.cancel()
+            section, cmd, name, _ = check
+            results.append(CheckResult(section, name, cmd, False, 'Deadline exceeded', deadline))
+    pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+def write_json(results: list, path: str) -> None:
+    """Write results as JSON to ``path`` (``-`` for stdout)."""
+    payload = json.dumps({
+        'total': len(results),
+        'passed': sum(r.ok for r in results),
+        'results': [asdict(r) for r in results],
+    }, indent=2)
+    if path == '-':
+        sys.stdout.write(payload + '\n')
+    else:
+        Path(path).write_text(payload + '\n')
+
+def write_junit(results: list, path: str) -> None:
+    """Write results as a JUnit XML report."""
+    suite = ET.Element('testsuite', {
+        'name': 'foundry-bootstrap',
+        'tests': str(len(results)),
+        'failures': str(sum(not r.ok for r in results)),
+        'time': f"{sum(r.duration for r in results):.3f}",
+    })
+    for r in results:
+        case = ET.SubElement(suite, 'testcase', {
+            'classname': r.section, 'name': r.name, 'time': f"{r.duration:.3f}",
+        })
+        if not r.ok:
+            ET.SubElement(case, 'failure', {'message': r.detail})
+        else:
+            ET.SubElement(case, 'system-out').text = r.detail
+    ET.ElementTree(suite).write(path, encoding='unicode', xml_declaration=True)
 
 def load_requirements_file(filepath: Path) -> list:
-    """Load requirements from a file."""
+    """Load package names from a requirements.txt file."""
     if not filepath.exists():
         console.print(f"[yellow]⚠️  {filepath} not found[/yellow]")
         return []
     
     try:
         with open(filepath, 'r') as f:
-            if filepath.suffix == '.yaml' or filepath.suffix == '.yml':
-                data = yaml.safe_load(f)
-                return data.get('packages', [])
-            else:
-                # Handle requirements.txt
-                lines = f.readlines()
-                packages = []
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        # Extract package name (remove version specifiers)
-                        package = line.split('>=')[0].split('==')[0].split('<=')[0].split('~=')[0].split('!=')[0]
-                        packages.append(package.strip())
-                return packages
-    except Exception as e:
-        console.print(f"[red]❌ Error reading {filepath}: {e}[/red]")
-        return []
-
-def load_system_packages(filepath: Path, manager: str) -> list:
-    """Load system packages for the given package manager."""
-    if not filepath.exists():
-        console.print(f"[yellow]⚠️  {filepath} not found[/yellow]")
-        return []
-
-    try:
-        with open(filepath, 'r') as f:
-            data = yaml.safe_load(f) or {}
+            lines = f.readlines()
             packages = []
-            entries = data.get('packages') or []
-            for item in entries:
-                name = None
-                override = None
-                if isinstance(item, str):
-                    name = item
-                elif isinstance(item, dict):
-                    if 'name' in item:
-                        name = item.get('name')
-                        override = item.get('apt-override')
-                    elif len(item) == 1:
-                        name, meta = next(iter(item.items()))
-                        if isinstance(meta, dict):
-                            override = meta.get('apt-override')
-                if not name:
-                    continue
-                packages.append(override if manager == 'apt' and override else name)
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    # Extract package name (remove version specifiers)
+                    package = line.split('>=')[0].split('==')[0].split('<=')[0].split('~=')[0].split('!=')[0]
+                    packages.append(package.strip())
             return packages
     except Exception as e:
         console.print(f"[red]❌ Error reading {filepath}: {e}[/red]")
         return []
 
-def get_command_and_version(package: str, overrides: dict, is_linux: bool = False) -> tuple:
+def get_command_and_version(package: str, overrides: VerifyOverrides, is_linux: bool = False) -> tuple:
     """Get the actual command name and version flag for a package."""
-    command_mappings = overrides.get('command_mappings', {})
-    linux_command_mappings = overrides.get('linux_command_mappings', {})
-    version_flags = overrides.get('version_flags', {})
-    
-    # Get the actual command name
-    # Check Linux-specific mappings first if on Linux
-    if is_linux and package in linux_command_mappings:
-        actual_command = linux_command_mappings[package]
-    else:
-        actual_command = command_mappings.get(package, package)
-    
-    # Get the version flag
-    version_flag = version_flags.get(package, '--version')
-    
-    return actual_command, version_flag
+    return overrides.command_for(package, is_linux)
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the foundry-bootstrap setup.")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help='number of tools to probe concurrently')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='seconds allowed for each tool probe')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE,
+                        help='seconds allowed for the whole verification')
+    parser.add_argument('--json', metavar='PATH', help='write results as JSON (- for stdout)')
+    parser.add_argument('--junit', metavar='PATH', help='write results as JUnit XML')
+    parser.add_argument('--no-versions', dest='versions', action='store_false',
+                        help='only check that each tool is on PATH, without running it')
+    parser.add_argument('--config-dir', type=Path, default=Path(__file__).parent / 'config',
+                        help='configuration directory to verify')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Run the test suite."""
+    global TOOLS, INSTALLED
+    args = parse_args(argv)
+    if args.json == '-':
+        # Keep stdout clean for the JSON document.
+        console.file = sys.stderr
     console.print("[bold blue]🧪 Testing foundry-bootstrap setup[/bold blue]\n")
     
     script_dir = Path(__file__).parent
-    config_dir = script_dir / "config"
+    config_dir = args.config_dir
     
-    # Load test overrides
-    overrides = load_test_overrides(config_dir)
+    try:
+        config = load_bootstrap_config(config_dir)
+    except ConfigError as e:
+        console.print(f"[red]❌ Invalid configuration: {e}[/red]")
+        return 1
+    overrides = config.overrides
     
     os_name = platform.system().lower()
-    manager = 'brew' if os_name == 'darwin' else 'apt'
+    backend = detect_backend()
+    manager = backend.name
     is_linux = os_name == 'linux'
+    TOOLS = ToolIndex(overrides=overrides, is_linux=is_linux, cache_path=default_cache_dir() / 'tools.json')
+    if not args.versions:
+        inventory = Inventory()
+        INSTALLED = {**(inventory.versions('pipx') or {}), **(backend.installed() or {})}
 
     # Load tools from configuration files
-    system_packages = load_system_packages(config_dir / "packages.yaml", manager)
-    pipx_packages = load_requirements_file(config_dir / "pipx.yaml")
+    system_packages = config.system_packages(manager)
+    pipx_packages = list(config.pipx)
     python_packages = load_requirements_file(script_dir / "requirements.txt")
 
     console.print(f"[dim]Loaded {len(system_packages)} system packages, {len(pipx_packages)} pipx packages, {len(python_packages)} Python packages[/dim]\n")
     
     # Special cases: core tools always required
-    if manager == 'brew':
-        special_tools = [
-            ('brew', 'Homebrew'),
-            ('pyenv', 'pyenv'),
-            ('python3', 'Python 3'),
-            ('pip3', 'pip3'),
-            ('pipx', 'pipx'),
-        ]
-    else:
-        special_tools = [
-            ('apt-get', 'apt-get'),
-            ('pyenv', 'pyenv'),
-            ('python3', 'Python 3'),
-            ('pip3', 'pip3'),
-            ('pipx', 'pipx'),
-        ]
-    
-    # Test special tools first
-    console.print("[bold]Core Tools (Special):[/bold]")
-    special_success = all(check_command(cmd, name) for cmd, name in special_tools)
-    console.print()
-    
-    # Test system packages
-    console.print("[bold]System Packages:[/bold]")
-    system_results = []
-    for package in system_packages:
-        actual_command, version_flag = get_command_and_version(package, overrides, is_linux)
-        display_name = f"{package} ({actual_command})" if actual_command != package else package
-        system_results.append(check_command(actual_command, display_name, version_flag))
-    system_success = all(system_results)
-    console.print()
-    
-    # Test pipx packages
-    console.print("[bold]pipx Packages:[/bold]")
-    pipx_results = []
-    for package in pipx_packages:
-        actual_command, version_flag = get_command_and_version(package, overrides, is_linux)
-        display_name = f"{package} ({actual_command})" if actual_command != package else package
-        pipx_results.append(check_command(actual_command, display_name, version_flag))
-    pipx_success = all(pipx_results)
-    console.print()
-    
-    # Test Python packages (import them)
-    console.print("[bold]Python Packages:[/bold]")
-    python_results = []
+    special_tools = [
+        (backend.executable, backend.title),
+        ('pyenv', 'pyenv'),
+        ('python3', 'Python 3'),
+        ('pip3', 'pip3'),
+        ('pipx', 'pipx'),
+    ]
+
+    checks = [('Core Tools (Special)', cmd, name, '--version') for cmd, name in special_tools]
+    for section, packages in (('System Packages', system_packages), ('pipx Packages', pipx_packages)):
+        for package in packages:
+            actual_command, version_flag = TOOLS.command_for(package)
+            checks.append((section, actual_command, package, version_flag))
+
+    results = run_checks(checks, args.jobs, args.timeout, args.deadline, args.versions)
+    TOOLS.save()
+    # Python packages are located with importlib instead of being imported here.
     for package in python_packages:
-        # Use command mapping for Python packages too
         actual_import_name, _ = get_command_and_version(package, overrides, is_linux)
-        try:
-            __import__(actual_import_name)
-            display_name = f"{package} ({actual_import_name})" if actual_import_name != package else package
-            console.print(f"[green]✅ {display_name}: Imported successfully[/green]")
-            python_results.append(True)
-        except ImportError:
-            console.print(f"[red]❌ {package}: Import failed[/red]")
-            python_results.append(False)
-    python_success = all(python_results)
+        results.append(probe_import(package, actual_import_name))
+
+    section = None
+    for result in results:
+        if result.section != section:
+            if section is not None:
+                console.print()
+            section = result.section
+            console.print(f"[bold]{section}:[/bold]")
+        print_result(result)
     console.print()
     
     # Summary
-    total_tools = len(special_tools) + len(system_packages) + len(pipx_packages) + len(python_packages)
-    successful_tools = sum([
-        special_success * len(special_tools),
-        system_success * len(system_packages),
-        pipx_success * len(pipx_packages),
-        python_success * len(python_packages)
-    ])
+    total_tools = len(results)
+    successful_tools = sum(r.ok for r in results)
     
     console.print(f"[bold]Summary:[/bold] {successful_tools}/{total_tools} tools available")
+
+    if args.json:
+        write_json(results, args.json)
+    if args.junit:
+        write_junit(results, args.junit)
     
     if successful_tools == total_tools:
         console.print("[bold green]🎉 All tools installed successfully![/bold green]")
@@ -216,4 +278,4 @@ def main():
         return 1
 
 if __name__ == '__main__':
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
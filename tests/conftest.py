@@ -0,0 +1,21 @@
+import pytest
+
+from orchestrate.backends import AptBackend
+from orchestrate.inventory import Inventory
+
+
+@pytest.fixture
+def empty_host(tmp_path):
+    """Orchestrator arguments that keep this machine's packages out of a test.
+
+    Every manager's state is an empty file or directory under ``tmp_path``
+    and the system backend is apt, whatever the host runs.
+    """
+    root = tmp_path / 'host'
+    for directory in ('pipx-venvs', 'node_modules', 'Cellar'):
+        (root / directory).mkdir(parents=True)
+    status = root / 'dpkg-status'
+    status.write_text('')
+    inventory = Inventory(dpkg_status=status, pipx_venvs=root / 'pipx-venvs',
+                          npm_modules=root / 'node_modules', brew_cellar=root / 'Cellar')
+    return {'inventory': inventory, 'backend': AptBackend(status, root / 'update-success-stamp')}
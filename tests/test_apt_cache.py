@@ -0,0 +1,95 @@
+import os
+import time
+
+from orchestrate.apt_cache import (
+    AptCandidate,
+    apt_lists_age,
+    decide_refresh,
+    mark_lists_refreshed,
+    parse_depends,
+    parse_policy,
+    resolve_apt_packages,
+)
+
+POLICY = """\
+jq:
+  Installed: (none)
+  Candidate: 1.7.1-3build1
+  Version table:
+     1.7.1-3build1 500
+        500 http://archive.ubuntu.com/ubuntu noble/main amd64 Packages
+awk:
+  Installed: (none)
+  Candidate: (none)
+  Version table:
+"""
+
+
+def test_parse_policy():
+    parsed = parse_policy(POLICY)
+    assert parsed['jq'] == AptCandidate(True, '1.7.1-3build1')
+    assert parsed['awk'] == AptCandidate(False, None)
+
+
+def test_resolve_uses_single_call(monkeypatch, tmp_path):
+    log = tmp_path / 'calls'
+    fake = tmp_path / 'apt-cache'
+    fake.write_text(f"#!/bin/sh\necho \"$@\" >> {log}\ncat <<'OUT'\n{POLICY}OUT\n")
+    fake.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{tmp_path}:/usr/bin:/bin")
+
+    result = resolve_apt_packages(['jq', 'awk', 'nosuchpkg'])
+
+    assert log.read_text().splitlines() == ['policy jq awk nosuchpkg']
+    assert result['jq'].available and result['jq'].version == '1.7.1-3build1'
+    assert not result['awk'].available
+    assert result['nosuchpkg'] == AptCandidate(False, None)
+
+
+def test_decide_refresh_policies():
+    fresh = {'jq': AptCandidate(True, '1.7')}
+    unresolved = {'jq': AptCandidate(True, '1.7'), 'just': AptCandidate(False, None)}
+    assert decide_refresh('always', 10, fresh).refresh
+    assert not decide_refresh('never', None, unresolved).refresh
+    assert decide_refresh('auto', None, fresh).refresh
+    assert decide_refresh('auto', 7200, fresh, ttl=3600).refresh
+    assert decide_refresh('auto', 60, unresolved, ttl=3600).refresh
+    assert not decide_refresh('auto', 60, fresh, ttl=3600).refresh
+
+
+def test_apt_lists_age(tmp_path):
+    stamp = tmp_path / 'update-success-stamp'
+    assert apt_lists_age(tmp_path, stamp) is None
+    (tmp_path / 'lock').write_text('')
+    assert apt_lists_age(tmp_path, stamp) is None
+    (tmp_path / 'archive.ubuntu.com_dists_noble_InRelease').write_text('')
+    assert apt_lists_age(tmp_path, stamp) < 60
+
+
+def test_apt_lists_age_prefers_update_stamp(tmp_path):
+    stamp = tmp_path / 'periodic' / 'update-success-stamp'
+    listing = tmp_path / 'archive.ubuntu.com_dists_noble_InRelease'
+    listing.write_text('')
+    os.utime(listing, (time.time() - 86400, time.time() - 86400))
+    assert apt_lists_age(tmp_path, stamp) > 86000
+    mark_lists_refreshed(stamp)
+    assert apt_lists_age(tmp_path, stamp) < 60
+
+
+DEPENDS = """\
+jq
+  Depends: libjq1
+  Depends: libc6
+libjq1
+  Depends: libonig5
+  Depends: <awk>
+    mawk
+<awk>
+libc6
+  PreDepends: libgcc-s1
+libgcc-s1:amd64
+"""
+
+
+def test_parse_depends_lists_real_packages_once():
+    assert parse_depends(DEPENDS) == ['jq', 'libjq1', 'libc6', 'libgcc-s1']
@@ -0,0 +1,67 @@
+from orchestrate.apt_cache import AptCandidate
+from orchestrate.artifacts import ArtifactCache
+from orchestrate.main import BootstrapOrchestrator
+
+
+def test_install_flags_point_at_cache(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    cache.ensure()
+    assert cache.apt_options() == ['-o', f'Dir::Cache::archives={tmp_path / "apt"}']
+    assert cache.pip_env({})['PIP_FIND_LINKS'] == str(tmp_path / 'wheels')
+    assert 'PIP_NO_INDEX' not in cache.pip_env({})
+    assert cache.npm_args()[-1] == '--prefer-offline'
+
+
+def test_offline_mode_forbids_downloads(tmp_path):
+    cache = ArtifactCache(tmp_path, offline=True)
+    assert '--no-download' in cache.apt_options()
+    assert cache.pip_env({})['PIP_NO_INDEX'] == '1'
+    assert '--offline' in cache.npm_args()
+
+
+def test_fallback_prefers_cached_script(monkeypatch, tmp_path, empty_host):
+    cache = ArtifactCache(tmp_path / 'artifacts')
+    cache.ensure()
+    (cache.scripts_dir / 'just.sh').write_text('exit 0\n')
+    orch = BootstrapOrchestrator(tmp_path, artifacts=cache, **empty_host)
+    calls = []
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: calls.append(cmd) or True)
+    assert orch.install_fallback('just') is True
+    assert orch.install_fallback('direnv') is True
+    assert calls[0] == ['bash', str(cache.scripts_dir / 'just.sh'), '--to', '/usr/local/bin']
+    assert 'curl' in calls[1][2]
+
+
+def test_offline_fallback_without_cached_script_fails(monkeypatch, tmp_path, empty_host):
+    cache = ArtifactCache(tmp_path / 'artifacts', offline=True)
+    cache.ensure()
+    orch = BootstrapOrchestrator(tmp_path, artifacts=cache, **empty_host)
+    calls = []
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: calls.append(cmd) or True)
+    assert orch.install_fallback('direnv') is False
+    assert orch.install_fallback('gh') is False
+    assert calls == []
+
+
+def test_prefetch_downloads_every_manager(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'packages.yaml').write_text('packages:\n  - git\n  - just\n')
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n')
+    (tmp_path / 'npm.yaml').write_text('packages:\n  - prettier\n')
+    cache = ArtifactCache(tmp_path / 'artifacts')
+    orch = BootstrapOrchestrator(tmp_path, artifacts=cache, apt_refresh='never', **empty_host)
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(
+        orch, 'resolve_packages',
+        lambda backend, pkgs: {p: AptCandidate(p == 'git', '1.0' if p == 'git' else None) for p in pkgs},
+    )
+    commands = []
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: commands.append(cmd) or True)
+    monkeypatch.setattr(orch, 'fetch_script', lambda c, pkg: commands.append(['fetch', pkg]) or True)
+    monkeypatch.setattr('orchestrate.backends.apt_dependency_closure', lambda pkgs: [*pkgs, 'libc6', 'perl-base'])
+
+    assert orch.prefetch() is True
+    assert ['fetch', 'just'] in commands
+    apt = next(c for c in commands if c[0] == 'apt-get')
+    assert apt == ['apt-get', 'download', 'git', 'libc6', 'perl-base']
+    assert any('download' in c and 'black' in c for c in commands)
+    assert any(c[0] == 'npm' and 'prettier' in c for c in commands)
@@ -0,0 +1,184 @@
+from pathlib import Path
+
+import pytest
+
+from orchestrate.backends import (
+    ApkBackend,
+    BrewBackend,
+    DnfBackend,
+    PackageBackend,
+    PacmanBackend,
+    detect_backend,
+)
+from orchestrate.inventory import Inventory
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.state import StateCache
+from orchestrate.todo import MissingPackages
+
+# Each fake manager logs its arguments and knows the packages jq and
+# nodejs; pacman's -Si exits 1 because one name is unknown, as the real one does.
+FAKE_MANAGERS = {
+    'dnf': """#!/bin/sh
+echo "dnf $2" >> "$CALLS"
+[ "$2" = repoquery ] && printf 'jq 1.7.1-3.fc40\\nnodejs 20.12.2-1.fc40\\n'
+exit 0
+""",
+    'rpm': """#!/bin/sh
+echo "rpm $*" >> "$CALLS"
+printf 'bash 5.2.26-3.fc40\\ngit 2.45.0-1.fc40\\n'
+""",
+    'apk': """#!/bin/sh
+echo "apk $*" >> "$CALLS"
+[ "$1" = search ] && printf 'jq-1.7.1-r0\\nnodejs-20.12.1-r0\\n'
+exit 0
+""",
+    'pacman': """#!/bin/sh
+echo "pacman $*" >> "$CALLS"
+if [ "$1" = -Si ]; then
+    printf 'Repository      : extra\\nName            : jq\\nVersion         : 1.7.1-2\\n\\n'
+    printf 'Repository      : extra\\nName            : nodejs\\nVersion         : 22.2.0-1\\n\\n'
+    echo "error: package 'fd-find' was not found" >&2
+    exit 1
+fi
+""",
+}
+
+
+@pytest.fixture
+def fake_managers(monkeypatch, tmp_path):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    for name, body in FAKE_MANAGERS.items():
+        (bin_dir / name).write_text(body)
+        (bin_dir / name).chmod(0o755)
+    calls = tmp_path / 'calls'
+    calls.write_text('')
+    monkeypatch.setenv('PATH', f"{bin_dir}:/usr/bin:/bin")
+    monkeypatch.setenv('CALLS', str(calls))
+    return calls
+
+
+@pytest.mark.parametrize('backend, versions', [
+    (DnfBackend(), ('1.7.1-3.fc40', '20.12.2-1.fc40')),
+    (ApkBackend(), ('1.7.1-r0', '20.12.1-r0')),
+    (PacmanBackend(), ('1.7.1-2', '22.2.0-1')),
+])
+def test_availability_is_one_query(fake_managers, backend, versions):
+    found = backend.available(['jq', 'nodejs', 'fd-find'])
+    assert {pkg: c.version for pkg, c in found.items()} == {'jq': versions[0], 'nodejs': versions[1], 'fd-find': None}
+    assert [c.available for c in found.values()] == [True, True, False]
+    assert len(fake_managers.read_text().splitlines()) == 1
+
+
+def test_installed_packages(fake_managers, tmp_path):
+    assert DnfBackend().installed() == {'bash': '5.2.26-3.fc40', 'git': '2.45.0-1.fc40'}
+
+    db = tmp_path / 'installed'
+    db.write_text('C:Q1abc=\nP:musl\nV:1.2.5-r0\nA:x86_64\n\nP:jq\nV:1.7.1-r0\n\n')
+    assert ApkBackend(db).installed() == {'musl': '1.2.5-r0', 'jq': '1.7.1-r0'}
+
+    local = tmp_path / 'local'
+    (local / 'jq-1.7.1-2').mkdir(parents=True)
+    (local / 'jq-1.7.1-2' / 'desc').write_text('%NAME%\njq\n\n%VERSION%\n1.7.1-2\n\n%BASE%\njq\n')
+    (local / 'ALPM_DB_VERSION').write_text('9\n')
+    assert PacmanBackend(local).installed() == {'jq': '1.7.1-2'}
+    assert PacmanBackend(tmp_path / 'missing').installed() is None
+
+
+def test_incomplete_backend_fails_when_created():
+    class NoRefresh(PackageBackend):
+        def available(self, packages):
+            return {}
+
+        def installed(self):
+            return {}
+
+        def install_command(self, packages):
+            return []
+
+        def remove_command(self, packages):
+            return []
+
+    with pytest.raises(TypeError, match='refresh_command'):
+        NoRefresh()
+
+
+def test_pacman_never_syncs_without_upgrading():
+    backend = PacmanBackend()
+    commands = [backend.refresh_command(), backend.install_command(['jq']),
+                backend.download_command(['jq'], Path('/tmp'))]
+    sync_flags = [arg for cmd in commands for arg in cmd if arg.startswith('-S')]
+    assert sync_flags == ['-Syu', '-S', '-Sw']
+    assert all('u' in flag for flag in sync_flags if 'y' in flag)
+
+
+def test_detect_backend():
+    assert detect_backend('darwin').name == 'brew'
+    assert detect_backend('linux', lambda cmd: cmd if cmd in ('dnf', 'pacman') else None).name == 'dnf'
+    assert detect_backend('linux', lambda cmd: None).name == 'apt'
+
+
+def test_orchestrator_installs_with_one_batch_per_operation(fake_managers, tmp_path):
+    (tmp_path / 'packages.yaml').write_text(
+        'packages:\n  - jq\n  - node:\n      pacman-override: nodejs\n  - fd-find\n  - git\n'
+    )
+    local = tmp_path / 'local'
+    (local / 'git-2.45.0-1').mkdir(parents=True)
+    (local / 'git-2.45.0-1' / 'desc').write_text('%NAME%\ngit\n\n%VERSION%\n2.45.0-1\n')
+    missing = MissingPackages(tmp_path / 'TODO.md', 'orchestrator')
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), apt_refresh='never',
+                                 backend=PacmanBackend(local), missing=missing)
+
+    assert orch.install_system_packages() is True
+    assert fake_managers.read_text().splitlines() == [
+        'pacman -Si jq nodejs fd-find',
+        'pacman -S --needed --noconfirm jq nodejs',
+    ]
+    assert orch.failed_packages['system'] == {'fd-find'}
+    assert missing.pending() == ['fd-find']
+    assert orch.state.pending('pacman', ['jq', 'nodejs', 'git', 'fd-find']) == ['fd-find']
+
+
+def test_orchestrator_refreshes_metadata_when_a_package_is_missing(fake_managers, tmp_path):
+    # nodejs only resolves once ``dnf makecache`` has run.
+    (tmp_path / 'bin' / 'dnf').write_text(f"""#!/bin/sh
+echo "dnf $*" >> "$CALLS"
+case "$1" in
+    makecache) touch {tmp_path}/made ;;
+    -q) echo 'jq 1.7.1-3.fc40'; [ -e {tmp_path}/made ] && echo 'nodejs 20.12.2-1.fc40' ;;
+esac
+exit 0
+""")
+    (tmp_path / 'packages.yaml').write_text('packages:\n  - jq\n  - node:\n      dnf-override: nodejs\n  - git\n')
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), backend=DnfBackend(),
+                                 missing=MissingPackages(tmp_path / 'TODO.md', 'orchestrator'))
+
+    assert orch.install_system_packages() is True
+    # --queryformat ends in a newline, so keep only the lines naming a manager.
+    calls = [call for call in fake_managers.read_text().splitlines() if call.startswith(('dnf', 'rpm'))]
+    assert [call.split()[1] for call in calls] == ['-qa', '-q', 'makecache', '-q', 'install']
+    assert calls[-1] == 'dnf install -y jq nodejs'
+    assert orch.report['dnf_refresh']['action'] == 'update'
+
+
+def test_brew_installs_in_one_batch(fake_managers, tmp_path):
+    (tmp_path / 'bin' / 'brew').write_text("""#!/bin/sh
+echo "brew $*" >> "$CALLS"
+case "$1" in
+    formulae) printf 'jq\\nripgrep\\n' ;;
+    casks) printf 'iterm2\\n' ;;
+esac
+""")
+    (tmp_path / 'bin' / 'brew').chmod(0o755)
+    (tmp_path / 'packages.yaml').write_text('packages:\n  - jq\n  - ripgrep\n  - iterm2\n  - nope\n')
+    cellar = tmp_path / 'Cellar'
+    cellar.mkdir()
+    missing = MissingPackages(tmp_path / 'TODO.md', 'orchestrator')
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), backend=BrewBackend(cellar), missing=missing,
+                                 inventory=Inventory(brew_cellar=cellar), jobs=4)
+
+    assert orch.install_system_packages() is True
+    assert fake_managers.read_text().splitlines() == [
+        'brew formulae', 'brew casks', 'brew install jq ripgrep iterm2',
+    ]
+    assert missing.pending() == ['nope']
@@ -0,0 +1,60 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+from orchestrate.backends import BrewBackend
+
+BENCH = Path(__file__).resolve().parent.parent / 'scripts' / 'bench_orchestrator.py'
+
+
+def load_bench():
+    spec = importlib.util.spec_from_file_location('bench_orchestrator', BENCH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_run_scenario_batches_manager_calls():
+    bench = load_bench()
+    small = bench.bench('run', 3)
+    large = bench.bench('run', 12)
+    assert small['ok'] and large['ok']
+    # apt and npm install in one call each; only pipx installs tool by tool.
+    assert large['manager_calls'] - small['manager_calls'] == 12 - 3
+
+
+def test_manager_calls_are_reported_per_run():
+    bench = load_bench()
+    result = bench.bench('run', 3, runs=3)
+    assert result['ok']
+    assert len(result['manager_calls_per_run']) == 3
+    assert result['manager_calls'] == sorted(result['manager_calls_per_run'])[1]
+
+
+def test_fake_brew_answers_the_backend(tmp_path):
+    bench = load_bench()
+    env = bench.FakeEnvironment(tmp_path / 'bench', 2, missing=1)
+    with env.activate():
+        availability = BrewBackend().available(['missing-0000', 'sys-0001'])
+    assert not availability['missing-0000'].available
+    assert availability['sys-0001'].available
+
+
+def test_verify_scenario_with_missing_packages():
+    bench = load_bench()
+    result = bench.bench('verify', 5, missing=2)
+    assert result['ok']
+    assert result['manager_calls'] == 1
+
+
+def test_regressions():
+    bench = load_bench()
+    baseline = [{'scenario': 'run', 'packages': 10, 'seconds': 1.0, 'manager_calls': 18}]
+    fast = [{'scenario': 'run', 'packages': 10, 'seconds': 1.1, 'manager_calls': 18}]
+    slow = [{'scenario': 'run', 'packages': 10, 'seconds': 1.5, 'manager_calls': 30}]
+    assert bench.regressions(fast, baseline, 0.25, {}) == []
+    assert len(bench.regressions(slow, baseline, 0.25, {})) == 2
+    assert bench.regressions(fast, [], 0.25, bench.parse_limits(['run@10=1.0'])) == [
+        'run@10: 1.1s exceeds limit 1.0s'
+    ]
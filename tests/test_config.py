@@ -0,0 +1,71 @@
+import importlib.util
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from orchestrate import config as config_module
+from orchestrate.config import (
+    ConfigError,
+    load_bootstrap_config,
+    read_snapshot,
+    write_snapshot,
+)
+
+
+def _write_config(config):
+    (config / 'packages.yaml').write_text(
+        'packages:\n  - name: jq\n  - name: node\n    apt-override: nodejs\n  - fd:\n      apt-override: fd-find\n'
+    )
+    (config / 'pipx.yaml').write_text('packages:\n  - black\n  - ruff\n')
+    (config / 'npm.yaml').write_text('packages:\n  - "@mermaid-js/mermaid-cli"\n')
+    (config / 'test_overrides.yaml').write_text(
+        'command_mappings:\n  fd: fdfind\nlinux_command_mappings:\n  bat: batcat\nversion_flags:\n  tmux: -V\n'
+    )
+    (config / 'pyenv_version.txt').write_text('3.12.0\n')
+
+
+def test_load_bootstrap_config(tmp_path):
+    _write_config(tmp_path)
+    config = load_bootstrap_config(tmp_path)
+    assert config.system_packages('apt') == ['jq', 'nodejs', 'fd-find']
+    assert config.system_packages('brew') == ['jq', 'node', 'fd']
+    assert config.pipx == ('black', 'ruff')
+    assert config.overrides.command_for('bat', is_linux=True) == ('batcat', '--version')
+    assert config.overrides.command_for('tmux') == ('tmux', '-V')
+    assert config.pyenv_version == '3.12.0'
+    assert load_bootstrap_config(tmp_path) is config
+
+
+def test_invalid_entry_raises(tmp_path):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - {a: 1, b: 2}\n')
+    with pytest.raises(ConfigError):
+        load_bootstrap_config(tmp_path)
+
+
+def test_snapshot_round_trip_and_shell(tmp_path):
+    _write_config(tmp_path)
+    config = load_bootstrap_config(tmp_path)
+    json_path, shell_path = write_snapshot(tmp_path)
+    assert read_snapshot(tmp_path) == config
+
+    out = subprocess.run(
+        ['bash', '-c', f'source {shell_path}; echo "${{FOUNDRY_APT_PACKAGES[1]}} ${{#FOUNDRY_NPM_PACKAGES[@]}}"'],
+        capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip() == 'nodejs 1'
+
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n')
+    assert read_snapshot(tmp_path) is None
+
+
+def test_verify_script_reads_the_snapshot_without_yaml(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location(
+        'verify_apt_packages', Path(__file__).resolve().parent.parent / 'scripts' / 'verify_apt_packages.py')
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    (tmp_path / 'packages.yaml').write_text('packages:\n  - jq\n  - fd:\n      apt-override: fd-find\n')
+    write_snapshot(tmp_path)
+    monkeypatch.setattr(script, 'CONFIG_DIR', tmp_path)
+    monkeypatch.setattr(config_module, 'read_yaml', lambda path: pytest.fail('parsed YAML'))
+    assert script.load_packages() == ['jq', 'fd-find']
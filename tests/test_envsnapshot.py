@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from orchestrate.config import BootstrapConfig
+from orchestrate import envsnapshot
+from orchestrate.envsnapshot import SnapshotError, SnapshotRoots, export_snapshot, import_snapshot, relocate_tree
+
+
+def _roots(base):
+    return SnapshotRoots(
+        home=base,
+        pyenv_root=base / '.pyenv',
+        pipx_home=base / '.local' / 'share' / 'pipx',
+        pipx_bin=base / '.local' / 'bin',
+        npm_prefix=base / '.npm-global',
+    )
+
+
+def _environment(roots):
+    python = roots.pyenv_root / 'versions' / '3.12.1' / 'bin' / 'python3.12'
+    python.parent.mkdir(parents=True)
+    python.write_text('#!/bin/sh\n')
+    python.chmod(0o755)
+    prefix = python.parent.parent
+    (prefix / 'bin' / 'python3.12-config').write_text(f'#!/bin/sh\nprefix="{prefix}"\n')
+    (prefix / 'lib' / 'pkgconfig').mkdir(parents=True)
+    (prefix / 'lib' / 'pkgconfig' / 'python-3.12.pc').write_text(f'prefix={prefix}\n')
+    (prefix / 'lib' / 'python3.12').mkdir()
+    (prefix / 'lib' / 'python3.12' / '_sysconfigdata__linux_x86_64-linux-gnu.py').write_text(
+        f"build_time_vars = {{'prefix': '{prefix}', 'LDFLAGS': '-L{prefix}/lib'}}\n")
+
+    venv = roots.pipx_home / 'venvs' / 'ruff'
+    (venv / 'bin').mkdir(parents=True)
+    (venv / 'bin' / 'python').symlink_to(python)
+    (venv / 'pyvenv.cfg').write_text(f"home = {python.parent}\n")
+    (venv / 'bin' / 'ruff').write_text(f"#!{venv}/bin/python\nprint('{venv}')\n")
+    roots.pipx_bin.mkdir(parents=True)
+    (roots.pipx_bin / 'ruff').symlink_to(venv / 'bin' / 'ruff')
+
+    package = roots.npm_prefix / 'lib' / 'node_modules' / 'prettier'
+    package.mkdir(parents=True)
+    (package / 'package.json').write_text(json.dumps({'version': '3.1.0'}))
+    (package / 'bin.js').write_text('#!/usr/bin/env node\n')
+    (roots.npm_prefix / 'bin').mkdir()
+    (roots.npm_prefix / 'bin' / 'prettier').symlink_to('../lib/node_modules/prettier/bin.js')
+
+
+CONFIG = BootstrapConfig(pipx=('ruff', 'black'), npm=('prettier',), pyenv_version='3.12.1',
+                         npm_pins={'prettier': '3.1.0'})
+
+
+def test_export_is_reproducible_and_lists_what_is_missing(tmp_path):
+    roots = _roots(tmp_path / 'src')
+    _environment(roots)
+    first, manifest = export_snapshot(CONFIG, tmp_path / 'a', roots)
+    second, _ = export_snapshot(CONFIG, tmp_path / 'b', roots)
+    assert first.name == second.name and first.read_bytes() == second.read_bytes()
+    assert manifest['trees'] == ['pyenv/3.12.1', 'pipx/ruff', 'npm/prettier']
+    assert manifest['missing'] == {'pipx': ['black']}
+
+
+def test_import_relocates_into_a_different_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    source, target = _roots(tmp_path / 'src'), _roots(tmp_path / 'dst')
+    _environment(source)
+    archive, _ = export_snapshot(CONFIG, tmp_path / 'out', source)
+
+    report = import_snapshot(archive, CONFIG, target)
+    assert report.restored == ['pyenv/3.12.1', 'pipx/ruff', 'npm/prettier']
+    assert report.missing == {'pipx': ['black']} and report.problems == []
+
+    venv = target.pipx_home / 'venvs' / 'ruff'
+    assert os.readlink(venv / 'bin' / 'python') == str(target.pyenv_root / 'versions' / '3.12.1' / 'bin' / 'python3.12')
+    assert (venv / 'bin' / 'python').exists()
+    assert (venv / 'pyvenv.cfg').read_text() == f"home = {target.pyenv_root}/versions/3.12.1/bin\n"
+    script = (venv / 'bin' / 'ruff').read_text()
+    assert script.startswith(f"#!{venv}/bin/python\n") and str(tmp_path / 'src') in script
+    assert (target.pipx_bin / 'ruff').resolve() == (venv / 'bin' / 'ruff').resolve()
+    assert (target.npm_prefix / 'bin' / 'prettier').exists()
+
+    prefix = target.pyenv_root / 'versions' / '3.12.1'
+    assert (prefix / 'bin' / 'python3.12-config').read_text() == f'#!/bin/sh\nprefix="{prefix}"\n'
+    assert (prefix / 'lib' / 'pkgconfig' / 'python-3.12.pc').read_text() == f'prefix={prefix}\n'
+    sysconfigdata = prefix / 'lib' / 'python3.12' / '_sysconfigdata__linux_x86_64-linux-gnu.py'
+    assert str(tmp_path / 'src') not in sysconfigdata.read_text()
+    assert f"-L{prefix}/lib" in sysconfigdata.read_text()
+
+    again = import_snapshot(archive, CONFIG, target)
+    assert again.restored == [] and len(again.skipped) == 3
+
+
+def test_corrupt_archive_is_rejected(tmp_path):
+    roots = _roots(tmp_path / 'src')
+    _environment(roots)
+    archive, _ = export_snapshot(CONFIG, tmp_path / 'out', roots)
+    data = bytearray(archive.read_bytes())
+    data[-20] ^= 0xFF
+    archive.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match='corrupt'):
+        import_snapshot(archive, CONFIG, _roots(tmp_path / 'dst'))
+
+
+def test_relocation_matches_whole_path_components(tmp_path):
+    venv = tmp_path / 'venv'
+    venv.mkdir()
+    (venv / 'pyvenv.cfg').write_text('home = /home/al/.pyenv/bin\nsource = /home/alice/x /srv/home/al\n')
+    (venv / 'link').symlink_to('/home/alice/bin/tool')
+    assert relocate_tree(venv, [('/home/al', '/home/bo')]) == 1
+    assert (venv / 'pyvenv.cfg').read_text() == 'home = /home/bo/.pyenv/bin\nsource = /home/alice/x /srv/home/al\n'
+    assert os.readlink(venv / 'link') == '/home/alice/bin/tool'
+
+
+def test_import_reports_pyenv_python_that_cannot_load(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    source, target = _roots(tmp_path / 'src'), _roots(tmp_path / 'dst')
+    _environment(source)
+    (source.pyenv_root / 'versions' / '3.12.1' / 'bin' / 'python3').symlink_to('python3.12')
+    archive, _ = export_snapshot(CONFIG, tmp_path / 'out', source)
+    monkeypatch.setattr(envsnapshot, 'missing_libraries', lambda binary: ['libpython3.12.so.1.0'])
+
+    report = import_snapshot(archive, CONFIG, target)
+    assert len(report.problems) == 1
+    assert report.problems[0].startswith('pyenv 3.12.1:') and 'libpython3.12.so.1.0' in report.problems[0]
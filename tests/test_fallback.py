@@ -1,12 +1,15 @@
+from orchestrate.apt_cache import AptCandidate
 from orchestrate.main import BootstrapOrchestrator
 
-def test_fallback_called(monkeypatch, tmp_path):
+def test_fallback_called(monkeypatch, tmp_path, empty_host):
     config = tmp_path
     (config / 'packages.yaml').write_text('packages:\n  - just\n')
-    orch = BootstrapOrchestrator(config)
-    monkeypatch.setattr(orch, 'apt_package_exists', lambda pkg: False)
+    orch = BootstrapOrchestrator(config, **empty_host)
+    monkeypatch.setattr(
+        orch, 'resolve_packages', lambda backend, pkgs: {p: AptCandidate(False, None) for p in pkgs}
+    )
     calls = []
-    def fake_run(cmd, desc, env=None):
+    def fake_run(cmd, desc, env=None, **kwargs):
         calls.append((cmd, desc))
         return True
     monkeypatch.setattr(orch, 'run_command', fake_run)
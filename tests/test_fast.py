@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from orchestrate.config import write_snapshot
+from orchestrate.fast import parse_fast_args, run_fast
+from orchestrate.state import StateCache, fingerprint, manager_stamp
+
+MAIN = Path(__file__).resolve().parent.parent / 'orchestrate' / 'main.py'
+
+
+def test_parse_fast_args():
+    assert parse_fast_args(['status'])['command'] == 'status'
+    assert parse_fast_args(['--config-dir', 'x', 'status', '--json']) == {
+        'config_dir': 'x', 'json': True, 'command': 'status'
+    }
+    assert parse_fast_args(['--jobs', '2', 'status']) is None
+    assert parse_fast_args(['check', '--json']) is None
+    assert parse_fast_args([]) is None
+
+
+def test_status_runs_without_click_or_rich(monkeypatch, tmp_path):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n')
+    write_snapshot(tmp_path)
+    env = {'PATH': '/usr/bin:/bin', 'XDG_CACHE_HOME': str(tmp_path / 'cache'), 'HOME': str(tmp_path)}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', str(MAIN), '--config-dir', str(tmp_path), 'status'],
+                          capture_output=True, text=True, env=env)
+    assert proc.returncode == 0
+    assert 'pipx: 0/1 up to date (pending: black)' in proc.stdout
+    imported = {line.split('|')[-1].strip() for line in proc.stderr.splitlines()}
+    assert not {'click', 'rich', 'yaml', 'ruamel'} & imported
+
+
+def test_check_reports_pending_work(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('PIPX_HOME', str(tmp_path / 'pipx'))
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n')
+    assert run_fast(['--config-dir', str(tmp_path), 'check']) is None  # no snapshot yet
+    write_snapshot(tmp_path)
+    assert run_fast(['--config-dir', str(tmp_path), 'check']) == 1
+    assert capsys.readouterr().out == 'pipx: 1 pending\n'
+
+    state = StateCache.default()
+    state.record('pipx', 'black', fingerprint('pipx', 'black', manager_stamp('pipx')))
+    state.save()
+    assert run_fast(['--config-dir', str(tmp_path), 'check']) == 0
+    assert capsys.readouterr().out == 'up to date\n'
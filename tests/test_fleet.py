@@ -0,0 +1,87 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from orchestrate.config import ConfigError
+from orchestrate.fleet import ContainerTransport, FleetRunner, Host, SshTransport, parse_inventory
+
+FAKE_MAIN = """import sys, time
+print('args', ' '.join(sys.argv[1:]), flush=True)
+time.sleep({delay})
+sys.exit({code})
+"""
+
+
+def make_host(tmp_path, name, delay=0.0, code=0, **kwargs):
+    repo = tmp_path / name
+    (repo / 'orchestrate').mkdir(parents=True)
+    (repo / 'orchestrate' / 'main.py').write_text(FAKE_MAIN.format(delay=delay, code=code))
+    return Host(name, transport='local', repo_dir=str(repo), **kwargs)
+
+
+def test_parse_inventory_applies_defaults(tmp_path):
+    hosts = parse_inventory(
+        {'defaults': {'repo_dir': '/opt/fb', 'jobs': 2},
+         'hosts': ['a', {'name': 'b', 'transport': 'container', 'jobs': 8}]},
+        tmp_path / 'inventory.yaml',
+    )
+    assert hosts == [Host('a', repo_dir='/opt/fb', jobs=2), Host('b', 'container', repo_dir='/opt/fb', jobs=8)]
+    with pytest.raises(ConfigError):
+        parse_inventory({'hosts': [{'name': 'a', 'transport': 'telnet'}]}, tmp_path / 'inventory.yaml')
+    with pytest.raises(ConfigError):
+        parse_inventory({'hosts': ['a', 'a']}, tmp_path / 'inventory.yaml')
+
+
+def test_transport_commands():
+    host = Host('box', address='me@box', container='dev', repo_dir='/opt/fb dir')
+    assert SshTransport().command(host, ['--jobs', '2']) == [
+        'ssh', '-o', 'BatchMode=yes', 'me@box', "cd '/opt/fb dir' && python3 orchestrate/main.py --jobs 2"
+    ]
+    assert ContainerTransport('podman').command(host, []) == [
+        'podman', 'exec', '-w', '/opt/fb dir', 'dev', 'python3', 'orchestrate/main.py'
+    ]
+
+
+def test_hosts_run_concurrently_and_stream_output(tmp_path):
+    hosts = [make_host(tmp_path, f"h{i}", delay=0.5, jobs=3) for i in range(4)]
+    lines = []
+    start = time.monotonic()
+    results = FleetRunner(parallel=4).run(hosts, ['--plan'], on_line=lambda h, l: lines.append((h, l)))
+    assert time.monotonic() - start < 1.5
+    assert [r.status for r in results] == ['ok'] * 4
+    assert ('h0', 'args --config-dir config --jobs 3 --plan') in lines
+
+
+def test_config_dir_from_argv_is_kept(tmp_path):
+    host = make_host(tmp_path, 'h')
+    lines = []
+    FleetRunner().run([host], ['--config-dir=/etc/fb'], on_line=lambda h, l: lines.append(l))
+    assert lines == ['args --config-dir=/etc/fb']
+
+
+def test_local_host_uses_checkout_config(tmp_path):
+    repo = Path(__file__).resolve().parent.parent
+    host = Host('local', transport='local', repo_dir=str(repo), python=sys.executable)
+    lines = []
+    results = FleetRunner().run([host], ['--no-state-cache', '--plan'], on_line=lambda h, l: lines.append(l))
+    assert results[0].status == 'ok', results[0].tail
+    assert any('Critical path' in line for line in lines)
+
+
+def test_fail_fast_skips_hosts_not_started(tmp_path):
+    hosts = [make_host(tmp_path, 'bad', code=1), make_host(tmp_path, 'next')]
+    results = FleetRunner(parallel=1, policy='fail-fast').run(hosts, [])
+    assert [r.status for r in results] == ['failed', 'skipped']
+    results = FleetRunner(parallel=1, policy='continue').run(hosts, [])
+    assert [r.status for r in results] == ['failed', 'ok']
+
+
+def test_host_that_cannot_start_fails_alone(tmp_path):
+    wrapper = tmp_path / 'python'
+    wrapper.write_text('#!/bin/sh\n')
+    hosts = [make_host(tmp_path, 'bad', python=str(wrapper)), make_host(tmp_path, 'good')]
+    results = FleetRunner(parallel=2).run(hosts, [])
+    assert [r.status for r in results] == ['failed', 'ok']
+    assert results[0].exit_code == 126 and 'Permission denied' in results[0].tail[0]
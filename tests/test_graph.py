@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from orchestrate.graph import FAILED, OK, SKIPPED, GraphError, TaskGraph
+from orchestrate.main import BootstrapOrchestrator
+
+
+def test_order_and_critical_path():
+    graph = TaskGraph()
+    graph.add('system', lambda: True, weight=5)
+    graph.add('pipx', lambda: True, weight=3)
+    graph.add('npm', lambda: True, ['system:node'], weight=2)
+    assert graph.topological_order() == ['system', 'pipx', 'npm']
+    assert graph.critical_path() == (['system', 'npm'], 7)
+    assert graph.parallelism() == pytest.approx(10 / 7)
+
+
+def test_cycles_and_unknown_steps_are_rejected():
+    graph = TaskGraph()
+    graph.add('a', lambda: True, ['b'])
+    graph.add('b', lambda: True, ['a'])
+    with pytest.raises(GraphError):
+        graph.topological_order()
+    graph = TaskGraph()
+    graph.add('a', lambda: True, ['missing'])
+    with pytest.raises(GraphError):
+        graph.topological_order()
+
+
+def test_independent_nodes_run_concurrently():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return True
+
+    graph = TaskGraph()
+    graph.add('system', work)
+    graph.add('pipx', work)
+    graph.add('npm', work, ['system'])
+    results = graph.run(jobs=2)
+    assert all(r.status == OK for r in results.values())
+    assert peak[0] == 2
+
+
+def test_failed_roots_skip_their_subtree():
+    graph = TaskGraph()
+    graph.add('system', lambda: False)
+    graph.add('pipx', lambda: True)
+    graph.add('npm', lambda: True, ['system:node'])
+    graph.add('direnv', lambda: True, ['system:direnv'])
+    graph.add('lint', lambda: True, ['npm'])
+
+    results = graph.run(jobs=2, item_failed=lambda node, item: item == 'node')
+    assert results['system'].status == FAILED
+    assert results['pipx'].status == OK
+    assert results['npm'].status == SKIPPED
+    assert results['lint'].status == SKIPPED
+    assert results['direnv'].status == OK
+
+
+def test_config_requires_add_edges(tmp_path):
+    (tmp_path / 'packages.yaml').write_text('packages:\n  - name: node\n    apt-override: nodejs\n')
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - name: pre-commit\n    requires: [node]\n  - black\n')
+    graph = BootstrapOrchestrator(tmp_path).build_graph()
+    assert [str(r) for r in graph.nodes['pipx'].requires] == ['system:node']
+    assert [str(r) for r in graph.nodes['npm'].requires] == ['system:node']
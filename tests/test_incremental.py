@@ -0,0 +1,52 @@
+from orchestrate.diff import diff_entries
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.state import StateCache
+
+
+def test_diff_entries():
+    diff = diff_entries({'fd': 'fd-find', 'jq': 'jq', 'old': 'old'}, {'fd': 'fd', 'jq': 'jq', 'new': 'new'})
+    assert diff.added == {'new': 'new'}
+    assert diff.removed == {'old': 'old'}
+    assert diff.changed == {'fd': ('fd-find', 'fd')}
+    assert diff.to_install() == ['new', 'fd']
+    assert diff.to_remove({'fd': 'fd', 'jq': 'jq', 'new': 'new'}) == ['old', 'fd-find']
+    assert not diff_entries({'jq': 'jq'}, {'jq': 'jq'})
+
+
+def make_orchestrator(monkeypatch, config, state, empty_host, **kwargs):
+    orch = BootstrapOrchestrator(config, jobs=1, state=state, **empty_host, **kwargs)
+    commands = []
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(orch, 'list_installed', lambda cmd: commands.append(cmd) or '')
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: commands.append(cmd) or True)
+    return orch, commands
+
+
+def test_incremental_apply_installs_only_new_entries(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n')
+    state = StateCache()
+    orch, commands = make_orchestrator(monkeypatch, tmp_path, state, empty_host, incremental=True)
+    assert orch._phase('pipx', orch.install_pipx_packages)() is True
+    assert ['pipx', 'install', 'black'] in commands
+    assert state.applied('pipx') == {'black': 'black'}
+
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n  - ruff\n')
+    orch, commands = make_orchestrator(monkeypatch, tmp_path, state, empty_host, incremental=True)
+    assert orch._phase('pipx', orch.install_pipx_packages)() is True
+    assert [c for c in commands if c[:2] == ['pipx', 'install']] == [['pipx', 'install', 'ruff']]
+
+
+def test_prune_removes_dropped_entries(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n')
+    state = StateCache()
+    state.record_applied('pipx', {'black': 'black', 'httpie': 'httpie'})
+
+    orch, commands = make_orchestrator(monkeypatch, tmp_path, state, empty_host, incremental=True)
+    assert orch._phase('pipx', orch.install_pipx_packages)() is True
+    assert ['pipx', 'uninstall', 'httpie'] not in commands
+    assert 'httpie' in state.applied('pipx')
+
+    orch, commands = make_orchestrator(monkeypatch, tmp_path, state, empty_host, incremental=True, prune=True)
+    assert orch._phase('pipx', orch.install_pipx_packages)() is True
+    assert ['pipx', 'uninstall', 'httpie'] in commands
+    assert state.applied('pipx') == {'black': 'black'}
@@ -0,0 +1,122 @@
+import json
+from pathlib import Path
+
+from orchestrate.inventory import Inventory, parse_dpkg_status
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.state import StateCache, npm_global_prefix
+
+DPKG_STATUS = """Package: jq
+Status: install ok installed
+Version: 1.6-2.1
+Description: lightweight JSON processor
+ continuation line mentioning Version: 9
+
+Package: tree
+Status: deinstall ok config-files
+Version: 2.1.0-1
+
+Package: libc6
+Status: install ok installed
+Architecture: amd64
+Version: 2.36-9
+
+Package: libc6
+Status: install ok installed
+Architecture: i386
+Version: 2.35-1
+"""
+
+
+def _npm_package(modules, name, version):
+    (modules / name).mkdir(parents=True)
+    (modules / name / 'package.json').write_text(json.dumps({'name': name, 'version': version}))
+
+
+def test_dpkg_status_keeps_installed_packages_only():
+    assert parse_dpkg_status(DPKG_STATUS.splitlines(keepends=True)) == {'jq': '1.6-2.1', 'libc6': '2.36-9'}
+
+
+def test_inventory_reads_each_manager(tmp_path):
+    status = tmp_path / 'status'
+    status.write_text(DPKG_STATUS)
+    venvs = tmp_path / 'venvs'
+    (venvs / 'black').mkdir(parents=True)
+    (venvs / 'black' / 'pipx_metadata.json').write_text(
+        json.dumps({'main_package': {'package': 'black', 'package_version': '24.1.0'}})
+    )
+    (venvs / 'broken').mkdir()
+    modules = tmp_path / 'node_modules'
+    _npm_package(modules, 'prettier', '3.1.0')
+    _npm_package(modules, '@mermaid-js/mermaid-cli', '10.9.1')
+    (modules / '.bin').mkdir()
+    cellar = tmp_path / 'brew' / 'Cellar'
+    (cellar / 'ripgrep' / '13.0.0').mkdir(parents=True)
+    (cellar / 'ripgrep' / '14.1.0').mkdir()
+    (tmp_path / 'brew' / 'Caskroom' / 'iterm2' / '3.5.0').mkdir(parents=True)
+
+    inventory = Inventory(status, venvs, modules, cellar)
+    assert inventory.index() == {
+        'apt': {'jq': '1.6-2.1', 'libc6': '2.36-9'},
+        'brew': {'ripgrep': '14.1.0', 'iterm2': '3.5.0'},
+        'pipx': {'black': '24.1.0'},
+        'npm': {'@mermaid-js/mermaid-cli': '10.9.1', 'prettier': '3.1.0'},
+    }
+    assert Inventory(tmp_path / 'missing', tmp_path / 'missing').versions('pipx') is None
+
+
+def test_orchestrator_skips_installed_packages_without_listing(monkeypatch, tmp_path):
+    (tmp_path / 'npm.yaml').write_text('packages:\n  - prettier@^3\n  - http-server\n')
+    modules = tmp_path / 'node_modules'
+    _npm_package(modules, 'prettier', '3.1.0')
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), inventory=Inventory(npm_modules=modules))
+    calls = []
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(orch, 'list_installed', lambda cmd, check=True: calls.append(cmd) or '{}')
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: calls.append(cmd) or True)
+
+    assert orch.install_npm_packages() is True
+    assert calls == [['npm', 'install', '-g', 'http-server']]
+
+
+def test_listing_fallback_without_the_manager(tmp_path, empty_host):
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), **empty_host)
+    assert orch.list_installed([str(tmp_path / 'no-such-manager'), 'list']) is None
+    assert orch.tracer.spans[-1].exit_code == 127
+
+
+def _clean_npm_env(monkeypatch, home):
+    for key in ('NPM_CONFIG_PREFIX', 'npm_config_prefix', 'NPM_CONFIG_USERCONFIG', 'npm_config_userconfig',
+                'NPM_CONFIG_GLOBALCONFIG', 'npm_config_globalconfig'):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setenv('PATH', str(home / 'empty'))
+
+
+def test_npm_prefix_from_env_and_npmrc(monkeypatch, tmp_path):
+    _clean_npm_env(monkeypatch, tmp_path)
+    assert npm_global_prefix() is None
+    (tmp_path / '.npmrc').write_text('; user config\nfund=false\nprefix = ~/.npm-global\n')
+    assert npm_global_prefix() == tmp_path / '.npm-global'
+    monkeypatch.setenv('npm_config_prefix', '/opt/npm')
+    assert npm_global_prefix() == Path('/opt/npm')
+
+
+def test_npm_prefix_follows_version_manager_symlinks(monkeypatch, tmp_path):
+    _clean_npm_env(monkeypatch, tmp_path)
+    version = tmp_path / '.nvm' / 'versions' / 'node' / 'v20.12.2'
+    cli = version / 'lib' / 'node_modules' / 'npm' / 'bin' / 'npm-cli.js'
+    cli.parent.mkdir(parents=True)
+    cli.write_text('')
+    (version / 'bin').mkdir()
+    (version / 'bin' / 'node').write_text('')
+    shims = tmp_path / 'shims'
+    shims.mkdir()
+    for name, target in (('node', version / 'bin' / 'node'), ('npm', cli)):
+        target.chmod(0o755)
+        (shims / name).symlink_to(target)
+    monkeypatch.setenv('PATH', str(shims))
+    assert npm_global_prefix() == version
+
+    (version / 'etc').mkdir()
+    (version / 'etc' / 'npmrc').write_text('prefix=${HOME}/global\n')
+    assert npm_global_prefix() == tmp_path / 'global'
@@ -0,0 +1,39 @@
+from orchestrate.journal import Journal
+from orchestrate.main import BootstrapOrchestrator
+
+
+def test_resume_loads_finished_packages(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    assert journal.begin(tmp_path / 'config') == 0
+    journal.record('pipx', ['black'])
+    journal.record('npm', ['typescript@5.4.5'])
+    with open(path, 'a') as f:
+        f.write('{"manager": "pipx", "pack')  # cut short by a crash
+
+    resumed = Journal(path)
+    assert resumed.begin(tmp_path / 'config', resume=True) == 2
+    assert resumed.resumed('pipx') == {'black'}
+    assert Journal(path).begin(tmp_path / 'other', resume=True) == 0
+
+    journal.clear()
+    assert not path.exists()
+
+
+def test_resume_skips_finished_packages(monkeypatch, tmp_path, empty_host):
+    config = tmp_path / 'config'
+    config.mkdir()
+    (config / 'pipx.yaml').write_text('packages:\n  - black\n  - ruff\n')
+    journal = Journal(tmp_path / 'journal.jsonl')
+    journal.begin(config)
+    journal.record('pipx', ['black'])
+
+    orch = BootstrapOrchestrator(config, journal=Journal(journal.path), resume=True, **empty_host)
+    orch.journal.begin(config, resume=True)
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(orch, 'list_installed', lambda cmd, check=True: '')
+    installs = []
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: installs.append(cmd) or True)
+    assert orch.install_pipx_packages() is True
+    assert installs == [['pipx', 'install', 'ruff']]
+    assert Journal(journal.path).begin(config, resume=True) == 2
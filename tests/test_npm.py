@@ -0,0 +1,70 @@
+import json
+
+from orchestrate.config import load_bootstrap_config
+from orchestrate.inventory import Inventory
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.npm import parse_ls_json, spec_satisfied, split_spec
+from orchestrate.state import StateCache
+
+LS_OUTPUT = json.dumps({
+    'name': 'lib',
+    'dependencies': {
+        '@mermaid-js/mermaid-cli': {'version': '10.9.1'},
+        'http-server': {'version': '14.1.1'},
+        'broken': {'missing': True},
+    },
+})
+
+
+def test_specs():
+    assert split_spec('@mermaid-js/mermaid-cli') == ('@mermaid-js/mermaid-cli', None)
+    assert split_spec('@mermaid-js/mermaid-cli@10.9.1') == ('@mermaid-js/mermaid-cli', '10.9.1')
+    assert split_spec('prettier@^3') == ('prettier', '^3')
+    installed = parse_ls_json(LS_OUTPUT)
+    assert installed == {'@mermaid-js/mermaid-cli': '10.9.1', 'http-server': '14.1.1'}
+    assert spec_satisfied('@mermaid-js/mermaid-cli', installed)
+    assert spec_satisfied('http-server@14.1.1', installed)
+    assert not spec_satisfied('http-server@14.0.0', installed)
+    assert spec_satisfied('http-server@^14', installed)
+    assert not spec_satisfied('broken', installed)
+
+
+def test_npm_pins_in_config(tmp_path):
+    (tmp_path / 'npm.yaml').write_text(
+        'packages:\n  - "@mermaid-js/mermaid-cli"\n  - http-server@14.1.1\n'
+        '  - name: prettier\n    version: "^3"\n'
+    )
+    config = load_bootstrap_config(tmp_path)
+    assert config.npm == ('@mermaid-js/mermaid-cli', 'http-server', 'prettier')
+    assert config.npm_specs() == ['@mermaid-js/mermaid-cli', 'http-server@14.1.1', 'prettier@^3']
+
+
+def test_missing_packages_install_in_one_call(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'npm.yaml').write_text(
+        'packages:\n  - "@mermaid-js/mermaid-cli"\n  - http-server@14.2.0\n  - prettier\n'
+    )
+    # No readable npm prefix, so the installed list comes from ``npm ls``.
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), backend=empty_host['backend'],
+                                 inventory=Inventory(npm_modules=tmp_path / 'none'))
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(orch, 'list_installed', lambda cmd, check=True: LS_OUTPUT)
+    calls = []
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: calls.append((cmd, env)) or True)
+
+    assert orch.install_npm_packages() is True
+    assert len(calls) == 1
+    cmd, env = calls[0]
+    assert cmd == ['npm', 'install', '-g', 'http-server@14.2.0', 'prettier']
+    assert env['PUPPETEER_SKIP_DOWNLOAD'] == '1'
+
+
+def test_failed_batch_retries_individually(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'npm.yaml').write_text('packages:\n  - good\n  - bad\n')
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), **empty_host)
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(orch, 'list_installed', lambda cmd, check=True: '{}')
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: 'bad' not in cmd)
+
+    assert orch.install_npm_packages() is False
+    assert orch.package_failed('npm', 'bad')
+    assert not orch.package_failed('npm', 'good')
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from orchestrate.artifacts import ArtifactCache
+from orchestrate.inventory import Inventory
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.pipeline import FetchPipeline
+from orchestrate.state import StateCache
+
+
+def test_installs_wait_for_their_own_fetch():
+    def boom():
+        raise RuntimeError('network down')
+    pipeline = FetchPipeline(workers=2)
+    pipeline.start([('pipx:black', lambda: True), ('pipx:isort', lambda: False), ('npm', boom)])
+    assert pipeline.wait('pipx:black') is True
+    assert pipeline.wait('pipx:isort') is False
+    assert pipeline.wait('npm') is False
+    assert pipeline.wait('pipx:never-queued') is False
+
+
+def test_queue_is_bounded_and_close_releases_waiters():
+    gate, started = threading.Event(), []
+
+    def fetch(key):
+        def run():
+            started.append(key)
+            return gate.wait(5)
+        return run
+
+    pipeline = FetchPipeline(workers=1, depth=1)
+    pipeline.start([(f'pipx:tool{i}', fetch(f'tool{i}')) for i in range(5)])
+    time.sleep(0.2)
+    assert started == ['tool0']
+    assert pipeline._queue.qsize() == 1
+
+    pipeline.close()
+    assert pipeline.wait('pipx:tool4', timeout=5) is False
+    gate.set()
+    assert pipeline.wait('pipx:tool0', timeout=5) is True
+    assert started == ['tool0']
+
+
+def test_pipx_installs_overlap_later_downloads(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n  - isort\n')
+    (tmp_path / 'venvs').mkdir()
+    artifacts = ArtifactCache(tmp_path / 'artifacts')
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), artifacts=artifacts,
+                                 inventory=Inventory(pipx_venvs=tmp_path / 'venvs'),
+                                 backend=empty_host['backend'], pipeline=FetchPipeline(workers=1))
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: cmd == 'pipx')
+    events, lock = [], threading.Lock()
+
+    def fake_run(cmd, desc, env=None, **kwargs):
+        with lock:
+            events.append(('start', desc, (env or {}).get('PIP_NO_INDEX')))
+        time.sleep(0.1)
+        with lock:
+            events.append(('end', desc, None))
+        return True
+
+    monkeypatch.setattr(orch, 'run_command', fake_run)
+    orch.start_fetches()
+    try:
+        assert orch.install_pipx_packages() is True
+    finally:
+        orch.pipeline.close()
+
+    order = [(kind, desc) for kind, desc, _ in events]
+    # black installs from the cache while isort is still downloading.
+    assert order.index(('start', 'pipx install black (cached)')) < order.index(('end', 'pip download isort'))
+    assert order.index(('end', 'pip download isort')) < order.index(('start', 'pipx install isort (cached)'))
+    assert [no_index for kind, desc, no_index in events if kind == 'start' and desc.startswith('pipx')] == ['1', '1']
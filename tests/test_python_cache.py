@@ -0,0 +1,70 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'install' / 'install_python.sh'
+
+FAKE_PYENV = """#!/bin/sh
+echo "$*" >> "$CALLS"
+case "$1" in
+    root) echo "$PYENV_ROOT" ;;
+    install)
+        mkdir -p "$PYENV_ROOT/versions/$2/bin"
+        printf '#!/bin/sh\\necho "Python $2 $MAKE_OPTS"\\n' > "$PYENV_ROOT/versions/$2/bin/python3"
+        chmod +x "$PYENV_ROOT/versions/$2/bin/python3" ;;
+esac
+"""
+
+
+def _bin(directory, name, body):
+    path = directory / name
+    path.write_text(body)
+    path.chmod(0o755)
+
+
+def _run(tmp_path, pyenv_root, cache):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir(exist_ok=True)
+    _bin(bin_dir, 'pyenv', FAKE_PYENV)
+    _bin(bin_dir, 'python3', '#!/bin/sh\necho "Python 3.11.2"\n')
+    _bin(bin_dir, 'pip3', '#!/bin/sh\n')
+    env = {
+        'HOME': str(tmp_path),
+        'PATH': f"{bin_dir}:/usr/bin:/bin",
+        'PYENV_ROOT': str(pyenv_root),
+        'PYTHON_VERSION': '3.11.2',
+        'PYTHON_BUILD_CACHE': str(cache),
+        'CALLS': str(tmp_path / 'calls'),
+    }
+    subprocess.run(['bash', str(SCRIPT)], check=True, env=env, capture_output=True)
+    calls = (tmp_path / 'calls').read_text().splitlines()
+    os.unlink(tmp_path / 'calls')
+    return calls
+
+
+def test_second_host_restores_the_cached_build(tmp_path):
+    cache = tmp_path / 'cache'
+    pyenv_root = tmp_path / 'pyenv'
+    calls = _run(tmp_path, pyenv_root, cache)
+    assert 'install 3.11.2' in calls
+    archives = list(cache.glob('python-3.11.2-*.tar.gz'))
+    assert len(archives) == 1 and Path(f"{archives[0]}.sha256").exists()
+
+    # A fresh host with the same prefix extracts instead of building.
+    shutil.rmtree(pyenv_root)
+    calls = _run(tmp_path, pyenv_root, cache)
+    assert 'install 3.11.2' not in calls and 'rehash' in calls
+    assert os.access(pyenv_root / 'versions' / '3.11.2' / 'bin' / 'python3', os.X_OK)
+    assert not list((pyenv_root / 'versions').glob('.restore.*'))
+
+
+def test_corrupt_cache_entry_is_rebuilt(tmp_path):
+    cache = tmp_path / 'cache'
+    pyenv_root = tmp_path / 'pyenv'
+    _run(tmp_path, pyenv_root, cache)
+    archive = next(cache.glob('*.tar.gz'))
+    archive.write_bytes(archive.read_bytes()[:-10])
+
+    shutil.rmtree(pyenv_root)
+    assert 'install 3.11.2' in _run(tmp_path, pyenv_root, cache)
@@ -0,0 +1,77 @@
+import pytest
+
+from orchestrate.config import ConfigError, load_bootstrap_config, parse_network
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.retry import RetryPolicy, retryable, with_mirror
+from orchestrate.runner import CommandResult
+
+
+def test_backoff_grows_to_max_delay():
+    policy = RetryPolicy(attempts=5, delay=1, backoff=3, max_delay=5, jitter=0)
+    assert [policy.wait_before(n) for n in (2, 3, 4)] == [1, 3, 5]
+
+
+def test_with_mirror():
+    assert with_mirror('npm', 'https://r.example', ['npm', 'install'])[0] == [
+        'npm', 'install', '--registry', 'https://r.example'
+    ]
+    cmd, env = with_mirror('pipx', 'https://p.example/simple', ['pipx', 'install', 'black'], {})
+    assert cmd == ['pipx', 'install', 'black'] and env == {'PIP_INDEX_URL': 'https://p.example/simple'}
+    assert with_mirror('apt', 'http://m.example', ['apt-get'], None) == (['apt-get'], None)
+
+
+def test_parse_network_rejects_unknown_managers(tmp_path):
+    path = tmp_path / 'network.yaml'
+    with pytest.raises(ConfigError):
+        parse_network({'mirrors': {'apt': ['http://m.example']}}, path)
+    with pytest.raises(ConfigError):
+        parse_network({'retries': {'npm': {'tries': 2}}}, path)
+    retries, mirrors = parse_network({'retries': {'default': {'attempts': 4}}, 'mirrors': {'npm': 'https://r'}}, path)
+    assert retries['default'].attempts == 4 and mirrors == {'npm': ('https://r',)}
+
+
+def test_transient_failure_is_retried_on_next_mirror(monkeypatch, tmp_path):
+    config = tmp_path / 'config'
+    config.mkdir()
+    (config / 'network.yaml').write_text(
+        'retries:\n  npm: {attempts: 3, delay: 0}\n'
+        'mirrors:\n  npm: [https://one.example, https://two.example]\n'
+    )
+    log = tmp_path / 'npm.log'
+    npm = tmp_path / 'npm'
+    npm.write_text(f'#!/bin/sh\necho "$@" >> {log}\ncase "$*" in *two.example*) exit 0;; esac\n'
+                   'echo "npm ERR! code ECONNRESET"\nexit 1\n')
+    npm.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{tmp_path}:/usr/bin:/bin")
+
+    orch = BootstrapOrchestrator(config)
+    assert orch.run_command(['npm', 'install', '-g', 'x'], 'npm install', manager='npm') is True
+    assert log.read_text().splitlines() == [
+        'install -g x --registry https://one.example',
+        'install -g x --registry https://two.example',
+    ]
+    assert load_bootstrap_config(config).retries['npm'].delay == 0
+    spans = [span for span in orch.tracer.spans if span.category == 'command']
+    assert [span.retries for span in spans] == [0, 1]
+
+
+def test_only_network_errors_are_retryable():
+    assert retryable(CommandResult(100, ['E: Failed to fetch http://m/jq.deb  Temporary failure resolving']), 'apt')
+    assert retryable(CommandResult(1, ['npm ERR! code ETIMEDOUT']), 'npm')
+    assert retryable(CommandResult(1, ["pip._vendor.requests.exceptions.ConnectionError: ('Connection aborted.')"]),
+                     'pipx')
+    assert not retryable(CommandResult(100, ['E: Unable to locate package nope']), 'apt')
+    assert not retryable(CommandResult(1, ['npm ERR! code ERESOLVE']), 'npm')
+    assert not retryable(CommandResult(1, ['npm ERR! code ETIMEDOUT']), None)
+    assert not retryable(CommandResult(124, ['curl: (28) timeout'], timed_out=True), 'fallback')
+
+
+def test_missing_command_is_not_retried(monkeypatch, tmp_path):
+    monkeypatch.setenv('PATH', str(tmp_path))
+    orch = BootstrapOrchestrator(tmp_path)
+    monkeypatch.setattr(orch, 'retry_policy', lambda manager: RetryPolicy(attempts=3, delay=0))
+    attempts = []
+    run_once = orch._run_once
+    monkeypatch.setattr(orch, '_run_once', lambda *args: attempts.append(args) or run_once(*args))
+    assert orch.run_command(['no-such-manager'], 'install', manager='apt') is False
+    assert len(attempts) == 1
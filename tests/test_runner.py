@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+
+from orchestrate.runner import EXIT_CANCELLED, EXIT_CANNOT_RUN, EXIT_NOT_FOUND, EXIT_TIMEOUT, CommandRunner
+
+
+def test_streams_lines_into_bounded_buffer():
+    seen = []
+    runner = CommandRunner(buffer_lines=3)
+    result = runner.run(['sh', '-c', 'for i in 1 2 3 4 5; do echo line$i; done; printf "a\\rb" >&2'],
+                        on_line=seen.append)
+    assert result.ok
+    assert seen == ['line1', 'line2', 'line3', 'line4', 'line5', 'a', 'b']
+    assert result.lines == ['line5', 'a', 'b']
+    assert result.output_bytes == len('line1\n') * 5 + 3
+
+
+def test_timeout_kills_process_group(tmp_path):
+    pidfile = tmp_path / 'child.pid'
+    runner = CommandRunner(step_timeout=0.5)
+    start = time.monotonic()
+    result = runner.run(['sh', '-c', f'sleep 30 & echo $! > {pidfile}; wait'])
+    assert time.monotonic() - start < 5
+    assert result.timed_out and result.returncode == EXIT_TIMEOUT
+    time.sleep(0.1)
+    stat = f"/proc/{int(pidfile.read_text())}/stat"
+    # The orphaned sleep is gone, or at most a zombie awaiting its reaper.
+    assert not os.path.exists(stat) or open(stat).read().split()[2] == 'Z'
+
+
+def test_global_deadline_and_concurrency():
+    runner = CommandRunner(deadline=1.0)
+    start = time.monotonic()
+    results = runner.run_many([['sleep', '0.3']] * 4 + [['sleep', '10']])
+    assert time.monotonic() - start < 3
+    assert [r.ok for r in results] == [True] * 4 + [False]
+    assert results[-1].timed_out
+
+
+def test_commands_that_cannot_start_fail_without_raising(tmp_path):
+    script = tmp_path / 'script'
+    script.write_text('#!/bin/sh\n')
+    runner = CommandRunner()
+    result = runner.run([str(script)])
+    assert result.returncode == EXIT_CANNOT_RUN and 'Permission denied' in result.lines[0]
+    result = runner.run(['true'], cwd=str(tmp_path / 'missing'))
+    assert result.returncode == EXIT_CANNOT_RUN and 'missing' in result.lines[0]
+
+
+def test_cancel_and_missing_command():
+    runner = CommandRunner()
+    assert runner.run(['definitely-not-a-command']).returncode == EXIT_NOT_FOUND
+    threading.Timer(0.3, runner.cancel).start()
+    result = runner.run(['sleep', '10'])
+    assert result.cancelled and result.returncode == EXIT_CANCELLED
+    assert runner.run(['true']).cancelled
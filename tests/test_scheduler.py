@@ -0,0 +1,81 @@
+import threading
+import time
+
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.scheduler import InstallScheduler, InstallTask
+from orchestrate.state import StateCache
+
+
+def _sleeper(active, peak, lock, delay=0.05, result=True):
+    def action():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(delay)
+        with lock:
+            active[0] -= 1
+        return result
+    return action
+
+
+def test_independent_tasks_run_concurrently():
+    active, peak, lock = [0], [0], threading.Lock()
+    tasks = [InstallTask('pipx', f'pkg{i}', _sleeper(active, peak, lock)) for i in range(4)]
+    results = InstallScheduler(jobs=4).run(tasks)
+    assert [r.package for r in results] == ['pkg0', 'pkg1', 'pkg2', 'pkg3']
+    assert all(r.success for r in results)
+    assert peak[0] > 1
+
+
+def test_locked_tasks_are_serialized():
+    active, peak, lock = [0], [0], threading.Lock()
+    tasks = [InstallTask('apt', f'pkg{i}', _sleeper(active, peak, lock)) for i in range(3)]
+    InstallScheduler(jobs=4).run(tasks)
+    assert peak[0] == 1
+
+
+def test_failures_are_reported_per_package():
+    def boom():
+        raise RuntimeError('network down')
+    tasks = [
+        InstallTask('npm', 'good', lambda: True),
+        InstallTask('npm', 'bad', lambda: False),
+        InstallTask('npm', 'worse', boom),
+    ]
+    results = InstallScheduler(jobs=2).run(tasks)
+    assert {r.package: r.success for r in results} == {'good': True, 'bad': False, 'worse': False}
+
+
+def test_hold_serializes_with_locked_tasks():
+    scheduler = InstallScheduler(jobs=2)
+    active, peak, lock = [0], [0], threading.Lock()
+    worker = threading.Thread(target=scheduler.run,
+                              args=([InstallTask('apt', 'gh', _sleeper(active, peak, lock))],))
+    with scheduler.hold('dpkg'):
+        worker.start()
+        _sleeper(active, peak, lock)()
+    worker.join()
+    assert peak[0] == 1
+
+
+def test_first_pipx_install_runs_alone(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n  - isort\n  - ruff\n')
+    monkeypatch.setenv('PIPX_HOME', str(tmp_path / 'pipx'))
+    orch = BootstrapOrchestrator(tmp_path, jobs=4, state=StateCache(), **empty_host)
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: cmd == 'pipx')
+    events, lock = [], threading.Lock()
+
+    def fake_run(cmd, desc, env=None, **kwargs):
+        with lock:
+            events.append(('start', cmd[-1]))
+        time.sleep(0.05)
+        with lock:
+            events.append(('end', cmd[-1]))
+        return True
+
+    monkeypatch.setattr(orch, 'run_command', fake_run)
+    assert orch.install_pipx_packages() is True
+    # black builds pipx's shared venv; isort and ruff then install together.
+    assert events[:2] == [('start', 'black'), ('end', 'black')]
+    assert {package for kind, package in events[2:4]} == {'isort', 'ruff'}
+    assert [kind for kind, package in events[2:4]] == ['start', 'start']
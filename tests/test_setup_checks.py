@@ -0,0 +1,47 @@
+import json
+import time
+
+import test_setup
+
+
+def _tool(directory, name, body):
+    path = directory / name
+    path.write_text(f"#!/bin/sh\n{body}\n")
+    path.chmod(0o755)
+
+
+def test_run_checks_is_concurrent_and_bounded(monkeypatch, tmp_path):
+    _tool(tmp_path, 'fast', 'echo fast 1.0')
+    _tool(tmp_path, 'broken', 'exit 2')
+    _tool(tmp_path, 'hang', 'exec sleep 30')
+    monkeypatch.setenv('PATH', f"{tmp_path}:/usr/bin:/bin")
+
+    checks = [('Tools', 'fast', 'fast', '--version'),
+              ('Tools', 'broken', 'broken', '--version'),
+              ('Tools', 'missing', 'missing', '--version')]
+    checks += [('Tools', 'hang', f'hang{i}', '--version') for i in range(4)]
+
+    start = time.monotonic()
+    results = test_setup.run_checks(checks, jobs=8, timeout=0.5, deadline=5)
+    assert time.monotonic() - start < 3
+
+    by_name = {r.name: r for r in results}
+    assert by_name['fast'].ok and by_name['fast'].detail == 'fast 1.0'
+    assert by_name['broken'].detail == 'Command failed'
+    assert by_name['missing'].detail == 'Not found'
+    assert all(by_name[f'hang{i}'].detail.startswith('Timed out') for i in range(4))
+
+
+def test_probe_import_does_not_import(monkeypatch):
+    result = test_setup.probe_import('json', 'json')
+    assert result.ok
+    assert not test_setup.probe_import('nope', 'definitely_not_a_module').ok
+
+
+def test_json_report(tmp_path):
+    results = [test_setup.CheckResult('Tools', 'a', 'a', True, 'a 1.0'),
+               test_setup.CheckResult('Tools', 'b', 'b', False, 'Not found')]
+    out = tmp_path / 'r.json'
+    test_setup.write_json(results, str(out))
+    data = json.loads(out.read_text())
+    assert data['total'] == 2 and data['passed'] == 1
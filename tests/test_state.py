@@ -0,0 +1,50 @@
+import subprocess
+
+from orchestrate import main as orchestrator_main
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.state import StateCache
+
+
+def test_state_cache_round_trip(tmp_path):
+    path = tmp_path / 'state.json'
+    cache = StateCache(path)
+    cache.record('pipx', 'black', 'abc', '24.1.0')
+    cache.save()
+
+    reloaded = StateCache(path)
+    assert reloaded.is_current('pipx', 'black', 'abc')
+    assert not reloaded.is_current('pipx', 'black', 'def')
+    assert reloaded.packages('pipx')['black']['version'] == '24.1.0'
+
+
+def test_unchanged_rerun_spawns_nothing(monkeypatch, tmp_path, empty_host):
+    config = tmp_path / 'config'
+    config.mkdir()
+    (config / 'pipx.yaml').write_text('packages:\n  - black\n  - ruff\n')
+    monkeypatch.setenv('PIPX_HOME', str(tmp_path / 'pipx'))
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    (bin_dir / 'pipx').write_text('#!/bin/sh\n')
+    (bin_dir / 'pipx').chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}:/usr/bin:/bin")
+    state_path = tmp_path / 'state.json'
+
+    calls = []
+
+    def fake_subprocess_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout='', stderr='')
+
+    monkeypatch.setattr(orchestrator_main.subprocess, 'run', fake_subprocess_run)
+
+    first = BootstrapOrchestrator(config, state=StateCache(state_path), **empty_host)
+    monkeypatch.setattr(first, 'run_command', lambda cmd, desc, env=None, **kwargs: calls.append(cmd) or True)
+    assert first.install_pipx_packages() is True
+    first.state.save()
+    assert ['pipx', 'install', 'black'] in calls
+
+    calls.clear()
+    second = BootstrapOrchestrator(config, state=StateCache(state_path), **empty_host)
+    monkeypatch.setattr(second, 'run_command', lambda cmd, desc, env=None, **kwargs: calls.append(cmd) or True)
+    assert second.install_pipx_packages() is True
+    assert calls == []
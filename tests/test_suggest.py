@@ -0,0 +1,62 @@
+import gzip
+import os
+
+import pytest
+
+from orchestrate import suggest
+from orchestrate.suggest import SuggestionIndex, load_apt_index
+
+NAMES = ['fd-find', 'ripgrep', 'bat', 'neovim', 'neovim-qt', 'git-lfs', 'just', 'jq', 'libssl-dev', 'libssl3']
+
+
+def _lists(directory):
+    directory.mkdir()
+    (directory / 'deb.debian.org_debian_dists_main_binary-amd64_Packages').write_text(
+        ''.join(f"Package: {name}\nVersion: 1.0\n\n" for name in NAMES[:6])
+    )
+    (directory / 'security.debian.org_main_binary-amd64_Packages.gz').write_bytes(
+        gzip.compress(''.join(f"Package: {name}\n\n" for name in NAMES[6:]).encode())
+    )
+    (directory / 'lock').write_text('')
+    return directory
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('ripgrp', ['ripgrep']),
+    ('fd', ['fd-find']),
+    ('neovm', ['neovim']),
+    ('neovim', ['neovim-qt']),
+    ('libssl-devv', ['libssl-dev']),
+    ('gitlfs', ['git-lfs']),
+    ('zzzzzz', []),
+])
+def test_suggestions(query, expected):
+    assert SuggestionIndex.build(NAMES).suggest(query) == expected
+
+
+def test_pure_python_distance_matches():
+    for a, b in [('kitten', 'sitting'), ('', 'abc'), ('fd', 'fd-find'), ('libssl-dev', 'libssl3')]:
+        assert suggest._levenshtein(a, b) == suggest.edit_distance(a, b)
+
+
+def test_index_is_rebuilt_only_when_lists_change(monkeypatch, tmp_path):
+    lists = _lists(tmp_path / 'lists')
+    cache = tmp_path / 'apt-names.idx'
+    assert load_apt_index(lists, cache).suggest('jus') == ['just']
+
+    builds = []
+    original = SuggestionIndex.build.__func__
+    monkeypatch.setattr(SuggestionIndex, 'build', classmethod(lambda cls, names: builds.append(1) or original(cls, names)))
+    assert load_apt_index(lists, cache).names == sorted(NAMES)
+    assert builds == []
+
+    packages = next(lists.glob('*_Packages'))
+    packages.write_text(packages.read_text() + "Package: just-lsp\n\n")
+    os.utime(packages, ns=(0, packages.stat().st_mtime_ns + 10**9))
+    assert 'just-lsp' in load_apt_index(lists, cache).suggest('just')
+    assert builds == [1]
+
+
+def test_no_lists_means_no_index(tmp_path):
+    (tmp_path / 'lists').mkdir()
+    assert load_apt_index(tmp_path / 'lists', tmp_path / 'idx') is None
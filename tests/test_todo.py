@@ -0,0 +1,70 @@
+import threading
+
+from orchestrate.todo import MissingPackages, read_sidecar
+
+
+def test_flush_writes_todo_and_sidecar_once(tmp_path):
+    todo = tmp_path / 'TODO.md'
+    todo.write_text('# TODO\n\n- [x] Add apt installation method for gh')
+    registry = MissingPackages(todo, 'orchestrator')
+    for pkg in ('just', 'gh', 'just'):
+        registry.add(pkg)
+    assert registry.pending() == ['just', 'gh']
+    assert registry.flush() == 1
+    assert todo.read_text() == (
+        '# TODO\n\n- [x] Add apt installation method for gh\n- [ ] Add apt installation method for just\n'
+    )
+
+    again = MissingPackages(todo, 'verify_apt_packages.py')
+    again.add('just')
+    assert again.flush() == 0
+    assert [(e['package'], e['source']) for e in read_sidecar(todo)] == [
+        ('just', 'orchestrator'), ('gh', 'orchestrator')
+    ]
+
+
+def test_missing_todo_is_created_only_on_request(tmp_path):
+    todo = tmp_path / 'TODO.md'
+    registry = MissingPackages(todo, 'orchestrator', create_todo=False)
+    registry.add('just')
+    registry.flush()
+    assert not todo.exists() and read_sidecar(todo)
+
+    registry = MissingPackages(todo, 'verify_apt_packages.py')
+    registry.add('just')
+    registry.flush()
+    assert todo.read_text() == '# TODO\n- [ ] Add apt installation method for just\n'
+
+
+def test_concurrent_flushes_lose_nothing(tmp_path):
+    todo = tmp_path / 'TODO.md'
+    todo.write_text('# TODO\n')
+    registries = []
+    for writer in range(8):
+        registry = MissingPackages(todo, f'writer-{writer}')
+        for i in range(25):
+            registry.add(f'pkg-{writer}-{i}')
+        registries.append(registry)
+    threads = [threading.Thread(target=r.flush) for r in registries]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lines = todo.read_text().splitlines()[1:]
+    assert len(lines) == len(set(lines)) == 200
+    assert len(read_sidecar(todo)) == 200
+
+
+def test_suggestions_are_shown_but_not_part_of_the_item(tmp_path):
+    todo = tmp_path / 'TODO.md'
+    todo.write_text('# TODO\n')
+    registry = MissingPackages(todo, 'orchestrator')
+    registry.add('ripgrp', suggestions=['ripgrep'])
+    registry.flush()
+    assert todo.read_text().endswith('- [ ] Add apt installation method for ripgrp (did you mean: ripgrep?)\n')
+    assert read_sidecar(todo)[0]['suggestions'] == ['ripgrep']
+
+    again = MissingPackages(todo, 'verify_apt_packages.py')
+    again.add('ripgrp')
+    again.flush()
+    assert todo.read_text().count('ripgrp') == 1
@@ -0,0 +1,58 @@
+import os
+
+from orchestrate.config import VerifyOverrides
+from orchestrate.tools import ToolIndex
+
+
+def _tool(directory, name, body='echo "$0 1.0"', mode=0o755):
+    directory.mkdir(exist_ok=True)
+    path = directory / name
+    path.write_text(f"#!/bin/sh\n{body}\n")
+    path.chmod(mode)
+    return path
+
+
+def test_resolve_follows_path_order(tmp_path):
+    first, second = tmp_path / 'a', tmp_path / 'b'
+    _tool(first, 'tool', mode=0o644)
+    _tool(second, 'tool')
+    _tool(first, 'other')
+    index = ToolIndex(f"{first}:{second}")
+    assert index.resolve('tool') == str(second / 'tool')
+    assert index.resolve('other') == str(first / 'other')
+    assert not index.exists('missing')
+
+
+def test_new_binaries_are_found_after_install(tmp_path):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    index = ToolIndex(str(bin_dir))
+    assert not index.exists('npm')
+    _tool(bin_dir, 'npm')
+    # Make sure the directory mtime moves even on coarse-grained filesystems.
+    os.utime(bin_dir, ns=(0, os.stat(bin_dir).st_mtime_ns + 10**9))
+    assert index.exists('npm')
+
+
+def test_versions_are_cached_until_the_binary_changes(tmp_path):
+    calls = tmp_path / 'calls'
+    tool = _tool(tmp_path / 'bin', 'nvim', f'echo x >> {calls}; echo "NVIM v0.9.5"; echo extra')
+    cache = tmp_path / 'tools.json'
+    index = ToolIndex(str(tool.parent), cache_path=cache)
+    assert index.version('nvim').detail == 'NVIM v0.9.5'
+    assert index.version('nvim').cached
+    index.save()
+
+    reloaded = ToolIndex(str(tool.parent), cache_path=cache)
+    assert reloaded.version('nvim').cached
+    assert len(calls.read_text().splitlines()) == 1
+
+    tool.write_text(tool.read_text().replace('0.9.5', '0.10.0'))
+    assert reloaded.version('nvim').detail == 'NVIM v0.10.0'
+
+
+def test_overrides_pick_command_and_flag():
+    overrides = VerifyOverrides({'neovim': 'nvim'}, {'fd-find': 'fdfind'}, {'go': 'version'})
+    assert ToolIndex(overrides=overrides, is_linux=True).command_for('fd-find') == ('fdfind', '--version')
+    assert ToolIndex(overrides=overrides, is_linux=False).command_for('neovim') == ('nvim', '--version')
+    assert ToolIndex(overrides=overrides).command_for('go') == ('go', 'version')
@@ -0,0 +1,36 @@
+import json
+
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.trace import Tracer
+
+
+def test_spans_are_recorded_and_sorted():
+    tracer = Tracer()
+    with tracer.span('fast', 'command') as span:
+        span.exit_code = 0
+    with tracer.span('slow', 'command') as span:
+        sum(range(200000))
+    assert [s.name for s in tracer.slowest(1)] == ['slow']
+    assert tracer.slowest(categories=['phase']) == []
+
+
+def test_run_command_writes_jsonl_and_chrome(tmp_path):
+    orch = BootstrapOrchestrator(tmp_path)
+    assert orch.run_command(['sh', '-c', 'echo hello; exit 0'], 'say hello') is True
+    assert orch.run_command(['sh', '-c', 'exit 3'], 'fail') is False
+
+    jsonl = tmp_path / 'trace.jsonl'
+    orch.tracer.write(jsonl, 'jsonl', {'apt_refresh': {'action': 'skip'}})
+    lines = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert lines[0]['type'] == 'run'
+    assert lines[0]['report']['apt_refresh']['action'] == 'skip'
+    spans = {line['name']: line for line in lines[1:]}
+    assert spans['say hello']['exit_code'] == 0
+    assert spans['say hello']['output_bytes'] == len('hello\n')
+    assert spans['fail']['exit_code'] == 3
+
+    chrome = tmp_path / 'trace.json'
+    orch.tracer.write(chrome, 'chrome')
+    events = json.loads(chrome.read_text())['traceEvents']
+    assert {e['name'] for e in events} == {'say hello', 'fail'}
+    assert all(e['ph'] == 'X' for e in events)
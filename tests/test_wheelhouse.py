@@ -0,0 +1,50 @@
+from orchestrate.main import BootstrapOrchestrator
+from orchestrate.runner import CommandResult
+from orchestrate.state import StateCache
+from orchestrate.wheelhouse import Wheelhouse, link_duplicate_files
+
+
+def make_site(venvs, tool, files):
+    site = venvs / tool / 'lib' / 'python3.12' / 'site-packages'
+    for name, content in files.items():
+        (site / name).parent.mkdir(parents=True, exist_ok=True)
+        (site / name).write_text(content)
+    return site
+
+
+def test_link_duplicate_files(tmp_path):
+    shared = {'click/core.py': 'x' * 1000, 'click/__init__.py': 'init'}
+    a = make_site(tmp_path, 'black', {**shared, 'black.py': 'black'})
+    b = make_site(tmp_path, 'isort', {**shared, 'black.py': 'other'})
+    saved = link_duplicate_files(tmp_path)
+    assert saved == 1000 + len('init')
+    assert (a / 'click/core.py').stat().st_ino == (b / 'click/core.py').stat().st_ino
+    assert (a / 'black.py').stat().st_ino != (b / 'black.py').stat().st_ino
+    assert link_duplicate_files(tmp_path) == 0
+
+
+def test_pipx_installs_use_shared_wheelhouse(monkeypatch, tmp_path, empty_host):
+    (tmp_path / 'pipx.yaml').write_text('packages:\n  - black\n  - isort\n')
+    monkeypatch.setenv('PIPX_HOME', str(tmp_path / 'pipx'))
+    orch = BootstrapOrchestrator(tmp_path, state=StateCache(), wheelhouse=Wheelhouse(tmp_path / 'wheels'),
+                                 **empty_host)
+    monkeypatch.setattr(orch, 'check_command_exists', lambda cmd: True)
+    monkeypatch.setattr(orch, 'list_installed', lambda cmd: '')
+
+    builds = []
+
+    def fake_run(cmd, **kwargs):
+        builds.append(cmd)
+        # The local-only attempt fails until the wheels have been downloaded.
+        return CommandResult(1 if '--no-index' in cmd else 0)
+
+    monkeypatch.setattr(orch.runner, 'run', fake_run)
+    installs = []
+    monkeypatch.setattr(orch, 'run_command', lambda cmd, desc, env=None, **kwargs: installs.append((cmd, env)) or True)
+
+    assert orch.install_pipx_packages() is True
+    assert len(builds) == 2
+    assert builds[1][-2:] == ['black', 'isort']
+    assert [cmd for cmd, _ in installs] == [['pipx', 'install', 'black'], ['pipx', 'install', 'isort']]
+    assert all(env['PIP_NO_INDEX'] == '1' and env['PIP_FIND_LINKS'] == str(tmp_path / 'wheels')
+               for _, env in installs)